@@ -0,0 +1,99 @@
+# -----------------------------
+# bench_backends.py - Accuracy / latency / size of each workout model backend
+# -----------------------------
+# Trains every backend on the same split of "gym recommendation.csv" and
+# reports test accuracy, single-row and batch predict_proba latency and the
+# pickled artifact size:
+#   python bench_backends.py
+#   python bench_backends.py --backend random_forest --backend decision_tree --output backends.json
+import argparse
+import io
+import json
+import time
+
+import joblib
+import numpy as np
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+from train_model import (calculate_bmi, create_bmi_level, encode_features,
+                         prepare_dataset, prepare_features_target)
+from carefolio_ml.workout_backends import WORKOUT_BACKENDS, make_workout_estimator
+
+
+def load_split():
+    df = prepare_dataset()
+    if df is None or not calculate_bmi(df) or not create_bmi_level(df):
+        raise SystemExit("❌ Could not prepare the dataset")
+    if encode_features(df)[0] is None:
+        raise SystemExit("❌ Could not encode the dataset")
+    X, y, _ = prepare_features_target(df)
+    y_encoded = LabelEncoder().fit_transform(y.astype(str))
+    return train_test_split(X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded)
+
+
+def time_call(fn, repeats):
+    """Median wall time of `fn()` in milliseconds"""
+    fn()  # warm up
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def bench_backend(backend, X_train, X_test, y_train, y_test, batch_size, repeats):
+    model = make_workout_estimator(backend, X_train.columns)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+
+    y_pred = model.predict(X_test)
+    single = X_test.iloc[[0]]
+    batch = X_test.sample(batch_size, replace=len(X_test) < batch_size, random_state=0)
+
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+
+    return {
+        "backend": backend,
+        "accuracy": round(accuracy_score(y_test, y_pred), 4),
+        "macro_f1": round(f1_score(y_test, y_pred, average="macro"), 4),
+        "fit_s": round(fit_s, 2),
+        "single_row_ms": round(time_call(lambda: model.predict_proba(single), repeats), 3),
+        "batch_ms": round(time_call(lambda: model.predict_proba(batch), max(repeats // 10, 5)), 2),
+        "batch_size": batch_size,
+        "artifact_kb": round(len(buffer.getvalue()) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Workout model backend benchmark")
+    parser.add_argument("--backend", action="append", choices=list(WORKOUT_BACKENDS),
+                        help="backend to benchmark (repeatable, default: all)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    X_train, X_test, y_train, y_test = load_split()
+    print(f"✓ Train {X_train.shape}, test {X_test.shape}\n")
+
+    results = []
+    print(f"{'backend':<24}{'acc':>8}{'f1':>8}{'1-row ms':>10}{'batch ms':>10}{'size KB':>10}")
+    for backend in args.backend or list(WORKOUT_BACKENDS):
+        result = bench_backend(backend, X_train, X_test, y_train, y_test, args.batch_size, args.repeats)
+        results.append(result)
+        print(f"{backend:<24}{result['accuracy']:>8}{result['macro_f1']:>8}"
+              f"{result['single_row_ms']:>10}{result['batch_ms']:>10}{result['artifact_kb']:>10}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
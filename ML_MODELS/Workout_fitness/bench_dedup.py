@@ -0,0 +1,89 @@
+# -----------------------------
+# bench_dedup.py - Fitting on every row vs unique rows with counts
+# -----------------------------
+# Fits each backend on the full training split and on its compacted form
+# (see carefolio_ml/dedup.py) and reports the compression ratio, fit time
+# speedup and whether test accuracy holds:
+#   python bench_dedup.py
+#   python bench_dedup.py --backend random_forest --dedup-bin Height=0.01 --dedup-bin Weight=0.5
+import argparse
+import json
+import time
+
+import numpy as np
+from sklearn.metrics import accuracy_score, f1_score
+
+from bench_backends import load_split
+from carefolio_ml.dedup import compact_rows, parse_bin_widths
+from carefolio_ml.workout_backends import WORKOUT_BACKENDS, fit_workout_estimator, make_workout_estimator
+
+
+def timed_fit(backend, X, y, weights, repeats):
+    """(fitted model, median fit seconds)"""
+    times = []
+    for _ in range(repeats):
+        model = make_workout_estimator(backend, X.columns)
+        start = time.perf_counter()
+        fit_workout_estimator(model, X, y, weights)
+        times.append(time.perf_counter() - start)
+    return model, float(np.median(times))
+
+
+def bench_backend(backend, X_train, X_test, y_train, y_test, variants, repeats):
+    full_model, full_s = timed_fit(backend, X_train, y_train, None, repeats)
+    full_pred = full_model.predict(X_test)
+    rows = [{
+        "backend": backend, "variant": "full", "fitted_rows": len(X_train), "compression_ratio": 1.0,
+        "fit_s": round(full_s, 3), "speedup": 1.0,
+        "accuracy": round(accuracy_score(y_test, full_pred), 4),
+        "macro_f1": round(f1_score(y_test, full_pred, average="macro"), 4),
+        "agreement_with_full": 1.0,
+    }]
+    for variant, bin_widths in variants:
+        X_fit, y_fit, weights, stats = compact_rows(X_train, y_train, bin_widths)
+        model, fit_s = timed_fit(backend, X_fit, y_fit, weights, repeats)
+        pred = model.predict(X_test)
+        rows.append({
+            "backend": backend, "variant": variant, "fitted_rows": stats["unique_rows"],
+            "compression_ratio": stats["compression_ratio"],
+            "fit_s": round(fit_s, 3), "speedup": round(full_s / max(fit_s, 1e-9), 2),
+            "accuracy": round(accuracy_score(y_test, pred), 4),
+            "macro_f1": round(f1_score(y_test, pred, average="macro"), 4),
+            "agreement_with_full": round(float(np.mean(pred == full_pred)), 4),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Duplicate-row compaction benchmark (workout model)")
+    parser.add_argument("--backend", action="append", choices=list(WORKOUT_BACKENDS),
+                        help="backend to benchmark (repeatable, default: random_forest)")
+    parser.add_argument("--dedup-bin", action="append", metavar="COLUMN=WIDTH",
+                        help="also benchmark near-duplicate merging with these bin widths")
+    parser.add_argument("--repeats", type=int, default=3, help="fits per variant (median time)")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    X_train, X_test, y_train, y_test = load_split()
+    print(f"✓ Train {X_train.shape}, test {X_test.shape}\n")
+
+    variants = [("exact", None)]
+    if args.dedup_bin:
+        variants.append(("binned", parse_bin_widths(args.dedup_bin)))
+
+    results = []
+    print(f"{'backend':<24}{'variant':<9}{'rows':>8}{'ratio':>8}{'fit s':>8}{'speedup':>9}{'acc':>8}{'agree':>8}")
+    for backend in args.backend or ["random_forest"]:
+        for row in bench_backend(backend, X_train, X_test, y_train, y_test, variants, args.repeats):
+            results.append(row)
+            print(f"{backend:<24}{row['variant']:<9}{row['fitted_rows']:>8}{row['compression_ratio']:>8}"
+                  f"{row['fit_s']:>8}{row['speedup']:>9}{row['accuracy']:>8}{row['agreement_with_full']:>8}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# -----------------------------
+# bench_early_exit.py - Full forest vs anytime (early-exit) inference
+# -----------------------------
+# Fits the random forest on the usual split and serves the test rows with
+# sklearn predict_proba and with AnytimeForest (see carefolio_ml/early_exit.py)
+# in exact and confidence modes. Reports mean trees evaluated, agreement with
+# the full forest and single-row / batch latency:
+#   python bench_early_exit.py
+#   python bench_early_exit.py --block-size 5 --confidence 0.8 --confidence 0.95 --output early_exit.json
+import argparse
+import json
+import time
+
+import numpy as np
+
+from bench_backends import load_split, time_call
+from carefolio_ml.early_exit import AnytimeForest
+from carefolio_ml.workout_backends import make_workout_estimator
+
+
+def single_row_ms(fn, X, repeats):
+    """Median latency of serving one row at a time"""
+    rows = [X.iloc[[i % len(X)]] for i in range(repeats)]
+    fn(rows[0])  # warm up
+    times = []
+    for row in rows:
+        start = time.perf_counter()
+        fn(row)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Anytime forest benchmark (workout model)")
+    parser.add_argument("--backend", default="random_forest", choices=["random_forest", "decision_tree"])
+    parser.add_argument("--block-size", type=int, action="append",
+                        help="trees per block (repeatable, default: 1, 5, 10, 25)")
+    parser.add_argument("--confidence", type=float, action="append",
+                        help="confidence mode threshold (repeatable, default: 0.8, 0.9)")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    X_train, X_test, y_train, y_test = load_split()
+    model = make_workout_estimator(args.backend, X_train.columns).fit(X_train, y_train)
+    full_pred = model.predict(X_test)
+    print(f"✓ Train {X_train.shape}, test {X_test.shape}, {len(getattr(model, 'estimators_', [model]))} trees\n")
+
+    full_batch_ms = time_call(lambda: model.predict_proba(X_test), max(args.repeats // 10, 5))
+    full_single_ms = single_row_ms(model.predict_proba, X_test, args.repeats)
+    results = [{
+        "mode": "sklearn", "block_size": None, "mean_trees": float(len(getattr(model, "estimators_", [model]))),
+        "agreement": 1.0, "accuracy": round(float(np.mean(full_pred == y_test)), 4),
+        "single_ms": round(full_single_ms, 3), "batch_ms": round(full_batch_ms, 3),
+        "single_speedup": 1.0, "batch_speedup": 1.0,
+    }]
+
+    modes = [("off", None), ("exact", None)] + [("confidence", c) for c in args.confidence or [0.8, 0.9]]
+    for block_size in args.block_size or [1, 5, 10, 25]:
+        forest = AnytimeForest(model, block_size=block_size)
+        for mode, confidence in modes:
+            run = lambda X: forest.predict_proba(X, mode=mode, confidence=confidence)
+            proba, trees_used = run(X_test)
+            pred = model.classes_[proba.argmax(axis=1)]
+            batch_ms = time_call(lambda: run(X_test), max(args.repeats // 10, 5))
+            single_ms = single_row_ms(run, X_test, args.repeats)
+            results.append({
+                "mode": mode if confidence is None else f"confidence@{confidence}",
+                "block_size": block_size,
+                "mean_trees": round(float(trees_used.mean()), 2),
+                "agreement": round(float(np.mean(pred == full_pred)), 4),
+                "accuracy": round(float(np.mean(pred == y_test)), 4),
+                "single_ms": round(single_ms, 3), "batch_ms": round(batch_ms, 3),
+                "single_speedup": round(full_single_ms / max(single_ms, 1e-9), 2),
+                "batch_speedup": round(full_batch_ms / max(batch_ms, 1e-9), 2),
+            })
+
+    print(f"{'mode':<18}{'block':>6}{'trees':>8}{'agree':>8}{'acc':>8}{'1 row ms':>10}{'batch ms':>10}"
+          f"{'1 row x':>9}{'batch x':>9}")
+    for row in results:
+        print(f"{row['mode']:<18}{str(row['block_size'] or '-'):>6}{row['mean_trees']:>8}{row['agreement']:>8}"
+              f"{row['accuracy']:>8}{row['single_ms']:>10}{row['batch_ms']:>10}"
+              f"{row['single_speedup']:>9}{row['batch_speedup']:>9}")
+
+    exact = [row for row in results if row["mode"] == "exact"]
+    if any(row["agreement"] < 1.0 for row in exact):
+        print("❌ Exact mode disagreed with the full forest")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
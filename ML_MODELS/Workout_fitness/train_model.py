@@ -1,5 +1,8 @@
+import argparse
+import os
+import sys
+import time
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score
@@ -7,6 +10,12 @@ import joblib
 import warnings
 warnings.filterwarnings('ignore')
 
+# Shared inference library lives in ML_MODELS/carefolio_ml
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from carefolio_ml.dedup import compact_rows, parse_bin_widths, report_compaction, report_dedup_check
+from carefolio_ml.workout_backends import (WORKOUT_BACKEND, WORKOUT_BACKENDS, fit_workout_estimator,
+                                           make_workout_estimator, save_model_info)
+
 def debug_dataset(df):
     """Debug function to analyze dataset"""
     print("=== DATASET ANALYSIS ===")
@@ -148,9 +157,15 @@ def prepare_features_target(df):
     
     return X, y, target_col
 
-def train_model():
-    """Main training function"""
-    print("🚀 Starting model training...")
+def train_model(backend=WORKOUT_BACKEND, dedup=True, bin_widths=None, dedup_check=False):
+    """Main training function.
+
+    With `dedup` the model is fitted on unique training rows weighted by
+    their counts; `bin_widths` also merges near-duplicates (see dedup.py).
+    `dedup_check` also fits on every row and prints how the two compare
+    (off by default: it costs more than the compaction saves).
+    """
+    print(f"🚀 Starting model training (backend: {backend})...")
     
     # Step 1: Load and prepare dataset
     df = prepare_dataset()
@@ -196,17 +211,18 @@ def train_model():
     
     # Step 8: Train model with better parameters
     try:
-        model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            min_samples_split=5,
-            min_samples_leaf=2,
-            random_state=42,
-            class_weight='balanced'  # Handle imbalanced classes
-        )
+        model = make_workout_estimator(backend, X.columns)
         
-        model.fit(X_train, y_train)
-        print("✓ Model training completed")
+        weights = None
+        X_fit, y_fit = X_train, y_train
+        if dedup:
+            X_fit, y_fit, weights, dedup_stats = compact_rows(X_train, y_train, bin_widths)
+            report_compaction("Training rows", dedup_stats)
+        
+        start = time.perf_counter()
+        fit_workout_estimator(model, X_fit, y_fit, weights)
+        fit_seconds = time.perf_counter() - start
+        print(f"✓ Model training completed in {fit_seconds:.2f}s")
         
         # Evaluate model
         train_accuracy = accuracy_score(y_train, model.predict(X_train))
@@ -214,15 +230,25 @@ def train_model():
         
         print(f"✓ Training Accuracy: {train_accuracy:.3f}")
         print(f"✓ Testing Accuracy: {test_accuracy:.3f}")
+
+        # Compacted fits are only approximately equivalent (see dedup.py)
+        dedup_metrics = None
+        if dedup and dedup_check:
+            reference = make_workout_estimator(backend, X.columns)
+            fit_workout_estimator(reference, X_train, y_train)
+            reference_pred = reference.predict(X_test)
+            dedup_metrics = report_dedup_check("Test set", accuracy_score(y_test, reference_pred), test_accuracy,
+                                               agreement=(reference_pred == model.predict(X_test)).mean())
         
-        # Feature importance
-        feature_importance = pd.DataFrame({
-            'feature': X.columns,
-            'importance': model.feature_importances_
-        }).sort_values('importance', ascending=False)
-        
-        print("\n📊 Feature Importance:")
-        print(feature_importance)
+        # Feature importance (tree backends only)
+        if hasattr(model, 'feature_importances_'):
+            feature_importance = pd.DataFrame({
+                'feature': X.columns,
+                'importance': model.feature_importances_
+            }).sort_values('importance', ascending=False)
+            
+            print("\n📊 Feature Importance:")
+            print(feature_importance)
         
     except Exception as e:
         print(f"❌ Error training model: {e}")
@@ -234,6 +260,14 @@ def train_model():
         joblib.dump(label_encoders, 'label_encoders.pkl')
         joblib.dump(target_encoder, 'target_encoder.pkl')
         joblib.dump(dataset_info, 'dataset_info.pkl')
+        save_model_info('.', backend, X.columns, {
+            'train_accuracy': round(train_accuracy, 4),
+            'test_accuracy': round(test_accuracy, 4),
+            'training_rows': len(X_train),
+            'fitted_rows': len(X_fit),
+            'fit_seconds': round(fit_seconds, 2),
+            'dedup_check': dedup_metrics
+        })
         
         print("✅ Model and encoders saved successfully!")
         print("Files created:")
@@ -241,6 +275,7 @@ def train_model():
         print("  - label_encoders.pkl") 
         print("  - target_encoder.pkl")
         print("  - dataset_info.pkl")
+        print("  - model_info.json")
         
         return True
         
@@ -296,11 +331,23 @@ def test_saved_model():
         return False
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the workout recommendation model")
+    parser.add_argument("--backend", default=WORKOUT_BACKEND, choices=list(WORKOUT_BACKENDS),
+                        help="estimator to train (default: $WORKOUT_BACKEND or random_forest)")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="fit on every row instead of unique rows with counts")
+    parser.add_argument("--dedup-bin", action="append", metavar="COLUMN=WIDTH",
+                        help="round COLUMN to WIDTH before merging duplicates ('*' = all continuous columns)")
+    parser.add_argument("--dedup-check", action="store_true",
+                        help="also fit on every row and compare it with the compacted model (slower)")
+    args = parser.parse_args()
+
     print("🏋️  Gym Recommendation Model Training")
     print("=" * 40)
     
     # Train the model
-    success = train_model()
+    success = train_model(args.backend, dedup=not args.no_dedup, bin_widths=parse_bin_widths(args.dedup_bin),
+                          dedup_check=args.dedup_check)
     
     if success:
         # Test the saved model
@@ -0,0 +1,300 @@
+# -----------------------------
+# bench_inference.py - In-process inference stage timings + golden checks
+# -----------------------------
+# Times every inference stage of both models in process and checks the
+# outputs against golden predictions stored next to this file:
+#
+#   python bench_inference.py run --output results.json            # timings + golden check
+#   python bench_inference.py run --sizes 1 32 1000 --output new.json
+#   python bench_inference.py compare results.json new.json --threshold 0.15
+#   python bench_inference.py update-golden                        # after an intended model change
+#
+# `run` and `compare` exit non-zero on a golden mismatch or a slowdown, so
+# they can gate a retrain or a dependency upgrade.
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from carefolio_ml import get_meal_planner, get_workout_recommender, survey_to_meal_features, survey_to_workout_input
+
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden_predictions.json")
+DEFAULT_SIZES = [1, 32, 1000, 100000]
+GOLDEN_SIZE = 64
+NUTRITION_TOLERANCE = 1        # grams / kcal, outputs are rounded integers
+CONFIDENCE_TOLERANCE = 0.5     # percentage points
+MIN_STAGE_MS = 0.05            # ignore slowdowns smaller than this
+
+
+# -----------------------------
+# Inputs
+# -----------------------------
+def make_surveys(count, seed=42):
+    """Deterministic raw surveys covering every categorical option"""
+    rng = random.Random(seed)
+    surveys = []
+    for _ in range(count):
+        surveys.append({
+            "age": rng.randint(18, 75),
+            "gender": rng.choice(["Male", "Female"]),
+            "height_cm": round(rng.uniform(150, 195), 1),
+            "weight_kg": round(rng.uniform(45, 120), 1),
+            "has_diabetes": rng.random() < 0.3,
+            "has_hypertension": rng.random() < 0.3,
+            "fitness_goal": rng.choice(["weight_loss", "weight_gain", "maintain"]),
+            "activity_level": rng.choice(["sedentary", "moderate", "active"]),
+            "diet_type": rng.choice(["non-veg", "vegan", "vegetarian"]),
+            "preferred_cuisine": rng.choice(["Indian", "Continental", "Mediterranean"]),
+            "sugar_level": rng.randint(70, 180),
+            "sleep_hours": round(rng.uniform(4, 9), 1),
+            "stress_level": rng.randint(1, 10),
+            "systolic_bp": rng.randint(100, 160),
+            "diastolic_bp": rng.randint(60, 100),
+        })
+    return surveys
+
+
+def artifact_fingerprints(meal_planner, recommender):
+    """sha256 of every loaded artifact file, to explain golden mismatches"""
+    paths = []
+    for name in sorted(os.listdir(meal_planner.artifacts_dir)):
+        if name.endswith(".pkl"):
+            paths.append(os.path.join(meal_planner.artifacts_dir, name))
+    for name in ("model.pkl", "label_encoders.pkl", "target_encoder.pkl", "dataset_info.pkl"):
+        paths.append(os.path.join(recommender.model_dir, name))
+    fingerprints = {}
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                fingerprints[os.path.relpath(path, os.path.dirname(os.path.dirname(GOLDEN_FILE)))] = \
+                    hashlib.sha256(f.read()).hexdigest()[:16]
+    return fingerprints
+
+
+# -----------------------------
+# Stage timings
+# -----------------------------
+def time_stage(timings, stage, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    timings.setdefault(stage, []).append((time.perf_counter() - start) * 1000)
+    return result
+
+
+def meal_pipeline(planner, features, timings):
+    X = time_stage(timings, "preprocess", planner.preprocess, features)
+    y_reg = time_stage(timings, "predict_regression", planner.regressor.predict, X)
+    y_clf = time_stage(timings, "predict_classification", planner.classify_raw, X)
+    return time_stage(timings, "decode", planner.decode, y_reg, y_clf)
+
+
+def workout_pipeline(recommender, inputs, timings):
+    mapped = time_stage(timings, "map_inputs", lambda: [recommender.map_inputs(item) for item in inputs])
+    X = time_stage(timings, "encode", recommender.encode, [row for row, _, _, _ in mapped])
+    fitness_types, confidences, trees_used = time_stage(timings, "predict", recommender.predict_encoded, X)
+    return time_stage(timings, "generate_recommendations", recommender.build_results,
+                      mapped, fitness_types, confidences, trees_used)
+
+
+def repeats_for(size, budget_s=1.0, max_repeats=50):
+    # Small batches are noisy, big ones are slow: scale repeats with size
+    return max(1, min(max_repeats, int(budget_s * 1000 / max(size, 1))))
+
+
+def summarize(timings, size):
+    stages = {}
+    for stage, values in timings.items():
+        stages[stage] = {"median_ms": round(float(np.median(values)), 4),
+                         "p95_ms": round(float(np.percentile(values, 95)), 4)}
+    total = sum(s["median_ms"] for s in stages.values())
+    return {"batch_size": size, "repeats": len(next(iter(timings.values()))),
+            "total_ms": round(total, 4), "rows_per_s": round(size / total * 1000) if total else None,
+            "stages": stages}
+
+
+def bench(sizes):
+    planner = get_meal_planner().load()
+    recommender = get_workout_recommender().load()
+    surveys = make_surveys(max(sizes))
+    meal_features = [survey_to_meal_features(s) for s in surveys]
+    workout_inputs = [survey_to_workout_input(s) for s in surveys]
+
+    results = {"meal": [], "workout": []}
+    for size in sizes:
+        repeats = repeats_for(size)
+        for model, pipeline, owner, inputs in (("meal", meal_pipeline, planner, meal_features),
+                                               ("workout", workout_pipeline, recommender, workout_inputs)):
+            pipeline(owner, inputs[:size], {})  # warm up
+            timings = {}
+            for _ in range(repeats):
+                pipeline(owner, inputs[:size], timings)
+            results[model].append(summarize(timings, size))
+            print(f"{model:<8} batch={size:<7} total {results[model][-1]['total_ms']:>10.3f} ms  " +
+                  "  ".join(f"{k}={v['median_ms']:.3f}" for k, v in results[model][-1]["stages"].items()))
+    return results
+
+
+# -----------------------------
+# Golden predictions
+# -----------------------------
+def golden_outputs():
+    planner = get_meal_planner().load()
+    recommender = get_workout_recommender().load()
+    surveys = make_surveys(GOLDEN_SIZE, seed=7)
+    # Only model-driven fields; explanation texts are fixed lookups
+    meal = [{**r["predicted_nutrition"], "meal_plan_type": r["meal_plan_type"], "health_tag": r["health_tag"]}
+            for r in planner.predict([survey_to_meal_features(s) for s in surveys])]
+    workout = [{"bmi": r["bmi"], "level": r["level"], "fitness_type": r["result"]["Fitness Type"],
+                "confidence": float(r["result"]["Confidence"].rstrip("%"))}
+               for r in recommender.recommend([survey_to_workout_input(s) for s in surveys])]
+    return {"meal": meal, "workout": workout, "fingerprints": artifact_fingerprints(planner, recommender)}
+
+
+def diff_meal(expected, actual):
+    problems = []
+    for key, value in expected.items():
+        if isinstance(value, str):
+            if value != actual[key]:
+                problems.append(f"{key}: {value!r} -> {actual[key]!r}")
+        elif abs(value - actual[key]) > NUTRITION_TOLERANCE:
+            problems.append(f"{key}: {value} -> {actual[key]}")
+    return problems
+
+
+def diff_workout(expected, actual):
+    problems = []
+    for key in ("level", "fitness_type"):
+        if expected[key] != actual[key]:
+            problems.append(f"{key}: {expected[key]!r} -> {actual[key]!r}")
+    if abs(expected["confidence"] - actual["confidence"]) > CONFIDENCE_TOLERANCE:
+        problems.append(f"confidence: {expected['confidence']} -> {actual['confidence']}")
+    return problems
+
+
+def check_golden():
+    if not os.path.exists(GOLDEN_FILE):
+        print(f"⚠️  No golden file at {GOLDEN_FILE}; run update-golden first")
+        return {"passed": False, "mismatches": None}
+    with open(GOLDEN_FILE) as f:
+        golden = json.load(f)
+    current = golden_outputs()
+
+    mismatches = []
+    for model, differ in (("meal", diff_meal), ("workout", diff_workout)):
+        for i, (expected, actual) in enumerate(zip(golden[model], current[model])):
+            for problem in differ(expected, actual):
+                mismatches.append(f"{model}[{i}] {problem}")
+
+    if mismatches:
+        print(f"❌ {len(mismatches)} golden mismatches")
+        for line in mismatches[:20]:
+            print(f"   {line}")
+        changed = {k for k, v in current["fingerprints"].items() if golden["fingerprints"].get(k) != v}
+        if changed:
+            print(f"   artifacts changed since the golden file: {', '.join(sorted(changed))}")
+    else:
+        print(f"✓ Golden predictions match ({GOLDEN_SIZE} surveys per model)")
+    return {"passed": not mismatches, "mismatches": len(mismatches)}
+
+
+def update_golden():
+    with open(GOLDEN_FILE, "w") as f:
+        json.dump(golden_outputs(), f, indent=1, sort_keys=True)
+        f.write("\n")
+    print(f"✅ Saved golden predictions to {GOLDEN_FILE}")
+
+
+# -----------------------------
+# Compare
+# -----------------------------
+def compare(baseline_path, candidate_path, threshold):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(candidate_path) as f:
+        candidate = json.load(f)
+
+    regressions = []
+    for model in ("meal", "workout"):
+        base_by_size = {r["batch_size"]: r for r in baseline["results"][model]}
+        for run in candidate["results"][model]:
+            base = base_by_size.get(run["batch_size"])
+            if base is None:
+                continue
+            for stage, stats in run["stages"].items():
+                if stage not in base["stages"]:
+                    continue
+                before, after = base["stages"][stage]["median_ms"], stats["median_ms"]
+                ratio = after / before if before else float("inf")
+                flag = ratio > 1 + threshold and after - before > MIN_STAGE_MS
+                if flag:
+                    regressions.append((model, run["batch_size"], stage, before, after, ratio))
+                print(f"{'⚠️ ' if flag else '  '}{model:<8} batch={run['batch_size']:<7} {stage:<26}"
+                      f"{before:>10.3f} -> {after:>10.3f} ms  ({ratio:.2f}x)")
+
+    golden = candidate.get("golden", {})
+    if golden and not golden.get("passed", True):
+        print(f"\n❌ Candidate failed the golden check ({golden.get('mismatches')} mismatches)")
+    if regressions:
+        print(f"\n❌ {len(regressions)} stages slower than {1 + threshold:.2f}x baseline")
+    elif golden.get("passed", True):
+        print(f"\n✓ No stage slower than {1 + threshold:.2f}x baseline")
+    return not regressions and golden.get("passed", True)
+
+
+def environment():
+    import sklearn
+    import xgboost
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scikit-learn": sklearn.__version__,
+        "xgboost": xgboost.__version__,
+        "cpu_count": os.cpu_count(),
+        "machine": platform.machine(),
+        "meal_planner_variant": get_meal_planner().variant,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process inference benchmarks with golden checks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="time every stage and check golden predictions")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    run_parser.add_argument("--output", help="write results as JSON")
+    run_parser.add_argument("--skip-golden", action="store_true")
+
+    compare_parser = sub.add_parser("compare", help="flag stages slower than baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown (0.15 = 15%%)")
+
+    sub.add_parser("update-golden", help="store current predictions as the golden set")
+    args = parser.parse_args()
+
+    if args.command == "update-golden":
+        update_golden()
+        return 0
+
+    if args.command == "compare":
+        return 0 if compare(args.baseline, args.candidate, args.threshold) else 1
+
+    golden = {"passed": True, "mismatches": 0, "skipped": True} if args.skip_golden else check_golden()
+    results = {"environment": environment(), "golden": golden, "results": bench(args.sizes)}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Saved results to {args.output}")
+    return 0 if golden["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+# -----------------------------
+# bench_startup.py - Cold start of the ML services: import time + first prediction
+# -----------------------------
+# Every measurement runs in a fresh interpreter, like a new replica:
+#   import_s            importing the service entry point (the Flask apps load
+#                       their models at import, so this includes that)
+#   first_prediction_s  import + the first successful request / predict call
+#   process_s           wall time of the whole child process
+# Medians over --repeats runs are checked against startup_budget.json next
+# to this file:
+#
+#   python bench_startup.py run --output startup.json       # exits 1 over budget
+#   python bench_startup.py run --service meal_app --repeats 5
+#   python bench_startup.py update-budget --headroom 1.5     # after an intended change
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ML_MODELS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_budget.json")
+
+# Modules a serving process should only pull in when a model needs them
+WATCHED_MODULES = ("pandas", "sklearn", "sklearn.ensemble", "sklearn.preprocessing", "xgboost", "scipy",
+                   "carefolio_ml.dedup", "carefolio_ml.workout_backends", "train_model")
+
+SAMPLE_MEAL = {"age": 30, "gender_male": 1, "height_cm": 175, "weight_kg": 72, "fitness_goal_weight_loss": 1,
+               "activity_level_moderate": 1, "diet_type_non-veg": 1, "preferred_cuisine_Indian": 1}
+SAMPLE_WORKOUT = {"sex": "Male", "age": "30", "height": "1.75", "weight": "72", "hypertension": "No",
+                  "diabetes": "No", "goal": "Weight Loss"}
+
+
+# -----------------------------
+# Child: one cold start
+# -----------------------------
+def _import_file(name, path):
+    sys.path.insert(0, os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _meal_app():
+    module = _import_file("meal_app", os.path.join(ML_MODELS_DIR, "nutrition_model", "app.py"))
+
+    def predict():
+        response = module.app.test_client().post("/predict", json=dict(SAMPLE_MEAL))
+        assert response.status_code == 200 and "predicted_nutrition" in response.get_json(), response.data[:200]
+    return predict
+
+
+def _workout_app():
+    module = _import_file("workout_app", os.path.join(ML_MODELS_DIR, "Workout_fitness", "app.py"))
+
+    def predict():
+        response = module.app.test_client().post("/recommend", data=SAMPLE_WORKOUT)
+        assert response.status_code == 200 and b"error occurred" not in response.data, response.data[:200]
+    return predict
+
+
+def _meal_library():
+    sys.path.insert(0, ML_MODELS_DIR)
+    from carefolio_ml import get_meal_planner
+
+    return lambda: get_meal_planner().predict([dict(SAMPLE_MEAL)])
+
+
+def _workout_library():
+    sys.path.insert(0, ML_MODELS_DIR)
+    from carefolio_ml import get_workout_recommender
+
+    return lambda: get_workout_recommender().recommend([dict(SAMPLE_WORKOUT)])
+
+
+SERVICES = {
+    "meal_app": _meal_app,
+    "workout_app": _workout_app,
+    "meal_library": _meal_library,
+    "workout_library": _workout_library,
+}
+
+
+def child(service):
+    start = time.perf_counter()
+    predict = SERVICES[service]()
+    imported = time.perf_counter()
+    loaded_at_import = [m for m in WATCHED_MODULES if m in sys.modules]
+    predict()
+    done = time.perf_counter()
+    print(json.dumps({
+        "import_s": imported - start,
+        "first_prediction_s": done - start,
+        "modules_at_import": loaded_at_import,
+        "modules_after_prediction": [m for m in WATCHED_MODULES if m in sys.modules],
+    }))
+    sys.stdout.flush()
+    os._exit(0)  # don't wait on the apps' background threads
+
+
+# -----------------------------
+# Parent
+# -----------------------------
+def cold_start(service, workdir):
+    env = dict(os.environ, PLAN_STORE_PATH=os.path.join(workdir, "plan_store.db"), PYTHONDONTWRITEBYTECODE="1")
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "child", service],
+                          cwd=workdir, env=env, capture_output=True, text=True)
+    process_s = time.perf_counter() - start
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        raise SystemExit(f"❌ {service} failed to start:\n{proc.stderr[-2000:]}")
+    return {**json.loads(lines[-1]), "process_s": process_s}
+
+
+def measure(services, repeats):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for service in services:
+            cold_start(service, workdir)  # warm the OS file cache, not the interpreter
+            runs = [cold_start(service, workdir) for _ in range(repeats)]
+            results[service] = {
+                key: round(statistics.median(run[key] for run in runs), 3)
+                for key in ("import_s", "first_prediction_s", "process_s")
+            }
+            results[service]["modules_at_import"] = runs[-1]["modules_at_import"]
+            results[service]["modules_after_prediction"] = runs[-1]["modules_after_prediction"]
+            print(f"{service:<16} import {results[service]['import_s']:.3f}s, "
+                  f"first prediction {results[service]['first_prediction_s']:.3f}s, "
+                  f"process {results[service]['process_s']:.3f}s")
+    return results
+
+
+def load_budget():
+    if not os.path.exists(BUDGET_FILE):
+        return {}
+    with open(BUDGET_FILE) as f:
+        return json.load(f)["services"]
+
+
+def check_budget(results, budget):
+    """Budget overruns as messages (empty when everything fits)"""
+    failures = []
+    for service, measured in results.items():
+        for key, limit in budget.get(service, {}).items():
+            if key in measured and measured[key] > limit:
+                failures.append(f"{service} {key}: {measured[key]:.3f}s > budget {limit:.3f}s")
+    return failures
+
+
+def run(args):
+    results = measure(args.service or list(SERVICES), args.repeats)
+    failures = check_budget(results, load_budget())
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": platform.python_version(), "results": results, "over_budget": failures}, f, indent=2)
+        print(f"\n✅ Saved results to {args.output}")
+    for failure in failures:
+        print(f"❌ Over budget: {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ Within startup budget")
+
+
+def update_budget(args):
+    results = measure(args.service or list(SERVICES), args.repeats)
+    budget = load_budget()
+    for service, measured in results.items():
+        budget[service] = {key: round(measured[key] * args.headroom, 2) for key in ("import_s", "first_prediction_s")}
+    with open(BUDGET_FILE, "w") as f:
+        json.dump({"headroom": args.headroom, "machine": platform.machine(), "python": platform.python_version(),
+                   "services": budget}, f, indent=2)
+    print(f"\n✅ Saved budget to {BUDGET_FILE}")
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "child":
+        child(sys.argv[2])
+
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for the ML services")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, fn in (("run", run), ("update-budget", update_budget)):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--service", action="append", choices=list(SERVICES), help="repeatable, default: all")
+        cmd.add_argument("--repeats", type=int, default=3)
+        cmd.set_defaults(fn=fn)
+    sub.choices["run"].add_argument("--output", help="write results as JSON")
+    sub.choices["update-budget"].add_argument("--headroom", type=float, default=1.5,
+                                              help="budget = measured median x headroom")
+    args = parser.parse_args()
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    main()
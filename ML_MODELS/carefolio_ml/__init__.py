@@ -0,0 +1,46 @@
+"""In-process inference for the CareFolio meal planner and workout recommender.
+
+Both Flask services and the chatbot import from here instead of going over
+HTTP:
+
+    from carefolio_ml import get_meal_planner, get_workout_recommender
+
+    get_meal_planner().predict([survey_one_hot])
+    get_workout_recommender().recommend([{"sex": "Male", "age": 25, ...}])
+    get_combined_planner().plan([raw_survey])   # both models, run concurrently
+    get_plan_hash_batcher().add(plan)           # Merkle-batched plan receipt
+"""
+import importlib
+
+# name -> submodule. Resolved on first access (PEP 562), so importing one
+# service's entry points does not load the other model's libraries.
+_EXPORTS = {
+    "CombinedPlanner": "combined",
+    "get_combined_planner": "combined",
+    "MealPlanner": "meal_planner",
+    "get_meal_planner": "meal_planner",
+    "MerkleTree": "plan_hashing",
+    "PlanHashBatcher": "plan_hashing",
+    "get_plan_hash_batcher": "plan_hashing",
+    "hash_plan": "plan_hashing",
+    "verify_proof": "plan_hashing",
+    "survey_to_meal_features": "survey",
+    "survey_to_workout_input": "survey",
+    "WorkoutRecommender": "workout",
+    "get_workout_recommender": "workout",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
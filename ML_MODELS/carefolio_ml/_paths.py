@@ -0,0 +1,4 @@
+import os
+
+# ML_MODELS/ - the services keep their artifacts next to their app.py
+ML_MODELS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
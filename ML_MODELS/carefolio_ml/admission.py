@@ -0,0 +1,178 @@
+# -----------------------------
+# admission.py - Admission control and load shedding for the Flask services
+# -----------------------------
+# Per worker process:
+#   * at most ADMISSION_MAX_IN_FLIGHT requests run at once;
+#   * up to ADMISSION_MAX_QUEUE more may wait ADMISSION_QUEUE_TIMEOUT
+#     seconds for a slot; anything beyond that gets an immediate 503 with
+#     Retry-After instead of piling up inside gunicorn;
+#   * optional per-client token buckets (RATE_LIMIT_RPS / RATE_LIMIT_BURST)
+#     answer 429 with Retry-After.
+# Paths in ADMISSION_EXEMPT_PATHS ("/", "/health", "/metrics") bypass both,
+# so liveness checks keep answering while inference is saturated.
+#
+# This needs a threaded server. Run gunicorn with
+#   --worker-class gthread --threads N
+# where N >= ADMISSION_MAX_IN_FLIGHT + ADMISSION_MAX_QUEUE + a few for the
+# exempt paths (32 for the defaults). The default sync worker handles one
+# request at a time, so the limits are never reached, nothing gets a 503
+# and the excess waits in gunicorn's backlog, health checks included.
+#
+# Rate limit buckets are keyed on the peer address. Behind reverse proxies
+# set TRUSTED_PROXY_HOPS to their number so the client is read from
+# X-Forwarded-For (werkzeug's ProxyFix); without it the header is ignored,
+# since any client could send a fresh value to get a fresh bucket.
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", 8))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 16))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 0.5))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", 1))
+ADMISSION_EXEMPT_PATHS = frozenset(
+    p.strip() for p in os.getenv("ADMISSION_EXEMPT_PATHS", "/,/health,/metrics").split(",") if p.strip()
+)
+RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", 0))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", 10))
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", 10000))
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", 0))
+
+
+class AdmissionController:
+    """Bounded in-flight limit with a bounded, time-limited wait queue"""
+
+    def __init__(self, max_in_flight=ADMISSION_MAX_IN_FLIGHT, max_queue=ADMISSION_MAX_QUEUE,
+                 queue_timeout=ADMISSION_QUEUE_TIMEOUT):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self.in_flight = 0
+        self.queued = 0
+        self.stats = {"admitted": 0, "shed_queue_full": 0, "shed_queue_timeout": 0}
+
+    def try_acquire(self):
+        """Take a slot; False means shed the request"""
+        with self._cond:
+            if self.in_flight < self.max_in_flight:
+                self.in_flight += 1
+                self.stats["admitted"] += 1
+                return True
+            if self.queued >= self.max_queue:
+                self.stats["shed_queue_full"] += 1
+                return False
+
+            self.queued += 1
+            try:
+                admitted = self._cond.wait_for(lambda: self.in_flight < self.max_in_flight, self.queue_timeout)
+            finally:
+                self.queued -= 1
+            if not admitted:
+                self.stats["shed_queue_timeout"] += 1
+                return False
+            self.in_flight += 1
+            self.stats["admitted"] += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def report(self):
+        with self._cond:
+            return {**self.stats, "in_flight": self.in_flight, "queued": self.queued,
+                    "max_in_flight": self.max_in_flight, "max_queue": self.max_queue}
+
+
+class TokenBucketLimiter:
+    """Per-client token buckets; least recently seen clients are evicted"""
+
+    def __init__(self, rate=RATE_LIMIT_RPS, burst=RATE_LIMIT_BURST, max_clients=RATE_LIMIT_MAX_CLIENTS):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()  # client -> (tokens, last_refill)
+        self._lock = threading.Lock()
+        self.limited = 0
+
+    def check(self, client):
+        """(allowed, retry_after_seconds) for one request from `client`"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            else:
+                self.limited += 1
+            self._buckets[client] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        retry_after = 0 if allowed else max(1, math.ceil((1.0 - tokens) / self.rate))
+        return allowed, retry_after
+
+    def report(self):
+        with self._lock:
+            return {"shed_rate_limited": self.limited, "tracked_clients": len(self._buckets),
+                    "rate_per_s": self.rate, "burst": self.burst}
+
+
+def _client_key(request):
+    # With TRUSTED_PROXY_HOPS, ProxyFix has already set remote_addr from
+    # the X-Forwarded-For entry our own proxies appended
+    return request.remote_addr or "unknown"
+
+
+def init_admission(app):
+    """Attach admission control to a Flask app and return a metrics callable.
+
+    Setting ADMISSION_MAX_IN_FLIGHT=0 turns the in-flight limit off;
+    rate limiting is only active when RATE_LIMIT_RPS > 0.
+    """
+    from flask import g, jsonify, request
+
+    if TRUSTED_PROXY_HOPS > 0:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+
+    controller = AdmissionController() if ADMISSION_MAX_IN_FLIGHT > 0 else None
+    limiter = TokenBucketLimiter() if RATE_LIMIT_RPS > 0 else None
+
+    def shed(status, message, retry_after):
+        response = jsonify({"status": "error", "message": message})
+        response.status_code = status
+        response.headers["Retry-After"] = str(retry_after)
+        return response
+
+    @app.before_request
+    def _admit():
+        if request.path in ADMISSION_EXEMPT_PATHS:
+            return None
+        if limiter is not None:
+            allowed, retry_after = limiter.check(_client_key(request))
+            if not allowed:
+                return shed(429, "Rate limit exceeded", retry_after)
+        if controller is not None:
+            if not controller.try_acquire():
+                return shed(503, "Server busy, please retry", ADMISSION_RETRY_AFTER)
+            g.admission_slot = True
+        return None
+
+    @app.teardown_request
+    def _release(exc):
+        if g.pop("admission_slot", False):
+            controller.release()
+
+    def report():
+        return {
+            "admission": controller.report() if controller else None,
+            "rate_limit": limiter.report() if limiter else None,
+        }
+
+    return report
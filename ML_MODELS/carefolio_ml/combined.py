@@ -0,0 +1,55 @@
+# -----------------------------
+# combined.py - One survey -> merged meal + workout plan
+# -----------------------------
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .meal_planner import get_meal_planner
+from .survey import survey_to_meal_features, survey_to_workout_input
+from .workout import get_workout_recommender
+
+PLAN_THREADS = int(os.getenv("PLAN_THREADS", 4))
+
+
+class CombinedPlanner:
+    """Runs the XGBoost meal models and the workout forest side by side.
+
+    Both libraries spend most of their predict time in native code that
+    releases the GIL, so end-to-end latency tracks the slower model rather
+    than the sum of the two.
+    """
+
+    def __init__(self, meal_planner=None, workout_recommender=None, max_workers=PLAN_THREADS):
+        self.meal_planner = meal_planner or get_meal_planner()
+        self.workout_recommender = workout_recommender or get_workout_recommender()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="plan")
+
+    def plan(self, batch):
+        """Merged plans for a list of raw surveys (see survey.py for fields)"""
+        batch = list(batch)
+        if not batch:
+            return []
+        meal_inputs = [survey_to_meal_features(survey) for survey in batch]
+        workout_inputs = [survey_to_workout_input(survey) for survey in batch]
+
+        meal_future = self._executor.submit(self.meal_planner.predict, meal_inputs)
+        workout_future = self._executor.submit(self.workout_recommender.recommend, workout_inputs)
+        meal_plans, workout_plans = meal_future.result(), workout_future.result()
+
+        return [{"meal_plan": meal, "workout_plan": workout}
+                for meal, workout in zip(meal_plans, workout_plans)]
+
+
+_shared_planner = None
+_shared_lock = threading.Lock()
+
+
+def get_combined_planner():
+    """Process-wide shared CombinedPlanner"""
+    global _shared_planner
+    if _shared_planner is None:
+        with _shared_lock:
+            if _shared_planner is None:
+                _shared_planner = CombinedPlanner()
+    return _shared_planner
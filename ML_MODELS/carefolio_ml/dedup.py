@@ -0,0 +1,120 @@
+# -----------------------------
+# dedup.py - Duplicate-row compaction for training
+# -----------------------------
+# The workout and meal planner datasets repeat many feature/target rows.
+# compact_rows() collapses them into unique rows plus integer counts, which
+# the trainers pass to fit() as sample_weight, so the trees scan k times
+# fewer rows. The result is approximately equivalent to fitting every copy,
+# not identical: for gradient boosting the weighted loss matches the
+# per-row sum, but a random forest bootstraps over unique rows, and
+# min_samples_split / min_samples_leaf count rows rather than weight.
+# Verified with bench_dedup.py; the trainers' --dedup-check flag also fits
+# on every row and prints a weighted vs unweighted check (report_dedup_check).
+#
+# Optional binning rounds continuous features to a grid first, so rows that
+# only differ in noise (e.g. height 1.7512 vs 1.7509) collapse as well. That
+# changes the training data slightly; check accuracy with bench_dedup.py
+# (Workout_fitness/ and nutrition_model/src/) before turning it on.
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def parse_bin_widths(specs):
+    """["Height=0.01", "*=0.5"] -> {"Height": 0.01, "*": 0.5}"""
+    widths = {}
+    for spec in specs or []:
+        column, sep, width = spec.rpartition("=")
+        if not sep or not column:
+            raise ValueError(f"Bin width must look like COLUMN=WIDTH, got '{spec}'")
+        widths[column] = float(width)
+    return widths
+
+
+def bin_features(X, bin_widths):
+    """Round continuous columns to multiples of their bin width.
+
+    A "*" entry applies to every numeric column with more than two distinct
+    values that has no width of its own; 0/1 and label-encoded flags are
+    left alone unless named explicitly.
+    """
+    if not bin_widths:
+        return X
+    X = X.copy()
+    default = bin_widths.get("*")
+    for column in X.columns:
+        width = bin_widths.get(column)
+        if width is None and default is not None and pd.api.types.is_float_dtype(X[column]) \
+                and X[column].nunique() > 2:
+            width = default
+        if width:
+            X[column] = (np.round(X[column] / width) * width).round(10)
+    return X
+
+
+def compact_rows(X, y, bin_widths=None, average_targets=False):
+    """Collapse duplicate rows; returns (X_unique, y_unique, sample_weight, stats).
+
+    Rows are duplicates when features and targets are equal. With
+    `average_targets` rows are grouped on features only and the targets
+    averaged, which leaves a squared-error loss unchanged up to a constant
+    (use it for the nutrition regressors, not for classifiers).
+    `y` may be a Series, a DataFrame or a 1-D array; the returned y has the
+    same kind.
+    """
+    start = time.perf_counter()
+    X = bin_features(pd.DataFrame(X).reset_index(drop=True), bin_widths)
+    y_is_frame = isinstance(y, pd.DataFrame)
+    y_name = getattr(y, "name", None)
+    y_frame = pd.DataFrame(y).reset_index(drop=True) if y_is_frame or isinstance(y, pd.Series) \
+        else pd.DataFrame({"__target__": np.asarray(y)})
+    y_cols = [f"__y{i}__" for i in range(y_frame.shape[1])]
+    y_frame.columns = y_cols
+
+    frame = pd.concat([X, y_frame], axis=1)
+    keys = list(X.columns) if average_targets else list(X.columns) + y_cols
+    # observed=True: categorical columns group on the levels present, not
+    # on every combination of their categories
+    grouped = frame.groupby(keys, sort=False, dropna=False, observed=True)
+    weights = grouped.size().to_numpy()
+    if average_targets:
+        unique = grouped[y_cols].mean().reset_index()
+    else:
+        unique = grouped.size().reset_index()[keys]
+
+    X_unique = unique[list(X.columns)].astype(X.dtypes.to_dict())
+    y_unique = unique[y_cols]
+    if y_is_frame:
+        y_unique = y_unique.set_axis(list(pd.DataFrame(y).columns), axis=1)
+    elif isinstance(y, pd.Series):
+        y_unique = y_unique.iloc[:, 0].rename(y_name)
+    else:
+        y_unique = y_unique.iloc[:, 0].to_numpy().astype(np.asarray(y).dtype)
+
+    stats = {
+        "rows": len(frame),
+        "unique_rows": len(unique),
+        "compression_ratio": round(len(frame) / max(len(unique), 1), 2),
+        "compact_s": round(time.perf_counter() - start, 3),
+    }
+    return X_unique, y_unique, weights.astype(np.float64), stats
+
+
+def report_compaction(label, stats):
+    print(f"✓ {label}: {stats['rows']} rows -> {stats['unique_rows']} unique "
+          f"({stats['compression_ratio']}x smaller, {stats['compact_s']}s)")
+
+
+def report_dedup_check(label, full_score, compact_score, metric="accuracy", agreement=None, tolerance=0.005):
+    """Print a compacted fit's score next to a fit on every row; returns both as a dict"""
+    diff = compact_score - full_score
+    mark = "✓" if diff >= -tolerance else "⚠️ "
+    line = f"{mark} Dedup check - {label}: {metric} {compact_score:.4f} compacted vs {full_score:.4f} every row ({diff:+.4f})"
+    if agreement is not None:
+        line += f", {agreement:.2%} same predictions"
+    print(line)
+    check = {f"full_{metric}": round(float(full_score), 4), f"compacted_{metric}": round(float(compact_score), 4)}
+    if agreement is not None:
+        check["agreement"] = round(float(agreement), 4)
+    return check
@@ -0,0 +1,167 @@
+# -----------------------------
+# early_exit.py - Anytime (early-exit) inference for the workout forest
+# -----------------------------
+# A random forest's predict_proba is the mean of its trees' leaf class
+# distributions, and most workout rows are near-unanimous long before the
+# last tree. AnytimeForest evaluates trees a block at a time, only for rows
+# still undecided, and stops a row as soon as the remaining trees cannot
+# change its answer:
+#
+#   after k of n trees with per-class sums S, each remaining tree adds a
+#   distribution summing to 1, so it can raise S[c] - S[leader] by at most
+#   1. If S[leader] - S[c] > n - k for every other class c, the full-forest
+#   argmax is the leader whatever the remaining trees say.
+#
+# With per-class bounds from each remaining tree's leaves (a class can gain
+# at most its best leaf value) the test gets tighter still.
+#
+# "exact" mode only uses that test, so the predicted class is identical to
+# model.predict / predict_proba().argmax (a small tolerance absorbs float
+# summation order). The confidence it reports is the vote share over the
+# trees actually evaluated, not the full forest's probability, so
+# WorkoutRecommender labels it with a "Confidence Basis". "confidence" mode also stops a row once the
+# leader's vote share reaches WORKOUT_EARLY_EXIT_CONFIDENCE, trading
+# exactness for a latency bound; check agreement with bench_early_exit.py.
+#
+# Trees are evaluated most decisive first (purest leaves, weighted by the
+# samples that reach them), which makes margins grow fastest; the order
+# never affects the exact-mode guarantee.
+#
+# Env vars:
+#   WORKOUT_EARLY_EXIT             off | exact | confidence (default off)
+#   WORKOUT_EARLY_EXIT_BLOCK       trees per block between checks (default 10)
+#   WORKOUT_EARLY_EXIT_CONFIDENCE  vote share for confidence mode (default 0.9)
+import os
+import threading
+
+import numpy as np
+
+EARLY_EXIT_MODES = ("off", "exact", "confidence")
+WORKOUT_EARLY_EXIT = os.getenv("WORKOUT_EARLY_EXIT", "off")
+WORKOUT_EARLY_EXIT_BLOCK = int(os.getenv("WORKOUT_EARLY_EXIT_BLOCK", "10"))
+WORKOUT_EARLY_EXIT_CONFIDENCE = float(os.getenv("WORKOUT_EARLY_EXIT_CONFIDENCE", "0.9"))
+
+# Margin slack for float summation order (sums are at most n_trees)
+MARGIN_TOLERANCE = 1e-9
+
+
+def supports_early_exit(model):
+    """True for fitted sklearn tree ensembles / single trees of classifiers"""
+    trees = getattr(model, "estimators_", None)
+    if trees is None:
+        trees = [model]
+    return len(trees) > 0 and all(hasattr(tree, "tree_") and hasattr(tree, "predict_proba") for tree in trees)
+
+
+class AnytimeForest:
+    """Block-wise evaluator for a fitted forest (or single tree) of classifiers"""
+
+    def __init__(self, model, block_size=None, order="decisive"):
+        if not supports_early_exit(model):
+            raise ValueError(f"{type(model).__name__} is not a fitted tree classifier")
+        trees = [tree.tree_ for tree in getattr(model, "estimators_", [model])]
+        self.classes_ = model.classes_
+        self.n_trees = len(trees)
+        self.block_size = max(1, block_size or WORKOUT_EARLY_EXIT_BLOCK)
+
+        values, decisiveness = [], []
+        for tree in trees:
+            proba = tree.value[:, 0, :].astype(np.float64)
+            normalizer = proba.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0] = 1.0
+            proba = proba / normalizer
+            values.append(proba)
+            is_leaf = tree.children_left == -1
+            decisiveness.append(float(np.average(proba[is_leaf].max(axis=1),
+                                                 weights=tree.weighted_n_node_samples[is_leaf])))
+
+        if order == "decisive":
+            self.tree_order = np.argsort(-np.array(decisiveness), kind="stable")
+        else:
+            self.tree_order = np.arange(self.n_trees)
+        self.trees = [trees[i] for i in self.tree_order]
+        self.values = [values[i] for i in self.tree_order]
+
+        # Per-class bounds on what trees k.. can still add: a class gains at
+        # most its best leaf and at least its worst leaf in every tree. Tighter
+        # than "1 per tree" when some class never owns a pure leaf.
+        leaf_max = np.array([v[t.children_left == -1].max(axis=0) for t, v in zip(self.trees, self.values)])
+        leaf_min = np.array([v[t.children_left == -1].min(axis=0) for t, v in zip(self.trees, self.values)])
+        zeros = np.zeros((1, len(self.classes_)))
+        self.max_remaining = np.concatenate([np.cumsum(leaf_max[::-1], axis=0)[::-1], zeros])
+        self.min_remaining = np.concatenate([np.cumsum(leaf_min[::-1], axis=0)[::-1], zeros])
+
+    def _decided(self, sums, evaluated):
+        """Rows whose full-forest argmax is already fixed after `evaluated` trees"""
+        leader = sums.argmax(axis=1)
+        rows = np.arange(len(sums))
+        worst_leader = sums[rows, leader] + self.min_remaining[evaluated][leader]
+        best_other = sums + self.max_remaining[evaluated]
+        best_other[rows, leader] = -np.inf
+        return worst_leader > best_other.max(axis=1) + MARGIN_TOLERANCE
+
+    def predict_proba(self, X, mode="exact", confidence=None):
+        """(proba, trees_used): vote shares over the trees each row evaluated.
+
+        mode "exact" stops rows whose argmax can no longer change; "confidence"
+        also stops rows whose leader's share reaches `confidence`; "off"
+        evaluates every tree.
+        """
+        if mode not in EARLY_EXIT_MODES:
+            raise ValueError(f"Unknown early exit mode '{mode}'. Choose from: {', '.join(EARLY_EXIT_MODES)}")
+        # sklearn trees compare float32 features against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows = len(X)
+        sums = np.zeros((n_rows, len(self.classes_)))
+        trees_used = np.zeros(n_rows, dtype=np.int64)
+        active = np.arange(n_rows)
+        X_active = X
+        threshold = WORKOUT_EARLY_EXIT_CONFIDENCE if confidence is None else confidence
+
+        for start in range(0, self.n_trees, self.block_size):
+            stop = min(start + self.block_size, self.n_trees)
+            block_sum = 0.0
+            for tree, value in zip(self.trees[start:stop], self.values[start:stop]):
+                block_sum = block_sum + value[tree.apply(X_active)]
+            sums[active] += block_sum
+            trees_used[active] = stop
+            if mode == "off" or stop == self.n_trees:
+                continue
+
+            done = self._decided(sums[active], stop)
+            if mode == "confidence":
+                done |= sums[active].max(axis=1) >= threshold * stop
+            if done.any():
+                active = active[~done]
+                if not len(active):
+                    break
+                X_active = X[active]
+
+        return sums / trees_used[:, None], trees_used
+
+
+class EarlyExitStats:
+    """Thread-safe counters of trees evaluated per row"""
+
+    def __init__(self, n_trees):
+        self.n_trees = n_trees
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.trees = 0
+        self.early_exits = 0
+
+    def record(self, trees_used):
+        with self._lock:
+            self.rows += len(trees_used)
+            self.trees += int(np.sum(trees_used))
+            self.early_exits += int(np.sum(np.asarray(trees_used) < self.n_trees))
+
+    def report(self):
+        with self._lock:
+            mean_trees = self.trees / self.rows if self.rows else 0.0
+            return {
+                "rows": self.rows,
+                "forest_trees": self.n_trees,
+                "mean_trees_evaluated": round(mean_trees, 2),
+                "early_exit_rate": round(self.early_exits / self.rows, 4) if self.rows else 0.0,
+            }
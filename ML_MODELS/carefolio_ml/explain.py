@@ -0,0 +1,399 @@
+# -----------------------------
+# explain.py - Batched, cached TreeSHAP explanations
+# -----------------------------
+# Explanations are never computed on the /predict path. A client submits
+# the same input it sent to /predict and gets a job id back; a background
+# worker drains pending jobs in batches, computes exact (path-dependent)
+# TreeSHAP values for the whole batch at once and the client fetches the
+# result afterwards.
+#
+#   XGBoost (meal planner): the booster's own TreeSHAP, pred_contribs=True
+#   Random forest / decision tree (workout): exact Shapley values over all
+#     feature subsets, each subset's expectation taken along the tree paths
+#     the same way TreeSHAP does (cover-weighted for unknown features)
+#
+# Results are cached by (model version, feature vector), so repeated
+# inputs - and inputs that only differ in fields the model ignores - are
+# answered without recomputation.
+#
+#   EXPLAIN_BATCH_SIZE       - max jobs explained together (default 64)
+#   EXPLAIN_BATCH_WAIT_MS    - wait this long to fill a batch (default 10)
+#   EXPLAIN_CACHE_SIZE       - cached explanations, LRU (default 4096)
+#   EXPLAIN_MAX_JOBS         - finished jobs kept for polling (default 10000)
+#   EXPLAIN_QUEUE_SIZE       - pending jobs before submit is refused (default 1024)
+import math
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+EXPLAIN_BATCH_SIZE = int(os.getenv("EXPLAIN_BATCH_SIZE", 64))
+EXPLAIN_BATCH_WAIT_MS = float(os.getenv("EXPLAIN_BATCH_WAIT_MS", 10))
+EXPLAIN_CACHE_SIZE = int(os.getenv("EXPLAIN_CACHE_SIZE", 4096))
+EXPLAIN_MAX_JOBS = int(os.getenv("EXPLAIN_MAX_JOBS", 10000))
+EXPLAIN_QUEUE_SIZE = int(os.getenv("EXPLAIN_QUEUE_SIZE", 1024))
+
+# 2**n subsets are enumerated, so exact forest SHAP is limited to small inputs
+MAX_EXACT_FEATURES = 12
+
+NUTRITION_KEYS = ("calories", "carbs_g", "protein_g", "fats_g")
+
+
+# -----------------------------
+# Exact TreeSHAP for scikit-learn trees
+# -----------------------------
+def _subset_masks(n_features):
+    """(2**n, n) bool matrix: row s holds the features in subset s"""
+    subsets = np.arange(2 ** n_features)[:, None]
+    return (subsets >> np.arange(n_features)[None, :]) & 1 == 1
+
+
+def _shapley_weights(in_subset):
+    """(2**n, n) matrix W with phi_j = sum_S W[S, j] * E[f | x_S]"""
+    n = in_subset.shape[1]
+    size = in_subset.sum(axis=1)
+    fact = [math.factorial(k) for k in range(n + 1)]
+    weights = np.zeros(in_subset.shape)
+    for s, k in enumerate(size):
+        # S contains j: it is T + {j} with |T| = k - 1; otherwise S is T itself
+        with_j = fact[k - 1] * fact[n - k] / fact[n] if k else 0.0
+        without_j = fact[k] * fact[n - k - 1] / fact[n] if k < n else 0.0
+        weights[s] = np.where(in_subset[s], with_j, -without_j)
+    return weights
+
+
+def _tree_expectations(tree, X, in_subset):
+    """E[tree(x) | x_S] for every row and every subset S, shape (n, 2**m, classes)"""
+    values = tree.value[:, 0, :]
+    values = values / values.sum(axis=1, keepdims=True)
+    cover = tree.weighted_n_node_samples
+    out = np.zeros((len(X), in_subset.shape[0], values.shape[1]))
+
+    # Node ids are assigned depth-first, so a parent always precedes its children
+    weights = {0: np.ones((len(X), in_subset.shape[0]))}
+    for node in range(tree.node_count):
+        w = weights.pop(node)
+        left, right = tree.children_left[node], tree.children_right[node]
+        if left == -1:
+            out += w[:, :, None] * values[node]
+            continue
+        feature = tree.feature[node]
+        known = in_subset[None, :, feature]
+        goes_left = (X[:, feature] <= tree.threshold[node])[:, None]
+        weights[left] = w * np.where(known, goes_left, cover[left] / cover[node])
+        weights[right] = w * np.where(known, ~goes_left, cover[right] / cover[node])
+    return out
+
+
+def forest_shap(model, X):
+    """Exact TreeSHAP for a fitted sklearn tree classifier or forest.
+
+    Returns (expected value per class, SHAP values of shape
+    (rows, features, classes)); expected + values.sum(axis=1) equals
+    model.predict_proba(X).
+    """
+    if hasattr(model, "tree_"):
+        trees = [model]
+    elif getattr(model, "estimators_", None) is not None and all(hasattr(t, "tree_") for t in model.estimators_):
+        trees = list(model.estimators_)
+    else:
+        raise TypeError(f"TreeSHAP needs a tree or forest classifier, got {type(model).__name__}")
+
+    # sklearn compares float32 inputs against its thresholds
+    X = np.asarray(X, dtype=np.float32)
+    if X.shape[1] > MAX_EXACT_FEATURES:
+        raise ValueError(f"Exact forest SHAP supports at most {MAX_EXACT_FEATURES} features, got {X.shape[1]}")
+    in_subset = _subset_masks(X.shape[1])
+
+    expectations = sum(_tree_expectations(t.tree_, X, in_subset) for t in trees) / len(trees)
+    values = np.einsum("nsc,sm->nmc", expectations, _shapley_weights(in_subset))
+    return expectations[0, 0], values
+
+
+def attribution(feature_names, values, base_value, units, **extra):
+    """One explained output: non-zero [feature, contribution] pairs, largest first"""
+    contributions = sorted(
+        ((name, float(v)) for name, v in zip(feature_names, values) if v != 0),
+        key=lambda item: -abs(item[1]),
+    )
+    return {
+        **extra,
+        "units": units,
+        "base_value": round(float(base_value), 4),
+        "output": round(float(base_value) + float(np.sum(values)), 4),
+        "contributions": [[name, round(v, 4)] for name, v in contributions],
+    }
+
+
+# -----------------------------
+# Model-specific explainers
+# -----------------------------
+class MealExplainer:
+    """TreeSHAP for the meal planner's nutrition and classification boosters.
+
+    With cohort routing on, rows of covered cohorts are explained with the
+    cohort model that served them (see meal_cohorts.py) and each
+    explanation names the model it comes from.
+    """
+
+    def __init__(self, planner):
+        self.planner = planner
+
+    @property
+    def model_version(self):
+        return self.planner.model_version
+
+    def featurize(self, batch):
+        return self.planner.preprocess(batch)
+
+    def explain(self, X):
+        from .meal_cohorts import cohort_input, cohort_keys
+
+        planner = self.planner
+        if not planner.cohort_models:
+            return self._explain_global(X)
+
+        keys = cohort_keys(X)
+        results = [None] * len(X)
+        global_rows = []
+        for key in dict.fromkeys(keys):
+            rows = np.flatnonzero(keys == key)
+            bundle = planner.cohort_models.get(key)
+            if bundle is None:
+                global_rows.extend(rows)
+                continue
+            X_cohort = cohort_input(X.iloc[rows], bundle["feature_names"])
+            for i, explanation in zip(rows, self._explain_cohort(bundle, X_cohort)):
+                results[i] = {"model": f"cohort {key}", **explanation}
+        if global_rows:
+            for i, explanation in zip(global_rows, self._explain_global(X.iloc[global_rows])):
+                results[i] = {"model": "global", **explanation}
+        return results
+
+    @staticmethod
+    def _contribs(X):
+        import xgboost as xgb
+
+        dmatrix = xgb.DMatrix(X, feature_names=list(X.columns), enable_categorical=True)
+        return lambda estimator: estimator.get_booster().predict(dmatrix, pred_contribs=True)
+
+    @staticmethod
+    def _multiclass_group(values, labels):
+        # values: rows x classes x (features + bias); explain the argmax class
+        chosen = values.sum(axis=2).argmax(axis=1)
+        return [(labels[c], True, values[i, c]) for i, c in enumerate(chosen)]
+
+    def _explain_global(self, X):
+        from .meal_planner import HEALTH_TAG_COLS, MEAL_PLAN_COLS
+
+        planner = self.planner
+        contribs = self._contribs(X)
+        nutrition = {key: contribs(est) for key, est in zip(NUTRITION_KEYS, planner.regressor.estimators_)}
+
+        if planner.multiclass is not None:
+            groups = {head: self._multiclass_group(contribs(planner.multiclass[head]), planner.multiclass[labels_key])
+                      for head, labels_key in (("meal_plan_type", "meal_plan_labels"),
+                                               ("health_tag", "health_tag_labels"))}
+        else:
+            heads = [contribs(est) for est in planner.classifier.estimators_]
+            margins = np.stack([h.sum(axis=1) for h in heads], axis=1)
+            groups = {}
+            for head, start, cols in (("meal_plan_type", 0, MEAL_PLAN_COLS),
+                                      ("health_tag", len(MEAL_PLAN_COLS), HEALTH_TAG_COLS)):
+                group = margins[:, start:start + len(cols)]
+                fired = group > 0
+                # Served label is the first head that fired; with none, explain the closest one
+                chosen = np.where(fired.any(axis=1), fired.argmax(axis=1), group.argmax(axis=1))
+                groups[head] = [(cols[c], bool(fired[i, c]), heads[start + c][i]) for i, c in enumerate(chosen)]
+        return self._assemble(list(X.columns), nutrition, groups)
+
+    def _explain_cohort(self, bundle, X):
+        contribs = self._contribs(X)
+        nutrition = {key: contribs(est) for key, est in zip(NUTRITION_KEYS, bundle["regressor"].estimators_)}
+        groups, constant = {}, []
+        for head, labels_key in (("meal_plan_type", "meal_plan_labels"), ("health_tag", "health_tag_labels")):
+            labels = bundle[labels_key]
+            if bundle[head] is None:
+                # The cohort only ever gets this label: nothing to attribute
+                constant.append(head)
+                groups[head] = [(labels[0], True, np.zeros(X.shape[1] + 1))] * len(X)
+            else:
+                groups[head] = self._multiclass_group(contribs(bundle[head]), labels)
+        results = self._assemble(list(X.columns), nutrition, groups)
+        for explanation in results:
+            for head in constant:
+                explanation[head]["constant"] = True
+        return results
+
+    @staticmethod
+    def _assemble(names, nutrition, groups):
+        results = []
+        for i in range(len(next(iter(nutrition.values())))):
+            explanation = {
+                "nutrition": {key: attribution(names, values[i, :-1], values[i, -1], "model output")
+                              for key, values in nutrition.items()},
+            }
+            for head, rows in groups.items():
+                label, matched, values = rows[i]
+                explanation[head] = attribution(names, values[:-1], values[-1], "log-odds",
+                                                explained_class=label, matched=matched)
+            results.append(explanation)
+        return results
+
+
+class WorkoutExplainer:
+    """Exact TreeSHAP for the workout forest, in probability units"""
+
+    def __init__(self, recommender):
+        self.recommender = recommender
+
+    @property
+    def model_version(self):
+        return self.recommender.model_version
+
+    def featurize(self, batch):
+        recommender = self.recommender.load()
+        return recommender.encode([recommender.map_inputs(item)[0] for item in batch])
+
+    def explain(self, X):
+        recommender = self.recommender
+        names = list(X.columns)
+        expected, values = forest_shap(recommender.model, X)
+        proba = expected + values.sum(axis=1)
+        chosen = proba.argmax(axis=1)
+        labels = recommender.target_encoder.inverse_transform(recommender.model.classes_[chosen])
+        return [
+            {"fitness_type": attribution(names, values[i, :, c], expected[c], "probability",
+                                         explained_class=str(label))}
+            for i, (c, label) in enumerate(zip(chosen, labels))
+        ]
+
+
+# -----------------------------
+# Async job service
+# -----------------------------
+class ExplanationService:
+    """Queues explanation jobs and answers them in batches on a worker thread"""
+
+    def __init__(self, explainer, name, batch_size=EXPLAIN_BATCH_SIZE, batch_wait_ms=EXPLAIN_BATCH_WAIT_MS,
+                 cache_size=EXPLAIN_CACHE_SIZE, max_jobs=EXPLAIN_MAX_JOBS, queue_size=EXPLAIN_QUEUE_SIZE):
+        self.explainer = explainer
+        self.name = name
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait_ms / 1000.0
+        self.cache_size = cache_size
+        self.max_jobs = max_jobs
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._jobs = OrderedDict()
+        self.stats = {"submitted": 0, "rejected": 0, "explained": 0, "cache_hits": 0,
+                      "errors": 0, "batches": 0, "compute_ms": 0.0}
+        self._worker = threading.Thread(target=self._run, name=f"explain-{name}", daemon=True)
+        self._worker.start()
+
+    def submit(self, item):
+        """Queue one input for explanation; job id, or None if the queue is full"""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {"job_id": job_id, "status": "pending", "submitted_at": time.time()}
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        try:
+            self._queue.put_nowait((job_id, item))
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+                self.stats["rejected"] += 1
+            return None
+        with self._lock:
+            self.stats["submitted"] += 1
+        return job_id
+
+    def get(self, job_id):
+        """Job record (status pending / done / error), or None if unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _next_batch(self):
+        jobs = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(jobs) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                jobs.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return jobs
+
+    def _finish(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields, finished_at=time.time())
+
+    def _run(self):
+        while True:
+            jobs = self._next_batch()
+            try:
+                self._explain_batch(jobs)
+            except Exception as e:
+                print(f"⚠️ Explanation batch ({self.name}) failed: {e}")
+                with self._lock:
+                    self.stats["errors"] += len(jobs)
+                for job_id, _ in jobs:
+                    self._finish(job_id, status="error", message=str(e))
+
+    def _explain_batch(self, jobs):
+        X = self.explainer.featurize([item for _, item in jobs])
+        version = self.explainer.model_version
+        # Row hashes work for numeric and categorical feature frames alike
+        keys = [(version, int(h)) for h in pd.util.hash_pandas_object(X, index=False)]
+
+        with self._lock:
+            cached = [self._cache.get(key) for key in keys]
+            for key, hit in zip(keys, cached):
+                if hit is not None:
+                    self._cache.move_to_end(key)
+
+        # Identical feature vectors within a batch are explained once
+        misses = list(OrderedDict.fromkeys(key for key, hit in zip(keys, cached) if hit is None))
+        computed = {}
+        if misses:
+            first_row = {key: i for i, key in reversed(list(enumerate(keys)))}
+            start = time.perf_counter()
+            explanations = self.explainer.explain(X.iloc[[first_row[key] for key in misses]])
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            computed = dict(zip(misses, explanations))
+            with self._lock:
+                self.stats["batches"] += 1
+                self.stats["compute_ms"] += elapsed_ms
+                for key, explanation in computed.items():
+                    self._cache[key] = explanation
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        with self._lock:
+            self.stats["explained"] += len(jobs)
+            self.stats["cache_hits"] += sum(hit is not None for hit in cached)
+        for (job_id, _), key, hit in zip(jobs, keys, cached):
+            self._finish(job_id, status="done", cached=hit is not None, model_version=version,
+                         explanation=hit if hit is not None else computed[key])
+
+    def report(self):
+        with self._lock:
+            stats = dict(self.stats)
+            cache_entries = len(self._cache)
+        return {
+            **{k: v for k, v in stats.items() if k != "compute_ms"},
+            "queue_depth": self._queue.qsize(),
+            "cache_entries": cache_entries,
+            "cache_hit_rate": round(stats["cache_hits"] / stats["explained"], 4) if stats["explained"] else None,
+            "avg_batch_ms": round(stats["compute_ms"] / stats["batches"], 2) if stats["batches"] else None,
+        }
@@ -0,0 +1,63 @@
+# -----------------------------
+# meal_cohorts.py - Per-cohort specialized meal planner models
+# -----------------------------
+# Whether a user has diabetes / hypertension and their fitness goal mostly
+# decide the plan family, so training.py also fits one small model per
+# cohort (diabetes x hypertension x goal) on that cohort's rows only:
+# shallower trees, fewer rounds, constant columns dropped, and a constant
+# "head" with no booster at all when a cohort only ever gets one label.
+# A cohort model is only saved when it matches the global model on the
+# cohort's held-out rows; MealPlanner routes every other row to the global
+# model (MEAL_PLANNER_COHORTS=1 turns routing on).
+import numpy as np
+import pandas as pd
+
+from .meal_features import CATEGORICAL_FIELDS, has_raw_fields, to_categorical_frame, to_one_hot_frame
+
+COHORT_MODEL_FILE = "meal_planner_cohort_models.pkl"
+COHORT_FLAGS = ("has_diabetes", "has_hypertension")
+GOALS = list(CATEGORICAL_FIELDS["fitness_goal"])
+
+
+def cohort_name(diabetes, hypertension, goal):
+    """(True, False, "weight_loss") -> "diabetes|weight_loss" """
+    conditions = [name for name, flag in (("diabetes", diabetes), ("hypertension", hypertension)) if flag]
+    return f"{'+'.join(conditions) or 'none'}|{goal}"
+
+
+def cohort_keys(df):
+    """Cohort name of every row of a one-hot or raw-field frame"""
+    frame = to_categorical_frame(df, [], {"fitness_goal": GOALS})
+    flags = [pd.to_numeric(df[flag], errors="coerce").fillna(0).to_numpy() > 0 if flag in df.columns
+             else np.zeros(len(df), dtype=bool) for flag in COHORT_FLAGS]
+    goals = frame["fitness_goal"].astype(object).to_numpy()
+    return np.array([cohort_name(d, h, g) for d, h, g in zip(*flags, goals)], dtype=object)
+
+
+def cohort_input(df, feature_names):
+    """Frame for one cohort model (missing features = 0, as in MealPlanner.preprocess)"""
+    if has_raw_fields(df):
+        df = to_one_hot_frame(df)
+    return df.reindex(columns=feature_names, fill_value=0).fillna(0)
+
+
+def predict_head(head, labels, X):
+    """Label per row from a multiclass head, or the only label of a constant head"""
+    if head is None and not labels:
+        raise ValueError("Cohort head has no labels; training should have left this cohort to the global model")
+    if head is None:
+        return [labels[0]] * len(X)
+    return [labels[i] for i in head.predict_proba(X).argmax(axis=1)]
+
+
+def predict_cohort(bundle, X):
+    """(nutrition n x 4, meal plan labels, health tag labels) from one cohort bundle"""
+    return (bundle["regressor"].predict(X),
+            predict_head(bundle["meal_plan_type"], bundle["meal_plan_labels"], X),
+            predict_head(bundle["health_tag"], bundle["health_tag_labels"], X))
+
+
+def cohort_estimators(bundle):
+    """Every fitted booster in a cohort bundle (constant heads have none)"""
+    heads = [bundle[name] for name in ("meal_plan_type", "health_tag") if bundle[name] is not None]
+    return list(bundle["regressor"].estimators_) + heads
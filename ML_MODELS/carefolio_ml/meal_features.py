@@ -0,0 +1,110 @@
+# -----------------------------
+# meal_features.py - Raw categorical fields <-> one-hot meal planner columns
+# -----------------------------
+# The original meal planner takes one-hot columns (diet_type_vegan, ...),
+# the categorical variant takes the raw fields (diet_type="vegan", ...) and
+# lets XGBoost split on them natively. Either payload works with either
+# model: these helpers translate a whole batch frame in one pass.
+#
+# Levels mapped to None are the ones pd.get_dummies(drop_first=True)
+# dropped: an all-zero (or absent) one-hot group means that level, exactly
+# as the zero-filled one-hot model read it. Groups without a dropped level
+# (diet, cuisine) become missing when no column is set.
+import numpy as np
+import pandas as pd
+
+CATEGORICAL_FIELDS = {
+    "gender": {"Female": None, "Male": "gender_male"},
+    "fitness_goal": {"maintain": None, "weight_gain": "fitness_goal_weight_gain",
+                     "weight_loss": "fitness_goal_weight_loss"},
+    "activity_level": {"active": None, "moderate": "activity_level_moderate",
+                       "sedentary": "activity_level_sedentary"},
+    "diet_type": {"non-veg": "diet_type_non-veg", "vegan": "diet_type_vegan",
+                  "vegetarian": "diet_type_vegetarian"},
+    "preferred_cuisine": {"Continental": "preferred_cuisine_Continental", "Indian": "preferred_cuisine_Indian",
+                          "Mediterranean": "preferred_cuisine_Mediterranean"},
+}
+
+
+def _level_key(value):
+    return str(value).strip().lower().replace("-", "").replace("_", "").replace(" ", "")
+
+
+_LEVEL_LOOKUP = {field: {_level_key(level): level for level in levels} for field, levels in CATEGORICAL_FIELDS.items()}
+
+
+def normalize_level(field, value):
+    """'Non Veg' / 'non_veg' / 'NON-VEG' -> 'non-veg'; None if not a known level"""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if field == "gender":
+        return "Male" if str(value).strip().lower().startswith("m") else "Female"
+    return _LEVEL_LOOKUP[field].get(_level_key(value))
+
+
+_ONE_HOT_OWNER = {col: (field, level) for field, levels in CATEGORICAL_FIELDS.items()
+                  for level, col in levels.items() if col}
+
+
+def feature_value(row, name):
+    """One model feature from a single raw or one-hot payload dict (None if absent)"""
+    if name in CATEGORICAL_FIELDS:
+        if row.get(name) is not None:
+            return normalize_level(name, row[name])
+        levels = CATEGORICAL_FIELDS[name]
+        for level, col in levels.items():
+            if col and row.get(col):
+                return level
+        return next((level for level, col in levels.items() if col is None), None)
+    owner = _ONE_HOT_OWNER.get(name)
+    if owner is not None and row.get(owner[0]) is not None:
+        field, level = owner
+        return int(normalize_level(field, row[field]) == level)
+    return row.get(name)
+
+
+def has_raw_fields(df):
+    return any(field in df.columns for field in CATEGORICAL_FIELDS)
+
+
+def to_categorical_frame(df, numeric_features, categories=None):
+    """Batch frame (raw fields and/or one-hot columns) -> categorical model input.
+
+    Numeric features are zero-filled as before; each categorical field is a
+    pd.Categorical over `categories[field]` (default: all known levels).
+    A raw field wins over one-hot columns of the same group.
+    """
+    out = df.reindex(columns=list(numeric_features), fill_value=0).fillna(0)
+    for field, levels in CATEGORICAL_FIELDS.items():
+        hot_levels = [level for level, col in levels.items() if col]
+        baseline = next((level for level, col in levels.items() if col is None), None)
+        bits = df.reindex(columns=[levels[level] for level in hot_levels], fill_value=0).fillna(0).to_numpy()
+        values = np.where(bits.max(axis=1) > 0, np.array(hot_levels, dtype=object)[bits.argmax(axis=1)], baseline) \
+            if len(df) else np.array([], dtype=object)
+
+        if field in df.columns:
+            raw = df[field].map(lambda v: normalize_level(field, v)).to_numpy(dtype=object)
+            values = np.where(pd.isna(raw), values, raw)
+
+        level_order = (categories or {}).get(field, list(levels))
+        out[field] = pd.Categorical(values, categories=level_order)
+    return out
+
+
+def to_one_hot_frame(df):
+    """Replace raw categorical fields by their one-hot columns (one-hot model input)"""
+    df = df.copy()
+    for field, levels in CATEGORICAL_FIELDS.items():
+        if field not in df.columns:
+            continue
+        raw = df.pop(field).map(lambda v: normalize_level(field, v))
+        for level, col in levels.items():
+            if col is None:
+                continue
+            set_by_raw = (raw == level).astype(int)
+            # Rows that sent no raw value keep whatever one-hot bits they had
+            if col in df.columns:
+                df[col] = np.where(raw.isna(), df[col], set_by_raw)
+            else:
+                df[col] = np.where(raw.isna(), 0, set_by_raw)
+    return df
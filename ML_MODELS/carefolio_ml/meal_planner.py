@@ -0,0 +1,351 @@
+# -----------------------------
+# meal_planner.py - In-process meal planner inference
+# -----------------------------
+import hashlib
+import os
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from ._paths import ML_MODELS_DIR
+from .meal_cohorts import COHORT_MODEL_FILE, cohort_estimators, cohort_input, cohort_keys, predict_cohort
+from .meal_features import has_raw_fields, to_categorical_frame, to_one_hot_frame
+
+DEFAULT_ARTIFACTS_DIR = os.path.join(ML_MODELS_DIR, "nutrition_model", "artifacts")
+REGRESSION_MODEL_FILE = "meal_planner_regression_model.pkl"
+CLASSIFICATION_MODEL_FILE = "meal_planner_classification_model.pkl"
+MULTICLASS_MODEL_FILE = "meal_planner_multiclass_model.pkl"
+CATEGORICAL_MODEL_FILE = "meal_planner_categorical_model.pkl"
+
+# "onevsrest": eight binary boosters, first predicted bit wins (original)
+# "multiclass": one 5-way meal plan booster + one 3-way health tag booster
+# "categorical": multiclass heads and regressors trained on raw categorical
+#                fields with XGBoost's native categorical splits
+# Every variant accepts both one-hot and raw categorical payloads.
+MEAL_PLANNER_VARIANTS = ("onevsrest", "multiclass", "categorical")
+MEAL_PLANNER_VARIANT = os.getenv("MEAL_PLANNER_VARIANT", "onevsrest")
+# Route covered cohorts to their specialized models (see meal_cohorts.py)
+MEAL_PLANNER_COHORTS = os.getenv("MEAL_PLANNER_COHORTS", "0") == "1"
+
+# -----------------------------
+# Detailed explanations
+# -----------------------------
+meal_plan_explanations = {
+    'meal_plan_type_Calorie-Deficit High-Protein': (
+        "Focuses on reducing calories while maintaining high protein to preserve muscle mass. "
+        "Includes lean meats, eggs, legumes, and low-fat dairy. "
+        "Ideal for individuals aiming to lose fat while retaining muscle."
+    ),
+    'meal_plan_type_High-Calorie Protein-Rich': (
+        "High-calorie meals rich in protein for weight gain or muscle building. "
+        "Includes nuts, dairy, lean meats, eggs, and complex carbs. "
+        "Perfect for those who want to increase muscle mass or overall body weight."
+    ),
+    'meal_plan_type_Low-GI High-Fiber Plan': (
+        "Low Glycemic Index and high fiber to control blood sugar levels. "
+        "Includes whole grains, vegetables, and legumes. "
+        "Suitable for people with diabetes or those seeking slow-releasing energy."
+    ),
+    'meal_plan_type_Low-GI Low-Sodium Plan': (
+        "Diabetic-friendly with controlled sugar and low sodium to support blood pressure management. "
+        "Includes fresh vegetables, whole grains, lean protein, minimal processed foods. "
+        "Helps maintain stable blood sugar and supports heart health."
+    ),
+    'meal_plan_type_Low-Sodium High-Potassium Plan': (
+        "Reduces sodium and increases potassium for blood pressure regulation. "
+        "Includes fruits, vegetables, legumes, and low-sodium protein. "
+        "Best for individuals concerned about hypertension."
+    )
+}
+
+health_tag_explanations = {
+    'health_tag_Diabetic & BP-Safe Plan': (
+        "Safe for diabetics and individuals with hypertension. "
+        "Focus on low sugar, high fiber, low sodium, and heart-healthy nutrients. "
+        "Designed to maintain stable blood sugar and optimal blood pressure."
+    ),
+    'health_tag_Diabetic-Safe Plan': (
+        "Safe for diabetics. Emphasizes controlled sugar intake and low-GI foods. "
+        "Helps maintain consistent energy levels and avoid sugar spikes."
+    ),
+    'health_tag_General Plan': (
+        "Balanced plan for healthy individuals without specific medical conditions. "
+        "Includes a mix of carbohydrates, protein, fats, vitamins, and minerals to support overall wellness. "
+        "Suitable for maintaining energy, supporting immunity, and promoting a healthy lifestyle."
+    )
+}
+
+MEAL_PLAN_COLS = list(meal_plan_explanations.keys())
+HEALTH_TAG_COLS = list(health_tag_explanations.keys())
+
+FALLBACK_MEAL_PLAN = "No specific meal plan matched"
+FALLBACK_MEAL_PLAN_EXPLANATION = (
+    "We could not match a specialized meal plan. "
+    "We recommend a balanced diet with appropriate portions of carbohydrates, proteins, and fats based on your nutrition needs."
+)
+FALLBACK_HEALTH_TAG = "General Recommendation"
+FALLBACK_HEALTH_TAG_EXPLANATION = (
+    "A general health plan is recommended. "
+    "Focus on balanced nutrition, regular physical activity, adequate sleep, and stress management."
+)
+
+
+def decode_classification_row(row):
+    """Map one row of one-hot classifier bits to (meal_plan_type, health_tag)"""
+    meal_plan_type = None
+    health_tag = None
+
+    for i, col in enumerate(MEAL_PLAN_COLS):
+        if i < len(row) and row[i] == 1:
+            meal_plan_type = col
+            break
+
+    for i, col in enumerate(HEALTH_TAG_COLS):
+        idx = len(MEAL_PLAN_COLS) + i
+        if idx < len(row) and row[idx] == 1:
+            health_tag = col
+            break
+
+    return meal_plan_type, health_tag
+
+
+def decode_multiclass_row(meal_proba, tag_proba, meal_labels, tag_labels):
+    """Argmax of the two multiclass heads -> (meal_plan_type, health_tag)"""
+    return meal_labels[int(np.argmax(meal_proba))], tag_labels[int(np.argmax(tag_proba))]
+
+
+def build_response(nutrition, meal_plan_type, health_tag):
+    """Assemble the public /predict payload for one user"""
+    calories, carbs, protein, fats = nutrition
+
+    if meal_plan_type is None:
+        meal_plan_type = FALLBACK_MEAL_PLAN
+        meal_plan_explanation = FALLBACK_MEAL_PLAN_EXPLANATION
+    else:
+        meal_plan_explanation = meal_plan_explanations.get(meal_plan_type, "")
+
+    if health_tag is None:
+        health_tag = FALLBACK_HEALTH_TAG
+        health_tag_explanation = FALLBACK_HEALTH_TAG_EXPLANATION
+    else:
+        health_tag_explanation = health_tag_explanations.get(health_tag, "")
+
+    return {
+        "predicted_nutrition": {
+            "calories": round(float(calories)),
+            "carbs_g": round(float(carbs)),
+            "protein_g": round(float(protein)),
+            "fats_g": round(float(fats))
+        },
+        "meal_plan_type": meal_plan_type,
+        "meal_plan_explanation": meal_plan_explanation,
+        "health_tag": health_tag,
+        "health_tag_explanation": health_tag_explanation
+    }
+
+
+class MealPlanner:
+    """XGBoost meal planner: nutrition targets + meal plan type + health tag.
+
+    `variant` (default $MEAL_PLANNER_VARIANT) picks the classification
+    models, see MEAL_PLANNER_VARIANTS; both produce the same response.
+    With `cohorts` (default $MEAL_PLANNER_COHORTS) predict() serves rows of
+    covered cohorts from their specialized models and the rest from the
+    variant's global models. Models are loaded on first use; one instance
+    can be shared by many threads.
+    """
+
+    def __init__(self, artifacts_dir=None, variant=None, cohorts=None):
+        self.artifacts_dir = artifacts_dir or os.getenv("MEAL_PLANNER_ARTIFACTS", DEFAULT_ARTIFACTS_DIR)
+        self.variant = variant or MEAL_PLANNER_VARIANT
+        if self.variant not in MEAL_PLANNER_VARIANTS:
+            raise ValueError(f"Unknown meal planner variant '{self.variant}'. Choose from: {', '.join(MEAL_PLANNER_VARIANTS)}")
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.regressor = None
+        self.classifier = None
+        self.multiclass = None
+        self.categories = None
+        self.feature_names = None
+        self.use_cohorts = MEAL_PLANNER_COHORTS if cohorts is None else cohorts
+        self.cohort_models = None
+        self._cohort_counts = {"cohort": 0, "global": 0}
+        self._model_version = None
+        self._relevant_features = None
+
+    def load(self):
+        """Load models once (thread-safe). Raises FileNotFoundError if missing."""
+        if self._loaded:
+            return self
+        with self._lock:
+            if not self._loaded:
+                if self.variant == "categorical":
+                    # One bundle: regressor + multiclass heads + category levels
+                    self.multiclass = joblib.load(os.path.join(self.artifacts_dir, CATEGORICAL_MODEL_FILE))
+                    self.regressor = self.multiclass["regressor"]
+                    self.categories = self.multiclass["categories"]
+                else:
+                    self.regressor = joblib.load(os.path.join(self.artifacts_dir, REGRESSION_MODEL_FILE))
+                if self.variant == "multiclass":
+                    self.multiclass = joblib.load(os.path.join(self.artifacts_dir, MULTICLASS_MODEL_FILE))
+                elif self.variant == "onevsrest":
+                    self.classifier = joblib.load(os.path.join(self.artifacts_dir, CLASSIFICATION_MODEL_FILE))
+                self.feature_names = self.regressor.estimators_[0].get_booster().feature_names
+                if self.use_cohorts:
+                    self._load_cohorts()
+                self._loaded = True
+        return self
+
+    def _load_cohorts(self):
+        path = os.path.join(self.artifacts_dir, COHORT_MODEL_FILE)
+        if not os.path.exists(path):
+            print(f"⚠️  {COHORT_MODEL_FILE} not found; serving every cohort from the global model")
+            return
+        self.cohort_models = joblib.load(path)["models"]
+        print(f"✓ Cohort models: {', '.join(sorted(self.cohort_models)) or 'none'}")
+
+    def boosters(self):
+        """Every fitted XGBoost estimator behind the current variant (and cohorts)"""
+        self.load()
+        estimators = list(self.regressor.estimators_)
+        if self.multiclass is not None:
+            estimators += [self.multiclass["meal_plan_type"], self.multiclass["health_tag"]]
+        else:
+            estimators += list(self.classifier.estimators_)
+        for key in sorted(self.cohort_models or {}):
+            estimators += cohort_estimators(self.cohort_models[key])
+        return estimators
+
+    @property
+    def model_version(self):
+        """Short content hash of every booster behind the current variant"""
+        if self._model_version is None:
+            digest = hashlib.sha256(self.variant.encode("utf-8"))
+            for estimator in self.boosters():
+                digest.update(estimator.get_booster().save_raw("json"))
+            self._model_version = digest.hexdigest()[:16]
+        return self._model_version
+
+    @property
+    def relevant_features(self):
+        """Input features at least one booster actually splits on"""
+        if self._relevant_features is None:
+            used = set()
+            for estimator in self.boosters():
+                used.update(estimator.get_booster().get_score(importance_type="weight"))
+            self._relevant_features = [name for name in self.feature_names if name in used]
+        return self._relevant_features
+
+    def set_inference_threads(self, n_threads):
+        """Limit XGBoost's own threads per predict call.
+
+        When predictions already run on a thread pool, one booster thread
+        per call avoids oversubscribing the CPU.
+        """
+        for estimator in self.boosters():
+            estimator.set_params(n_jobs=n_threads)
+            estimator.get_booster().set_param({"nthread": n_threads})
+
+    def preprocess(self, batch):
+        """List of survey dicts -> model-ready DataFrame (missing features = 0).
+
+        Dicts may carry one-hot columns or the raw categorical fields (see
+        meal_features.py) for any variant.
+        """
+        self.load()
+        df_input = pd.DataFrame(list(batch))
+        if self.categories is not None:
+            numeric = [name for name in self.feature_names if name not in self.categories]
+            return to_categorical_frame(df_input, numeric, self.categories)[self.feature_names]
+        if has_raw_fields(df_input):
+            df_input = to_one_hot_frame(df_input)
+        return df_input.reindex(columns=self.feature_names, fill_value=0).fillna(0)
+
+    def classify_raw(self, X):
+        """Raw classification output for the current variant.
+
+        The n x 8 bit matrix for "onevsrest", or a (meal plan n x 5,
+        health tag n x 3) pair of probabilities for "multiclass" and
+        "categorical".
+        """
+        if self.multiclass is not None:
+            return (self.multiclass["meal_plan_type"].predict_proba(X),
+                    self.multiclass["health_tag"].predict_proba(X))
+        return self.classifier.predict(X)
+
+    def predict_raw(self, X):
+        """Raw regression (n x 4) and classification outputs"""
+        return self.regressor.predict(X), self.classify_raw(X)
+
+    def decode(self, y_reg_pred, y_clf_pred):
+        if self.multiclass is not None:
+            meal_labels = self.multiclass["meal_plan_labels"]
+            tag_labels = self.multiclass["health_tag_labels"]
+            labels = [decode_multiclass_row(meal_proba, tag_proba, meal_labels, tag_labels)
+                      for meal_proba, tag_proba in zip(*y_clf_pred)]
+        else:
+            labels = [decode_classification_row(clf_row) for clf_row in y_clf_pred]
+        return [build_response(nutrition, meal_plan_type, health_tag)
+                for nutrition, (meal_plan_type, health_tag) in zip(y_reg_pred, labels)]
+
+    def predict(self, batch):
+        """Predict plans for a list of survey dicts, one result dict per input"""
+        batch = list(batch)
+        if not batch:
+            return []
+        if self.load().cohort_models:
+            return self.predict_by_cohort(batch)
+        X = self.preprocess(batch)
+        y_reg_pred, y_clf_pred = self.predict_raw(X)
+        return self.decode(y_reg_pred, y_clf_pred)
+
+    def predict_by_cohort(self, batch):
+        """predict() with each covered cohort's rows served by its own model"""
+        df_input = pd.DataFrame(batch)
+        keys = cohort_keys(df_input)
+        results = [None] * len(batch)
+        uncovered = []
+        for key in dict.fromkeys(keys):
+            rows = np.flatnonzero(keys == key)
+            bundle = self.cohort_models.get(key)
+            if bundle is None:
+                uncovered.extend(rows)
+                continue
+            X = cohort_input(df_input.iloc[rows], bundle["feature_names"])
+            for i, nutrition, meal_plan_type, health_tag in zip(rows, *predict_cohort(bundle, X)):
+                results[i] = build_response(nutrition, meal_plan_type, health_tag)
+
+        if uncovered:
+            X = self.preprocess([batch[i] for i in uncovered])
+            for i, result in zip(uncovered, self.decode(*self.predict_raw(X))):
+                results[i] = result
+        with self._lock:
+            self._cohort_counts["global"] += len(uncovered)
+            self._cohort_counts["cohort"] += len(batch) - len(uncovered)
+        return results
+
+    def cohort_report(self):
+        """Rows served by cohort models vs the global model, for /metrics"""
+        if not self.cohort_models:
+            return {"enabled": False}
+        with self._lock:
+            counts = dict(self._cohort_counts)
+        total = counts["cohort"] + counts["global"]
+        return {"enabled": True, "cohorts": sorted(self.cohort_models), "rows": counts,
+                "cohort_share": round(counts["cohort"] / total, 4) if total else 0.0}
+
+
+_shared_planner = None
+_shared_lock = threading.Lock()
+
+
+def get_meal_planner():
+    """Process-wide shared MealPlanner"""
+    global _shared_planner
+    if _shared_planner is None:
+        with _shared_lock:
+            if _shared_planner is None:
+                _shared_planner = MealPlanner()
+    return _shared_planner
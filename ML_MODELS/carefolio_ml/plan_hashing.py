@@ -0,0 +1,387 @@
+# -----------------------------
+# plan_hashing.py - Canonical plan hashes batched into Merkle trees
+# -----------------------------
+# Every generated plan is serialized canonically and hashed with SHA-256.
+# Hashes are collected into a batch that is sealed once it reaches
+# PLAN_HASH_BATCH_SIZE plans or PLAN_HASH_WINDOW_SECONDS have passed since
+# its first plan. Sealing builds a Merkle tree, so a single root per batch
+# can be anchored on-chain instead of one transaction per plan. Each plan
+# keeps a receipt (batch id + leaf index) from which an inclusion proof
+# against that root can be served later.
+#
+# Sealed batches are appended to PLAN_HASH_LEDGER (JSON lines, default
+# ML_MODELS/plan_hash_ledger.jsonl); that file is the hand-off to whatever
+# anchors the roots. Records with a "root" are sealed batches; each batch
+# also gets an {"batch_id", "opened_at", "status": "open"} record when its
+# first plan arrives, which anchoring skips.
+#
+# Batches otherwise only live in the memory of the worker that built them.
+# The ledger is what lets /plan-proof answer on any worker: a receipt
+# sealed elsewhere is read back from it, and one whose batch is still open
+# in another worker is reported as pending, not unknown. With several
+# gunicorn/uvicorn workers (or replicas) every one of them must point at
+# the same ledger file; PLAN_HASH_LEDGER="" turns it off for a single
+# worker that keeps everything in memory.
+#
+# Ledger writes are best-effort and happen on a background thread, so a
+# full disk never fails or slows a request (failures are counted in
+# report()). Proof lookups keep an in-memory batch_id -> offset index of
+# the ledger and only scan what was appended since the last lookup.
+import atexit
+import hashlib
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from ._paths import ML_MODELS_DIR
+
+PLAN_HASH_BATCH_SIZE = int(os.getenv("PLAN_HASH_BATCH_SIZE", 256))
+PLAN_HASH_WINDOW_SECONDS = float(os.getenv("PLAN_HASH_WINDOW_SECONDS", 30))
+PLAN_HASH_LEDGER = os.getenv("PLAN_HASH_LEDGER", os.path.join(ML_MODELS_DIR, "plan_hash_ledger.jsonl"))
+PLAN_HASH_HISTORY = int(os.getenv("PLAN_HASH_HISTORY", 64))
+
+# Domain separation (as in RFC 6962) so a leaf can never pass as an inner node
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+# -----------------------------
+# Canonical hashing
+# -----------------------------
+def _to_builtin(value):
+    # numpy scalars / arrays sneak into plans straight from the models
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Cannot serialize {type(value).__name__} in a plan")
+
+
+def canonical_json(plan):
+    """Deterministic UTF-8 JSON bytes: sorted keys, no whitespace"""
+    return json.dumps(plan, sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+                      allow_nan=False, default=_to_builtin).encode("utf-8")
+
+
+def hash_plan(plan):
+    """SHA-256 hex digest of a plan's canonical JSON"""
+    return hashlib.sha256(canonical_json(plan)).hexdigest()
+
+
+# -----------------------------
+# Merkle tree
+# -----------------------------
+def _leaf_digest(plan_hash):
+    return hashlib.sha256(LEAF_PREFIX + bytes.fromhex(plan_hash)).digest()
+
+
+def _node_digest(left, right):
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+class MerkleTree:
+    """Binary Merkle tree over plan hashes.
+
+    An odd node at the end of a level is carried up unchanged rather than
+    paired with a copy of itself, so a batch cannot collide with one that
+    repeats its last hash.
+    """
+
+    def __init__(self, plan_hashes):
+        if not plan_hashes:
+            raise ValueError("Cannot build a Merkle tree from an empty batch")
+        self.plan_hashes = list(plan_hashes)
+        level = [_leaf_digest(h) for h in self.plan_hashes]
+        self.levels = [level]
+        while len(level) > 1:
+            next_level = [_node_digest(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                next_level.append(level[-1])
+            self.levels.append(next_level)
+            level = next_level
+
+    def __len__(self):
+        return len(self.plan_hashes)
+
+    @property
+    def root(self):
+        return self.levels[-1][0].hex()
+
+    def proof(self, index):
+        """Sibling path from leaf `index` up to the root"""
+        if not 0 <= index < len(self.plan_hashes):
+            raise IndexError(f"Leaf index {index} out of range")
+        path = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                side = "left" if sibling < index else "right"
+                path.append({"side": side, "hash": level[sibling].hex()})
+            index //= 2
+        return path
+
+
+def verify_proof(plan_hash, proof, root):
+    """True if `proof` links `plan_hash` to the Merkle `root`"""
+    digest = _leaf_digest(plan_hash)
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        digest = _node_digest(sibling, digest) if step["side"] == "left" else _node_digest(digest, sibling)
+    return digest.hex() == root
+
+
+# -----------------------------
+# Batching
+# -----------------------------
+def _log_sealed_batch(batch):
+    print(f"🔗 Sealed plan batch {batch['batch_id']}: {batch['size']} plans, root {batch['root'][:16]}…")
+
+
+class PlanHashBatcher:
+    """Collects plan hashes and seals them into Merkle batches.
+
+    Batches are sealed by size on the request thread and by age on a
+    background thread. `on_seal(batch)` is called after every seal with the
+    batch record (id, root, size, timestamps, plan hashes).
+    """
+
+    def __init__(self, max_batch_size=PLAN_HASH_BATCH_SIZE, max_wait_seconds=PLAN_HASH_WINDOW_SECONDS,
+                 ledger_path=PLAN_HASH_LEDGER, history=PLAN_HASH_HISTORY, on_seal=_log_sealed_batch):
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.ledger_path = ledger_path
+        self.history = history
+        self.on_seal = on_seal
+
+        # Batch ids stay unique across worker processes sharing one ledger
+        self._instance = secrets.token_hex(4)
+        self._sequence = 0
+        self._cond = threading.Condition()
+        self._pending = []
+        self._opened_at = None
+        self._sealed = OrderedDict()
+        self._sealer = None
+        self._stats = {"plans": 0, "batches": 0, "ledger_errors": 0}
+
+        self._ledger_queue = queue.Queue()
+        self._writer = None
+        # batch_id -> byte offset of its sealed record, or -1 while only opened
+        self._ledger_lock = threading.Lock()
+        self._ledger_index = {}
+        self._ledger_scanned = 0
+
+    def _batch_id(self):
+        return f"{self._instance}-{self._sequence:06d}"
+
+    def add(self, plan):
+        """Hash one plan and return its receipt"""
+        return self.add_many([plan])[0]
+
+    def add_many(self, plans):
+        """Hash a list of plans; returns one receipt per plan"""
+        plan_hashes = [hash_plan(plan) for plan in plans]
+        receipts, opened, sealed = [], [], []
+        with self._cond:
+            self._ensure_sealer()
+            for plan_hash in plan_hashes:
+                if not self._pending:
+                    self._opened_at = time.time()
+                    opened.append({"batch_id": self._batch_id(), "opened_at": self._opened_at, "status": "open"})
+                    self._cond.notify()
+                receipts.append({"plan_hash": plan_hash, "batch_id": self._batch_id(),
+                                 "leaf_index": len(self._pending)})
+                self._pending.append(plan_hash)
+                if len(self._pending) >= self.max_batch_size:
+                    sealed.append(self._seal_locked())
+            self._stats["plans"] += len(plan_hashes)
+        # Other workers answer "pending" for these receipts until they are sealed
+        self._append_ledger(opened)
+        for batch in sealed:
+            self._publish(batch)
+        return receipts
+
+    def seal(self):
+        """Seal the open batch now; returns its record, or None if empty"""
+        with self._cond:
+            batch = self._seal_locked()
+        if batch:
+            self._publish(batch)
+        return batch
+
+    def _seal_locked(self):
+        if not self._pending:
+            return None
+        tree = MerkleTree(self._pending)
+        batch = {
+            "batch_id": self._batch_id(),
+            "root": tree.root,
+            "size": len(tree),
+            "opened_at": self._opened_at,
+            "sealed_at": time.time(),
+            "plan_hashes": tree.plan_hashes,
+        }
+        self._sealed[batch["batch_id"]] = tree
+        while len(self._sealed) > self.history:
+            self._sealed.popitem(last=False)
+        self._pending = []
+        self._opened_at = None
+        self._sequence += 1
+        self._stats["batches"] += 1
+        return batch
+
+    def _append_ledger(self, records):
+        if not self.ledger_path or not records:
+            return
+        with self._cond:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="plan-hash-ledger", daemon=True)
+                self._writer.start()
+        self._ledger_queue.put(records)
+
+    def _write_loop(self):
+        while True:
+            records = self._ledger_queue.get()
+            try:
+                fd = os.open(self.ledger_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    # One O_APPEND write per record so concurrent workers do not interleave
+                    for record in records:
+                        os.write(fd, (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8"))
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                with self._cond:
+                    self._stats["ledger_errors"] += 1
+                print(f"⚠️  Could not write plan hash ledger {self.ledger_path}: {e}")
+            finally:
+                self._ledger_queue.task_done()
+
+    def flush(self):
+        """Wait until every queued ledger record has been written"""
+        if self._writer is not None:
+            self._ledger_queue.join()
+
+    def close(self):
+        """Seal the open batch and write out the ledger (worker shutdown)"""
+        self.seal()
+        self.flush()
+
+    def _publish(self, batch):
+        self._append_ledger([batch])
+        if self.on_seal:
+            self.on_seal(batch)
+
+    # -----------------------------
+    # Time window
+    # -----------------------------
+    def _ensure_sealer(self):
+        if self._sealer is None and self.max_wait_seconds > 0:
+            self._sealer = threading.Thread(target=self._seal_loop, name="plan-hash-sealer", daemon=True)
+            self._sealer.start()
+
+    def _seal_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                remaining = self._opened_at + self.max_wait_seconds - time.time()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                batch = self._seal_locked()
+            if batch:
+                self._publish(batch)
+
+    # -----------------------------
+    # Proofs
+    # -----------------------------
+    def _index_ledger(self):
+        """Index ledger records appended since the last call (caller holds _ledger_lock)"""
+        try:
+            size = os.path.getsize(self.ledger_path)
+        except OSError:
+            return
+        if size < self._ledger_scanned:
+            # Rotated or truncated: start over
+            self._ledger_index, self._ledger_scanned = {}, 0
+        with open(self.ledger_path, "rb") as f:
+            f.seek(self._ledger_scanned)
+            offset = self._ledger_scanned
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # another worker is still writing this record
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = {}
+                batch_id = record.get("batch_id")
+                if batch_id is not None:
+                    if "root" in record:
+                        self._ledger_index[batch_id] = offset
+                    else:
+                        self._ledger_index.setdefault(batch_id, -1)
+                offset += len(line)
+            self._ledger_scanned = offset
+
+    def _find_in_ledger(self, batch_id):
+        """(sealed tree or None, whether the batch was ever opened) from the ledger"""
+        if not self.ledger_path:
+            return None, False
+        # Older batch or one from another worker
+        with self._ledger_lock:
+            if self._ledger_index.get(batch_id, -1) < 0:
+                self._index_ledger()
+            offset = self._ledger_index.get(batch_id)
+        if offset is None or offset < 0:
+            return None, offset is not None
+        with open(self.ledger_path, "rb") as f:
+            f.seek(offset)
+            return MerkleTree(json.loads(f.readline())["plan_hashes"]), True
+
+    def get_proof(self, batch_id, leaf_index):
+        """Inclusion proof for a receipt.
+
+        Returns None while the batch is still open, here or in another
+        worker sharing the ledger; raises KeyError for an unknown batch and
+        IndexError for an out-of-range leaf.
+        """
+        with self._cond:
+            if batch_id == self._batch_id() and self._pending:
+                return None
+            tree = self._sealed.get(batch_id)
+        if tree is None:
+            tree, opened = self._find_in_ledger(batch_id)
+            if tree is None and opened:
+                return None
+        if tree is None:
+            raise KeyError(batch_id)
+        proof = tree.proof(leaf_index)
+        return {
+            "plan_hash": tree.plan_hashes[leaf_index],
+            "batch_id": batch_id,
+            "leaf_index": leaf_index,
+            "root": tree.root,
+            "proof": proof,
+        }
+
+    def report(self):
+        with self._cond:
+            return {**self._stats, "pending": len(self._pending), "current_batch": self._batch_id()}
+
+
+_shared_batcher = None
+_shared_lock = threading.Lock()
+
+
+def get_plan_hash_batcher():
+    """Process-wide shared PlanHashBatcher"""
+    global _shared_batcher
+    if _shared_batcher is None:
+        with _shared_lock:
+            if _shared_batcher is None:
+                _shared_batcher = PlanHashBatcher()
+                # Do not drop the open batch or queued ledger records at shutdown
+                atexit.register(_shared_batcher.close)
+    return _shared_batcher
@@ -0,0 +1,172 @@
+# -----------------------------
+# plan_store.py - Per-user meal plans, re-scored only when it matters
+# -----------------------------
+# The dashboard re-sends a user's whole survey on every progress update.
+# For each user we keep the last inputs, the values of the features the
+# boosters actually split on, the model version and the served plan. A
+# request is answered from the store when those features and the model
+# version are unchanged; anything else the survey carries cannot change
+# the prediction. After a model upgrade, stale plans are re-scored in
+# batches on a background thread.
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from ._paths import ML_MODELS_DIR
+from .meal_features import feature_value
+
+DEFAULT_DB_PATH = os.path.join(ML_MODELS_DIR, "nutrition_model", "plan_store.db")
+RESCORE_BATCH_SIZE = int(os.getenv("PLAN_STORE_RESCORE_BATCH", 256))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    user_id       TEXT PRIMARY KEY,
+    model_version TEXT NOT NULL,
+    features      TEXT NOT NULL,
+    inputs        TEXT NOT NULL,
+    result        TEXT NOT NULL,
+    updated_at    REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS plans_model_version ON plans (model_version);
+"""
+
+
+def _feature_value(value):
+    # Mirrors MealPlanner.preprocess: missing / null features become 0,
+    # categorical levels (categorical variant) stay strings
+    if value is None:
+        return 0.0
+    if isinstance(value, str):
+        return value
+    value = float(value)
+    return 0.0 if math.isnan(value) else value
+
+
+class PlanStore:
+    """Meal plans keyed by user id, invalidated by relevant inputs + model version"""
+
+    def __init__(self, planner, path=None):
+        self.planner = planner
+        self.path = path or os.getenv("PLAN_STORE_PATH", DEFAULT_DB_PATH)
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._rescorer = None
+        self.stats = {"avoided": 0, "new_users": 0, "changed_inputs": 0,
+                      "model_upgrades": 0, "background_rescored": 0}
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # One connection per thread, as in chatbot/chat_store.py
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def relevant_vector(self, data):
+        """Canonical JSON of the features the model depends on, or None if unparseable"""
+        try:
+            values = [_feature_value(feature_value(data, name)) for name in self.planner.relevant_features]
+        except (TypeError, ValueError):
+            return None
+        return json.dumps(values, separators=(",", ":"))
+
+    def _save(self, conn, user_id, version, features, data, result):
+        conn.execute(
+            "INSERT INTO plans (user_id, model_version, features, inputs, result, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(user_id) DO UPDATE SET "
+            "model_version = excluded.model_version, features = excluded.features, "
+            "inputs = excluded.inputs, result = excluded.result, updated_at = excluded.updated_at",
+            (user_id, version, features, json.dumps(data), json.dumps(result), time.time()),
+        )
+
+    def plan(self, user_id, data):
+        """(plan, reused) for one user's survey; reused=True when nothing relevant changed"""
+        version = self.planner.model_version
+        features = self.relevant_vector(data)
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT model_version, features, result FROM plans WHERE user_id = ?", (str(user_id),)
+        ).fetchone()
+
+        if row and features is not None and row[0] == version and row[1] == features:
+            self._count("avoided")
+            return json.loads(row[2]), True
+
+        if row is None:
+            self._count("new_users")
+        elif row[0] != version:
+            self._count("model_upgrades")
+        else:
+            self._count("changed_inputs")
+
+        result = self.planner.predict([data])[0]
+        if features is not None:
+            with conn:
+                self._save(conn, str(user_id), version, features, data, result)
+        return result, False
+
+    # -----------------------------
+    # Background re-scoring after a model upgrade
+    # -----------------------------
+    def stale_count(self):
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM plans WHERE model_version != ?", (self.planner.model_version,)
+        ).fetchone()[0]
+
+    def start_background_rescore(self):
+        """Re-score plans saved under another model version (no-op if none)"""
+        if self._rescorer is not None or not self.stale_count():
+            return False
+        self._rescorer = threading.Thread(target=self._rescore_stale, name="plan-rescore", daemon=True)
+        self._rescorer.start()
+        return True
+
+    def _rescore_stale(self):
+        version = self.planner.model_version
+        conn = self._connect()
+        print(f"🔄 Re-scoring stored plans for model {version}...")
+        while True:
+            rows = conn.execute(
+                "SELECT user_id, inputs FROM plans WHERE model_version != ? LIMIT ?",
+                (version, RESCORE_BATCH_SIZE),
+            ).fetchall()
+            if not rows:
+                break
+            batch = [json.loads(inputs) for _, inputs in rows]
+            try:
+                results = self.planner.predict(batch)
+            except Exception as e:
+                print(f"⚠️ Background re-scoring stopped: {e}")
+                return
+            with conn:
+                for (user_id, _), data, result in zip(rows, batch, results):
+                    features = self.relevant_vector(data)
+                    if features is None:
+                        conn.execute("DELETE FROM plans WHERE user_id = ?", (user_id,))
+                    else:
+                        self._save(conn, user_id, version, features, data, result)
+            self._count("background_rescored", len(rows))
+        print(f"✓ Stored plans are up to date ({self.stats['background_rescored']} re-scored)")
+
+    def report(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        requests = stats["avoided"] + stats["new_users"] + stats["changed_inputs"] + stats["model_upgrades"]
+        return {
+            **stats,
+            "avoided_rate": round(stats["avoided"] / requests, 4) if requests else None,
+            "model_version": self.planner.model_version,
+            "relevant_features": len(self.planner.relevant_features),
+        }
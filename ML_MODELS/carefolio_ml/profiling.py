@@ -0,0 +1,209 @@
+# -----------------------------
+# profiling.py - On-demand sampling profiler for the Flask services
+# -----------------------------
+# Off by default: unless PROFILING_ENABLED=1 or PROFILE_SAMPLE_RATE > 0,
+# init_profiling() registers nothing and requests run exactly as before.
+#
+# When enabled, a request is profiled if it carries the PROFILE_HEADER
+# header (value must match PROFILE_ADMIN_TOKEN when one is set) or is picked
+# by PROFILE_SAMPLE_RATE. A sampler thread snapshots the request thread's
+# stack every PROFILE_INTERVAL_MS and the result is written as collapsed
+# stacks ("frame;frame;frame count"), ready for flamegraph.pl or speedscope.
+# Only the newest PROFILE_RING_SIZE files are kept in PROFILE_DIR.
+#
+#   curl -H "X-Profile: $TOKEN" -X POST localhost:5000/predict -d @sample_input.json ...
+#   curl -H "X-Admin-Token: $TOKEN" localhost:5000/admin/profiles
+#   curl -H "X-Admin-Token: $TOKEN" localhost:5000/admin/profiles/<name> > predict.folded
+import hmac
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Profile")
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 1))
+PROFILE_RING_SIZE = int(os.getenv("PROFILE_RING_SIZE", 50))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "carefolio-profiles"))
+
+PROFILE_SUFFIX = ".folded"
+_NAME_RE = re.compile(r"^[\w.-]+\.folded$")
+_LOCAL_ADDRS = {"127.0.0.1", "::1"}
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a background thread"""
+
+    def __init__(self, thread_id, interval_ms=PROFILE_INTERVAL_MS):
+        self.thread_id = thread_id
+        self.interval = interval_ms / 1000.0
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._started_at = None
+        self.duration = 0.0
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if not self._stop.is_set():
+            self._stop.set()
+            self._thread.join()
+            self.duration = time.perf_counter() - self._started_at
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            # Root first, as collapsed stacks expect
+            self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# -----------------------------
+# On-disk ring
+# -----------------------------
+class ProfileRing:
+    """Newest-N collapsed-stack files in one directory (shared by workers)"""
+
+    def __init__(self, directory=PROFILE_DIR, size=PROFILE_RING_SIZE):
+        self.directory = directory
+        self.size = size
+        os.makedirs(directory, exist_ok=True)
+
+    def _entries(self):
+        names = [n for n in os.listdir(self.directory) if _NAME_RE.match(n)]
+        # Names start with a millisecond timestamp, so they sort by age
+        return sorted(names, reverse=True)
+
+    def save(self, label, sampler):
+        slug = re.sub(r"[^\w-]+", "_", label).strip("_")[:60] or "root"
+        name = f"{int(time.time() * 1000)}-{os.getpid()}-{slug}-{sampler.duration * 1000:.0f}ms{PROFILE_SUFFIX}"
+        tmp_path = os.path.join(self.directory, f".{name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(sampler.collapsed())
+        os.replace(tmp_path, os.path.join(self.directory, name))
+
+        for old in self._entries()[self.size:]:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except FileNotFoundError:
+                pass  # pruned by another worker
+        return name
+
+    def list(self):
+        entries = []
+        for name in self._entries():
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append({"name": name, "bytes": stat.st_size, "created_at": stat.st_mtime})
+        return entries
+
+    def path(self, name):
+        """Absolute path of a stored profile, or None for unknown/unsafe names"""
+        if not _NAME_RE.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+
+# -----------------------------
+# Flask integration
+# -----------------------------
+def _token_ok(value):
+    return bool(value) and hmac.compare_digest(value, PROFILE_ADMIN_TOKEN)
+
+
+def init_profiling(app):
+    """Attach request profiling + /admin/profiles routes to a Flask app.
+
+    Does nothing (no hooks, no routes) unless profiling is enabled.
+    """
+    if not (PROFILING_ENABLED or PROFILE_SAMPLE_RATE > 0):
+        return None
+
+    from flask import abort, g, jsonify, request, send_file
+
+    ring = ProfileRing()
+
+    def authorized(header_value):
+        # Without a token, only local callers may trigger or read profiles
+        if PROFILE_ADMIN_TOKEN:
+            return _token_ok(header_value)
+        return request.remote_addr in _LOCAL_ADDRS
+
+    @app.before_request
+    def _start_profile():
+        trigger = request.headers.get(PROFILE_HEADER)
+        if trigger is not None:
+            if not authorized(trigger):
+                return None
+        elif not (PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE):
+            return None
+        if request.path.startswith("/admin/profiles"):
+            return None
+        g.profile_sampler = StackSampler(threading.get_ident()).start()
+        return None
+
+    @app.after_request
+    def _save_profile(response):
+        sampler = g.pop("profile_sampler", None)
+        if sampler is not None:
+            sampler.stop()
+            try:
+                name = ring.save(f"{request.method}{request.path}", sampler)
+                response.headers["X-Profile-Id"] = name
+            except OSError as e:
+                print(f"⚠️ Could not save profile: {e}")
+        return response
+
+    @app.teardown_request
+    def _stop_profile(exc):
+        # Unhandled errors skip after_request; never leave a sampler running
+        sampler = g.pop("profile_sampler", None)
+        if sampler is not None:
+            sampler.stop()
+
+    @app.route("/admin/profiles")
+    def list_profiles():
+        if not authorized(request.headers.get("X-Admin-Token")):
+            abort(403)
+        return jsonify({"profiles": ring.list()})
+
+    @app.route("/admin/profiles/<name>")
+    def download_profile(name):
+        if not authorized(request.headers.get("X-Admin-Token")):
+            abort(403)
+        path = ring.path(name)
+        if path is None:
+            abort(404)
+        return send_file(path, mimetype="text/plain", as_attachment=True, download_name=name)
+
+    print(f"✓ Request profiling enabled (sample rate {PROFILE_SAMPLE_RATE}, header {PROFILE_HEADER}, dir {ring.directory})")
+    return ring
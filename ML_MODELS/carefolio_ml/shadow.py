@@ -0,0 +1,224 @@
+# -----------------------------
+# shadow.py - Shadow scoring of a candidate model on live traffic
+# -----------------------------
+# A candidate model is loaded next to the active one. A sample of live
+# requests (SHADOW_SAMPLE_RATE) is handed to a background worker together
+# with the answer the user already got; the worker scores the same inputs
+# with the candidate and keeps streaming counters. Nothing here runs on the
+# request path except a random draw and a non-blocking queue put, and a
+# full queue drops the sample instead of waiting.
+#
+# Latency is measured for both models in the worker, back to back on the
+# same inputs with the same inference threads: timing the active model on
+# the request path would also count plan store I/O and executor queueing,
+# which the candidate never pays. Agreement still compares against the
+# answer the user got.
+#
+# Candidates (all off by default):
+#   SHADOW_MEAL_ARTIFACTS / SHADOW_MEAL_VARIANT  - meal planner candidate
+#   SHADOW_WORKOUT_MODEL_DIR                     - workout model candidate
+import bisect
+import math
+import os
+import queue
+import random
+import threading
+import time
+
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", 0.1))
+SHADOW_QUEUE_SIZE = int(os.getenv("SHADOW_QUEUE_SIZE", 256))
+SHADOW_MIN_SAMPLES = int(os.getenv("SHADOW_MIN_SAMPLES", 200))
+SHADOW_MIN_AGREEMENT = float(os.getenv("SHADOW_MIN_AGREEMENT", 0.95))
+SHADOW_MAX_LATENCY_RATIO = float(os.getenv("SHADOW_MAX_LATENCY_RATIO", 1.2))
+
+# Log-spaced latency buckets from 0.1 ms to ~30 s
+_BUCKET_BOUNDS_MS = [0.1 * 1.25 ** i for i in range(57)]
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram; percentiles are bucket upper bounds"""
+
+    def __init__(self):
+        self.counts = [0] * (len(_BUCKET_BOUNDS_MS) + 1)
+        self.total = 0
+
+    def add(self, value_ms):
+        self.counts[bisect.bisect_left(_BUCKET_BOUNDS_MS, value_ms)] += 1
+        self.total += 1
+
+    def percentile(self, pct):
+        if not self.total:
+            return None
+        rank = math.ceil(pct / 100.0 * self.total)
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return round(_BUCKET_BOUNDS_MS[min(i, len(_BUCKET_BOUNDS_MS) - 1)], 3)
+        return None
+
+    def report(self):
+        return {f"p{p}": self.percentile(p) for p in (50, 95, 99)}
+
+
+class RunningDelta:
+    """Streaming mean / mean-absolute / max-absolute of candidate - active"""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.mean_abs = 0.0
+        self.max_abs = 0.0
+
+    def add(self, delta):
+        self.n += 1
+        self.mean += (delta - self.mean) / self.n
+        self.mean_abs += (abs(delta) - self.mean_abs) / self.n
+        self.max_abs = max(self.max_abs, abs(delta))
+
+    def report(self):
+        return {"mean": round(self.mean, 4), "mean_abs": round(self.mean_abs, 4), "max_abs": round(self.max_abs, 4)}
+
+
+class ShadowScorer:
+    """Scores sampled requests with a candidate on a background thread.
+
+    `score(batch)` runs the candidate and `active_score(batch)` the active
+    model (timed only); `compare(active, candidate)` returns
+    (agree, {field: numeric delta}) for one result pair.
+    """
+
+    def __init__(self, name, score, compare, active_score, sample_rate=SHADOW_SAMPLE_RATE,
+                 queue_size=SHADOW_QUEUE_SIZE):
+        self.name = name
+        self.score = score
+        self.active_score = active_score
+        self.compare = compare
+        self.sample_rate = sample_rate
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self.counters = {"sampled": 0, "scored": 0, "agreed": 0, "dropped": 0, "errors": 0}
+        self.deltas = {}
+        self.latency = {"active": LatencyHistogram(), "candidate": LatencyHistogram()}
+        self._worker = threading.Thread(target=self._run, name=f"shadow-{name}", daemon=True)
+        self._worker.start()
+
+    def submit(self, batch, active_results):
+        """Offer one served request for shadow scoring (never blocks)"""
+        if random.random() >= self.sample_rate:
+            return
+        try:
+            self._queue.put_nowait((batch, active_results))
+            with self._lock:
+                self.counters["sampled"] += 1
+        except queue.Full:
+            with self._lock:
+                self.counters["dropped"] += 1
+
+    def _run(self):
+        # Runs at normal priority so candidate latency is comparable with the
+        # active model's; the sample rate bounds the extra CPU it takes
+        while True:
+            batch, active_results = self._queue.get()
+            try:
+                start = time.perf_counter()
+                self.active_score(batch)
+                active_ms = (time.perf_counter() - start) * 1000
+                start = time.perf_counter()
+                candidate_results = self.score(batch)
+                candidate_ms = (time.perf_counter() - start) * 1000
+                comparisons = [self.compare(a, c) for a, c in zip(active_results, candidate_results)]
+            except Exception as e:
+                print(f"⚠️ Shadow scoring ({self.name}) failed: {e}")
+                with self._lock:
+                    self.counters["errors"] += 1
+                continue
+
+            with self._lock:
+                self.latency["active"].add(active_ms)
+                self.latency["candidate"].add(candidate_ms)
+                for agree, deltas in comparisons:
+                    self.counters["scored"] += 1
+                    self.counters["agreed"] += int(agree)
+                    for field, delta in deltas.items():
+                        self.deltas.setdefault(field, RunningDelta()).add(delta)
+
+    def summary(self):
+        """Streaming stats plus a promote / hold verdict"""
+        with self._lock:
+            scored = self.counters["scored"]
+            agreement = self.counters["agreed"] / scored if scored else None
+            latency = {k: h.report() for k, h in self.latency.items()}
+            deltas = {field: d.report() for field, d in self.deltas.items()}
+            counters = dict(self.counters)
+
+        active_p95, candidate_p95 = latency["active"]["p95"], latency["candidate"]["p95"]
+        enough = scored >= SHADOW_MIN_SAMPLES
+        accurate = enough and agreement >= SHADOW_MIN_AGREEMENT
+        fast = enough and candidate_p95 is not None and candidate_p95 <= active_p95 * SHADOW_MAX_LATENCY_RATIO
+        return {
+            "candidate": self.name,
+            "sample_rate": self.sample_rate,
+            **counters,
+            "queue_depth": self._queue.qsize(),
+            "agreement_rate": round(agreement, 4) if agreement is not None else None,
+            "deltas": deltas,
+            "latency_ms": latency,
+            "promote": {
+                "enough_samples": enough,
+                "accurate": accurate,
+                "fast": fast,
+                "ready": accurate and fast,
+                "criteria": {"min_samples": SHADOW_MIN_SAMPLES, "min_agreement": SHADOW_MIN_AGREEMENT,
+                             "max_p95_ratio": SHADOW_MAX_LATENCY_RATIO},
+            },
+        }
+
+
+# -----------------------------
+# Model-specific candidates
+# -----------------------------
+def compare_meal(active, candidate):
+    agree = (active["meal_plan_type"] == candidate["meal_plan_type"]
+             and active["health_tag"] == candidate["health_tag"])
+    deltas = {k: candidate["predicted_nutrition"][k] - v for k, v in active["predicted_nutrition"].items()}
+    return agree, deltas
+
+
+def compare_workout(active, candidate):
+    agree = active["result"]["Fitness Type"] == candidate["result"]["Fitness Type"]
+    confidence = lambda r: float(str(r["result"]["Confidence"]).rstrip("%"))
+    return agree, {"confidence": confidence(candidate) - confidence(active)}
+
+
+def make_meal_shadow(active):
+    """ShadowScorer for a candidate meal planner next to `active`, or None if none configured"""
+    artifacts_dir = os.getenv("SHADOW_MEAL_ARTIFACTS")
+    variant = os.getenv("SHADOW_MEAL_VARIANT")
+    if not (artifacts_dir or variant):
+        return None
+    from .meal_planner import MealPlanner
+
+    candidate = MealPlanner(artifacts_dir, variant=variant).load()
+    # Same booster threads as the active planner, so latencies compare
+    n_jobs = active.boosters()[0].get_params().get("n_jobs")
+    if n_jobs is not None:
+        candidate.set_inference_threads(n_jobs)
+    candidate.predict([{}])  # warm up so the first sample does not skew latency
+    name = f"meal:{candidate.variant}@{candidate.artifacts_dir}"
+    print(f"✓ Shadow scoring {name} on {SHADOW_SAMPLE_RATE:.0%} of requests")
+    return ShadowScorer(name, candidate.predict, compare_meal, active.predict)
+
+
+def make_workout_shadow(active):
+    """ShadowScorer for a candidate workout model next to `active`, or None if none configured"""
+    model_dir = os.getenv("SHADOW_WORKOUT_MODEL_DIR")
+    if not model_dir:
+        return None
+    from .workout import WorkoutRecommender
+
+    candidate = WorkoutRecommender(model_dir).load()
+    candidate.recommend([{}])  # warm up so the first sample does not skew latency
+    name = f"workout:{candidate.backend}@{model_dir}"
+    print(f"✓ Shadow scoring {name} on {SHADOW_SAMPLE_RATE:.0%} of requests")
+    return ShadowScorer(name, candidate.recommend, compare_workout, active.recommend)
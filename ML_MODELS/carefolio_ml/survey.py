@@ -0,0 +1,111 @@
+# -----------------------------
+# survey.py - One raw survey -> meal planner and workout model inputs
+# -----------------------------
+# Raw survey fields (all optional except the body metrics):
+#   age, gender ("Male"/"Female"), height_cm, weight_kg,
+#   has_diabetes, has_hypertension (bool / 0-1 / "Yes"-"No"),
+#   fitness_goal ("weight_loss", "weight_gain", "maintain"),
+#   activity_level ("sedentary", "moderate", "active"),
+#   diet_type ("non-veg", "vegan", "vegetarian"),
+#   preferred_cuisine ("Indian", "Continental", "Mediterranean", ...),
+#   meals_per_day, sugar_level, sleep_hours, stress_level,
+#   systolic_bp, diastolic_bp, bmr, tdee
+
+ACTIVITY_MULTIPLIERS = {"sedentary": 1.2, "moderate": 1.55, "active": 1.725}
+WORKOUT_GOALS = {"weight_loss": "Weight Loss", "weight_gain": "Weight Gain", "maintain": "Maintain"}
+
+SURVEY_DEFAULTS = {
+    "age": 30,
+    "gender": "Male",
+    "height_cm": 170,
+    "weight_kg": 70,
+    "has_diabetes": False,
+    "has_hypertension": False,
+    "fitness_goal": "maintain",
+    "activity_level": "moderate",
+    "diet_type": "non-veg",
+    "preferred_cuisine": "Indian",
+    "meals_per_day": 3,
+    "sugar_level": 90,
+    "sleep_hours": 7,
+    "stress_level": 5,
+    "systolic_bp": 120,
+    "diastolic_bp": 80,
+}
+
+
+def _flag(value):
+    if isinstance(value, str):
+        return 1 if value.strip().lower() in ("1", "yes", "y", "true") else 0
+    return 1 if value else 0
+
+
+def _normalize_key(value):
+    return str(value).strip().lower().replace(" ", "_").replace("-", "_")
+
+
+def with_defaults(survey):
+    merged = dict(SURVEY_DEFAULTS)
+    merged.update({k: v for k, v in survey.items() if v is not None})
+    return merged
+
+
+def estimate_bmr(gender, weight_kg, height_cm, age):
+    """Mifflin-St Jeor basal metabolic rate (kcal/day)"""
+    bmr = 10 * weight_kg + 6.25 * height_cm - 5 * age
+    return bmr + 5 if str(gender).lower().startswith("m") else bmr - 161
+
+
+def survey_to_meal_features(survey):
+    """Raw survey -> one-hot feature dict expected by the meal planner"""
+    s = with_defaults(survey)
+    age, height_cm, weight_kg = float(s["age"]), float(s["height_cm"]), float(s["weight_kg"])
+    goal = _normalize_key(s["fitness_goal"])
+    activity = _normalize_key(s["activity_level"])
+    diet = _normalize_key(s["diet_type"]).replace("_", "-")
+    cuisine = str(s["preferred_cuisine"]).strip().title()
+
+    bmr = float(s.get("bmr") or estimate_bmr(s["gender"], weight_kg, height_cm, age))
+    tdee = float(s.get("tdee") or bmr * ACTIVITY_MULTIPLIERS.get(activity, ACTIVITY_MULTIPLIERS["moderate"]))
+
+    return {
+        "age": age,
+        "height_cm": height_cm,
+        "weight_kg": weight_kg,
+        "meals_per_day": s["meals_per_day"],
+        "has_diabetes": _flag(s["has_diabetes"]),
+        "has_hypertension": _flag(s["has_hypertension"]),
+        "sugar_level": s["sugar_level"],
+        "sleep_hours": s["sleep_hours"],
+        "stress_level": s["stress_level"],
+        "bmr": round(bmr),
+        "tdee": round(tdee),
+        "systolic_bp": s["systolic_bp"],
+        "diastolic_bp": s["diastolic_bp"],
+        "gender_male": 1 if str(s["gender"]).lower().startswith("m") else 0,
+        "fitness_goal_weight_gain": int(goal == "weight_gain"),
+        "fitness_goal_weight_loss": int(goal == "weight_loss"),
+        "activity_level_moderate": int(activity == "moderate"),
+        "activity_level_sedentary": int(activity == "sedentary"),
+        "diet_type_non-veg": int(diet == "non-veg"),
+        "diet_type_vegan": int(diet == "vegan"),
+        "diet_type_vegetarian": int(diet == "vegetarian"),
+        "preferred_cuisine_Continental": int(cuisine == "Continental"),
+        "preferred_cuisine_Indian": int(cuisine == "Indian"),
+        "preferred_cuisine_Mediterranean": int(cuisine == "Mediterranean"),
+    }
+
+
+def survey_to_workout_input(survey):
+    """Raw survey -> form-style dict expected by the workout recommender"""
+    s = with_defaults(survey)
+    goal = _normalize_key(s["fitness_goal"])
+    return {
+        "sex": "Male" if str(s["gender"]).lower().startswith("m") else "Female",
+        "age": int(s["age"]),
+        "height": float(s["height_cm"]) / 100,
+        "weight": float(s["weight_kg"]),
+        "hypertension": "Yes" if _flag(s["has_hypertension"]) else "No",
+        "diabetes": "Yes" if _flag(s["has_diabetes"]) else "No",
+        "goal": WORKOUT_GOALS.get(goal, str(s["fitness_goal"])),
+    }
@@ -0,0 +1,399 @@
+# -----------------------------
+# workout.py - In-process workout recommender inference
+# -----------------------------
+import hashlib
+import os
+import pickle
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from ._paths import ML_MODELS_DIR
+from .early_exit import (EARLY_EXIT_MODES, WORKOUT_EARLY_EXIT, AnytimeForest, EarlyExitStats,
+                         supports_early_exit)
+from .workout_backends import WORKOUT_BACKENDS, load_model_info
+
+DEFAULT_MODEL_DIR = os.path.join(ML_MODELS_DIR, "Workout_fitness")
+CATEGORICAL_COLS = ['Sex', 'Hypertension', 'Diabetes', 'Fitness Goal', 'Level']
+FALLBACK_FITNESS_TYPE = "General Fitness"
+
+
+def safe_label_encode(encoder, values, column_name):
+    """Safely encode labels, handling unseen values"""
+    try:
+        return encoder.transform(values)
+    except ValueError as e:
+        print(f"Warning: Unseen labels in {column_name}: {e}")
+        # Handle unseen labels by mapping them to the most common class
+        encoded_values = []
+        for value in values:
+            if value in encoder.classes_:
+                encoded_values.append(encoder.transform([value])[0])
+            else:
+                print(f"Mapping unseen value '{value}' to first class '{encoder.classes_[0]}'")
+                encoded_values.append(0)  # Use first classs
+        return np.array(encoded_values)
+
+
+ROBUST_MAPPINGS = {
+    'bmi_mapping': {
+        'Underweight': ['Underweight', 'Under Weight', 'Thin', 'Low', 'Below Normal', 'Skinny'],
+        'Normal': ['Normal', 'Normal Weight', 'Healthy', 'Average', 'Good', 'Ideal'],
+        'Overweight': ['Overweight', 'Over Weight', 'High', 'Above Normal', 'Heavy'],
+        'Obese': ['Obese', 'Obesity', 'Very High', 'Extremely High', 'Severely Overweight', 'Very Heavy']
+    },
+    'goal_mapping': {
+        'Weight Loss': ['Weight Loss', 'Lose Weight', 'Fat Loss', 'Cut', 'Cutting', 'Slim Down', 'Reduce Weight'],
+        'Weight Gain': ['Weight Gain', 'Gain Weight', 'Bulk', 'Bulking', 'Mass Gain', 'Increase Weight'],
+        'Muscle Gain': ['Muscle Gain', 'Build Muscle', 'Muscle Building', 'Strength', 'Hypertrophy', 'Muscle Growth'],
+        'Maintain': ['Maintain', 'Maintenance', 'Stay Fit', 'General Fitness', 'Keep Fit', 'Fitness'],
+        'Endurance': ['Endurance', 'Cardio', 'Stamina', 'Aerobic', 'Running', 'Cycling'],
+        'Flexibility': ['Flexibility', 'Stretching', 'Yoga', 'Mobility', 'Range of Motion']
+    },
+    'sex_mapping': {
+        'Male': ['Male', 'M', 'Man', 'male', 'm'],
+        'Female': ['Female', 'F', 'Woman', 'female', 'f']
+    },
+    'binary_mapping': {
+        'Yes': ['Yes', 'Y', 'yes', 'y', '1', 1, True, 'true', 'True'],
+        'No': ['No', 'N', 'no', 'n', '0', 0, False, 'false', 'False']
+    }
+}
+
+
+def create_robust_mappings():
+    """Create comprehensive mappings for different variations"""
+    return ROBUST_MAPPINGS
+
+
+def map_value_to_dataset(user_value, dataset_values, mapping_dict=None):
+    """Map user input to dataset's expected values"""
+    # Direct match first
+    if user_value in dataset_values:
+        return user_value
+
+    # If mapping dictionary provided, try to map
+    if mapping_dict:
+        for dataset_val in dataset_values:
+            for standard_val, variations in mapping_dict.items():
+                if (user_value == standard_val and dataset_val in variations) or \
+                   (dataset_val in variations and user_value == standard_val) or \
+                   (user_value in variations and dataset_val == standard_val):
+                    return dataset_val
+
+    # Case-insensitive match
+    for dataset_val in dataset_values:
+        if str(user_value).lower() == str(dataset_val).lower():
+            return dataset_val
+
+    # Partial match
+    for dataset_val in dataset_values:
+        if str(user_value).lower() in str(dataset_val).lower() or \
+           str(dataset_val).lower() in str(user_value).lower():
+            return dataset_val
+
+    # Return first available value as fallback
+    print(f"Warning: Could not map '{user_value}' to any dataset value. Using '{dataset_values[0]}'")
+    return dataset_values[0]
+
+
+def calculate_bmi(height, weight):
+    """Calculate BMI with input validation"""
+    try:
+        # Convert height to meters if it appears to be in cm
+        if height > 10:
+            height = height / 100
+
+        bmi = weight / (height ** 2)
+        return round(bmi, 2)
+    except (ValueError, ZeroDivisionError):
+        return 22.0  # Default normal BMI
+
+
+def get_bmi_level(bmi):
+    """Get BMI level based on standard ranges"""
+    try:
+        if bmi < 18.5:
+            return "Underweight"
+        elif bmi < 25:
+            return "Normal"
+        elif bmi < 30:
+            return "Overweight"
+        else:
+            return "Obese"
+    except:
+        return "Normal"
+
+
+def generate_recommendations(fitness_type, goal, bmi_level, bmi_value):
+    """Generate comprehensive recommendations"""
+
+    recommendations = {
+        'Fitness Type': fitness_type,
+        'Goal': goal,
+        'BMI Level': bmi_level,
+        'Exercises': '',
+        'Equipment': '',
+        'Diet': '',
+        'Schedule': '',
+        'Recommendation': ''
+    }
+
+    # Goal-based recommendations
+    goal_lower = goal.lower()
+
+    if 'weight loss' in goal_lower or 'loss' in goal_lower or 'cut' in goal_lower:
+        recommendations['Exercises'] = 'High-intensity cardio (30-45 min), Full-body strength training, HIIT workouts 3-4x/week, Walking 8000+ steps daily'
+        recommendations['Equipment'] = 'Treadmill, Elliptical, Dumbbells, Kettlebells, Resistance bands, Jump rope'
+        recommendations['Diet'] = 'Caloric deficit of 500-750 calories, High protein (1.2-1.6g/kg), Reduce processed foods, Increase vegetables and fiber'
+        recommendations['Schedule'] = 'Mon/Wed/Fri: Strength training, Tue/Thu: Cardio, Weekend: Active recovery'
+
+    elif 'weight gain' in goal_lower or 'gain' in goal_lower or 'bulk' in goal_lower:
+        recommendations['Exercises'] = 'Compound movements: Squats, Deadlifts, Bench press, Rows. 3-4 sets of 6-8 reps with progressive overload'
+        recommendations['Equipment'] = 'Barbell, Dumbbells, Power rack, Bench press, Pull-up bar, Cable machine'
+        recommendations['Diet'] = 'Caloric surplus of 300-500 calories, High protein (1.6-2.2g/kg), Complex carbs, Healthy fats, Frequent meals'
+        recommendations['Schedule'] = '4-5 days/week strength training, 2 days rest, Focus on major muscle groups'
+
+    elif 'muscle' in goal_lower or 'strength' in goal_lower or 'hypertrophy' in goal_lower:
+        recommendations['Exercises'] = 'Hypertrophy training: 8-12 reps, 3-4 sets, Rest 60-90 seconds, Focus on time under tension'
+        recommendations['Equipment'] = 'Free weights, Cable machines, Adjustable bench, Various grips and attachments'
+        recommendations['Diet'] = 'High protein (1.8-2.5g/kg), Post-workout nutrition within 2 hours, Adequate carbs for recovery'
+        recommendations['Schedule'] = 'Upper/Lower split or Push/Pull/Legs, 4-6 days/week, 48-72 hours rest per muscle group'
+
+    elif 'endurance' in goal_lower or 'cardio' in goal_lower or 'stamina' in goal_lower:
+        recommendations['Exercises'] = 'Long steady-state cardio, Interval training, Circuit training, Sport-specific activities'
+        recommendations['Equipment'] = 'Cardio machines, Running shoes, Heart rate monitor, Cycling equipment'
+        recommendations['Diet'] = 'Adequate carbohydrates for energy, Proper hydration, Electrolyte balance'
+        recommendations['Schedule'] = '5-6 days cardio, 2-3 days strength training, Progressive distance/time increases'
+
+    else:  # Maintain or general fitness
+        recommendations['Exercises'] = 'Balanced routine: 150 min moderate cardio/week + 2-3 strength sessions, Flexibility work'
+        recommendations['Equipment'] = 'Basic gym equipment, Dumbbells, Resistance bands, Cardio machines'
+        recommendations['Diet'] = 'Balanced macronutrients, Whole foods, Adequate hydration, Regular meal timing'
+        recommendations['Schedule'] = '3-4 days/week mixed training, 2-3 rest days, Include variety to prevent boredom'
+
+    # BMI-based adjustments
+    if bmi_level == 'Underweight':
+        recommendations['Recommendation'] = f'With BMI {bmi_value}, focus on healthy weight gain through strength training and increased caloric intake. Consult a nutritionist for personalized meal planning.'
+    elif bmi_level == 'Overweight':
+        recommendations['Recommendation'] = f'With BMI {bmi_value}, prioritize gradual weight loss (1-2 lbs/week) through moderate caloric deficit and regular exercise. Focus on sustainable lifestyle changes.'
+    elif bmi_level == 'Obese':
+        recommendations['Recommendation'] = f'With BMI {bmi_value}, start with low-impact exercises and consult healthcare providers. Focus on sustainable lifestyle changes and consider professional guidance.'
+    else:
+        recommendations['Recommendation'] = f'With BMI {bmi_value} in the normal range, focus on maintaining your current weight while working towards your fitness goals.'
+
+    # Add safety notes
+    recommendations['Recommendation'] += ' Always warm up before exercising and cool down afterwards. Listen to your body and adjust intensity as needed.'
+
+    return recommendations
+
+
+class WorkoutRecommender:
+    """Workout recommender with the app's input mapping.
+
+    The estimator is whatever backend model_info.json declares (see
+    workout_backends.py); a random forest when there is no declaration.
+    `fallback` is called (and must return the same 4-tuple as `load`) when
+    the saved artifacts are missing or unreadable, e.g. to train a model.
+    `early_exit` (default $WORKOUT_EARLY_EXIT) selects anytime forest
+    inference, see early_exit.py.
+    """
+
+    def __init__(self, model_dir=None, fallback=None, early_exit=None):
+        self.model_dir = model_dir or os.getenv("WORKOUT_MODEL_DIR", DEFAULT_MODEL_DIR)
+        self.fallback = fallback
+        self.early_exit = early_exit or WORKOUT_EARLY_EXIT
+        if self.early_exit not in EARLY_EXIT_MODES:
+            raise ValueError(f"Unknown early exit mode '{self.early_exit}'. Choose from: {', '.join(EARLY_EXIT_MODES)}")
+        self._anytime = None
+        self._early_exit_stats = None
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.model = None
+        self.backend = None
+        self.label_encoders = {}
+        self.target_encoder = None
+        self.dataset_info = {}
+        self._model_version = None
+
+    def _load_artifacts(self):
+        path = lambda name: os.path.join(self.model_dir, name)
+        return (joblib.load(path('model.pkl')), joblib.load(path('label_encoders.pkl')),
+                joblib.load(path('target_encoder.pkl')), joblib.load(path('dataset_info.pkl')))
+
+    def load(self):
+        """Load the model once (thread-safe), using `fallback` if loading fails"""
+        if self._loaded:
+            return self
+        with self._lock:
+            if not self._loaded:
+                try:
+                    artifacts = self._load_artifacts()
+                    print("✓ Loaded existing model successfully")
+                except Exception as e:
+                    if self.fallback is None:
+                        raise
+                    print(f"Error loading model: {e}. Creating new model...")
+                    artifacts = self.fallback()
+                self.model, self.label_encoders, self.target_encoder, self.dataset_info = artifacts
+                self.backend = load_model_info(self.model_dir)["backend"]
+                if self.backend not in WORKOUT_BACKENDS:
+                    print(f"⚠️  Unknown workout backend '{self.backend}' declared; serving it as-is")
+                print(f"✓ Workout backend: {self.backend} ({type(self.model).__name__})")
+                if self.early_exit != "off":
+                    if supports_early_exit(self.model):
+                        self._anytime = AnytimeForest(self.model)
+                        self._early_exit_stats = EarlyExitStats(self._anytime.n_trees)
+                        print(f"✓ Early exit: {self.early_exit} over {self._anytime.n_trees} trees")
+                    else:
+                        print(f"⚠️  Early exit needs a tree ensemble; serving {self.backend} in full")
+                self._loaded = True
+        return self
+
+    @property
+    def model_version(self):
+        """Short content hash of the fitted estimator and its backend"""
+        if self._model_version is None:
+            self.load()
+            digest = hashlib.sha256(str(self.backend).encode("utf-8"))
+            digest.update(pickle.dumps(self.model, protocol=4))
+            self._model_version = digest.hexdigest()[:16]
+        return self._model_version
+
+    @property
+    def feature_columns(self):
+        """Column order the model was fitted with"""
+        names = getattr(self.model, 'feature_names_in_', None)
+        if names is not None:
+            return list(names)
+        return list(self.label_encoders.keys()) + ['Age', 'Height', 'Weight', 'BMI']
+
+    def map_inputs(self, item):
+        """Raw form-style dict -> (model row, goal, calculated BMI level, BMI)"""
+        sex = str(item.get('sex', 'Male')).strip()
+        age = int(item.get('age', 25))
+        height = float(item.get('height', 1.7))
+        weight = float(item.get('weight', 70))
+        hypertension = str(item.get('hypertension', 'No')).strip()
+        diabetes = str(item.get('diabetes', 'No')).strip()
+        fitness_goal = str(item.get('goal', 'Maintain')).strip()
+
+        bmi = calculate_bmi(height, weight)
+        calculated_level = get_bmi_level(bmi)
+
+        mappings = ROBUST_MAPPINGS
+        dataset_info = self.dataset_info
+        if 'Sex' in dataset_info:
+            sex = map_value_to_dataset(sex, dataset_info['Sex'], mappings['sex_mapping'])
+        if 'Hypertension' in dataset_info:
+            hypertension = map_value_to_dataset(hypertension, dataset_info['Hypertension'], mappings['binary_mapping'])
+        if 'Diabetes' in dataset_info:
+            diabetes = map_value_to_dataset(diabetes, dataset_info['Diabetes'], mappings['binary_mapping'])
+        if 'Fitness Goal' in dataset_info:
+            fitness_goal = map_value_to_dataset(fitness_goal, dataset_info['Fitness Goal'], mappings['goal_mapping'])
+        if 'Level' in dataset_info:
+            mapped_level = map_value_to_dataset(calculated_level, dataset_info['Level'], mappings['bmi_mapping'])
+        else:
+            mapped_level = calculated_level
+
+        row = {
+            'Sex': sex,
+            'Age': age,
+            'Height': height,
+            'Weight': weight,
+            'Hypertension': hypertension,
+            'Diabetes': diabetes,
+            'BMI': bmi,
+            'Level': mapped_level,
+            'Fitness Goal': fitness_goal
+        }
+        return row, fitness_goal, calculated_level, bmi
+
+    def encode(self, rows):
+        """Mapped rows -> label-encoded feature frame in model column order"""
+        user_data = pd.DataFrame(rows)
+        for col in CATEGORICAL_COLS:
+            if col in self.label_encoders and col in user_data.columns:
+                user_data[col] = safe_label_encode(self.label_encoders[col], user_data[col], col)
+        columns = [col for col in self.feature_columns if col in user_data.columns]
+        return user_data[columns]
+
+    def predict_encoded(self, X):
+        """(fitness types, confidence %, trees behind each confidence) from one pass.
+
+        The last item is None when every row used the whole model. With
+        early exit a row's confidence is the vote share of the trees it
+        evaluated, which can differ from the full forest's predict_proba
+        even when the class is guaranteed to match.
+        """
+        trees_used = None
+        if self._anytime is not None:
+            proba, trees_used = self._anytime.predict_proba(X, mode=self.early_exit)
+            self._early_exit_stats.record(trees_used)
+            trees_used = [int(t) for t in trees_used]
+        else:
+            proba = self.model.predict_proba(X)
+        encoded = self.model.classes_[proba.argmax(axis=1)]
+        fitness_types = self.target_encoder.inverse_transform(encoded)
+        confidences = np.round(proba.max(axis=1) * 100, 2)
+        return list(fitness_types), [float(c) for c in confidences], trees_used
+
+    def early_exit_report(self):
+        """Early-exit mode and mean trees evaluated per row, for /metrics"""
+        if self._early_exit_stats is None:
+            return {"mode": "off"}
+        return {"mode": self.early_exit, **self._early_exit_stats.report()}
+
+    def recommend(self, batch):
+        """Recommendations for a list of form-style dicts.
+
+        Each result has `bmi`, `level` and `result` (the recommendation dict
+        rendered by result.html, including `Confidence`). When early exit
+        stopped a row before the last tree, `Confidence Basis` says how many
+        trees its `Confidence` was computed from.
+        """
+        self.load()
+        batch = list(batch)
+        if not batch:
+            return []
+        mapped = [self.map_inputs(item) for item in batch]
+
+        try:
+            X = self.encode([row for row, _, _, _ in mapped])
+            fitness_types, confidences, trees_used = self.predict_encoded(X)
+        except Exception as e:
+            print(f"Prediction error: {e}")
+            fitness_types = [FALLBACK_FITNESS_TYPE] * len(batch)
+            confidences = [0] * len(batch)
+            trees_used = None
+
+        return self.build_results(mapped, fitness_types, confidences, trees_used)
+
+    def build_results(self, mapped, fitness_types, confidences, trees_used=None):
+        """Recommendation payloads from mapped inputs and model outputs"""
+        results = []
+        trees_used = trees_used or [None] * len(mapped)
+        for (_, goal, level, bmi), fitness_type, confidence, trees in zip(mapped, fitness_types, confidences,
+                                                                           trees_used):
+            result = generate_recommendations(fitness_type, goal, level, bmi)
+            result['Confidence'] = f"{confidence}%"
+            if trees is not None and trees < self._anytime.n_trees:
+                result['Confidence Basis'] = f"early exit: vote share of {trees} of {self._anytime.n_trees} trees"
+            results.append({"bmi": bmi, "level": level, "result": result})
+        return results
+
+
+_shared_recommender = None
+_shared_lock = threading.Lock()
+
+
+def get_workout_recommender(fallback=None):
+    """Process-wide shared WorkoutRecommender"""
+    global _shared_recommender
+    if _shared_recommender is None:
+        with _shared_lock:
+            if _shared_recommender is None:
+                _shared_recommender = WorkoutRecommender(fallback=fallback)
+    return _shared_recommender
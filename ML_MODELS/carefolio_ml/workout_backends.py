@@ -0,0 +1,137 @@
+# -----------------------------
+# workout_backends.py - Interchangeable estimators for the workout model
+# -----------------------------
+# Every backend is a scikit-learn classifier exposing predict_proba and
+# classes_, so WorkoutRecommender serves any of them unchanged. Training
+# records the chosen backend in model_info.json next to model.pkl.
+#
+# The estimator classes are imported inside the builders: serving only
+# needs load_model_info(), and unpickling model.pkl imports just the one
+# sklearn module the fitted estimator lives in.
+import json
+import os
+
+import numpy as np
+
+DEFAULT_BACKEND = "random_forest"
+WORKOUT_BACKEND = os.getenv("WORKOUT_BACKEND", DEFAULT_BACKEND)
+MODEL_INFO_FILE = "model_info.json"
+CATEGORICAL_FEATURES = ['Sex', 'Hypertension', 'Diabetes', 'Fitness Goal', 'Level']
+
+
+def _random_forest(feature_names):
+    from sklearn.ensemble import RandomForestClassifier
+
+    # The original model: 100 trees, depth 10
+    return RandomForestClassifier(
+        n_estimators=100,
+        max_depth=10,
+        min_samples_split=5,
+        min_samples_leaf=2,
+        random_state=42,
+        class_weight='balanced'
+    )
+
+
+def _hist_gradient_boosting(feature_names):
+    from sklearn.ensemble import HistGradientBoostingClassifier
+
+    # Label-encoded columns are treated as true categories, not ordinals
+    categorical = [name in CATEGORICAL_FEATURES for name in feature_names]
+    # early_stopping="auto" turns on above 10k rows, so compacting the
+    # training rows (dedup.py) would silently change the model; pin it off
+    return HistGradientBoostingClassifier(
+        max_iter=100,
+        learning_rate=0.1,
+        max_leaf_nodes=31,
+        early_stopping=False,
+        categorical_features=categorical if any(categorical) else None,
+        class_weight='balanced',
+        random_state=42
+    )
+
+
+def _logistic(feature_names):
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    return make_pipeline(
+        StandardScaler(),
+        LogisticRegression(max_iter=1000, class_weight='balanced')
+    )
+
+
+def _decision_tree(feature_names):
+    from sklearn.tree import DecisionTreeClassifier
+
+    # A single shallow tree reads as a short list of if/else rules
+    return DecisionTreeClassifier(
+        max_depth=6,
+        min_samples_leaf=5,
+        class_weight='balanced',
+        random_state=42
+    )
+
+
+WORKOUT_BACKENDS = {
+    "random_forest": _random_forest,
+    "hist_gradient_boosting": _hist_gradient_boosting,
+    "logistic": _logistic,
+    "decision_tree": _decision_tree,
+}
+
+
+def make_workout_estimator(backend, feature_names):
+    """Unfitted estimator for `backend` over the given feature columns"""
+    try:
+        builder = WORKOUT_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown workout backend '{backend}'. Choose from: {', '.join(WORKOUT_BACKENDS)}")
+    return builder(list(feature_names))
+
+
+def fit_workout_estimator(model, X, y, sample_weight=None):
+    """fit() with optional per-row counts (see dedup.py) for any backend.
+
+    sklearn derives 'balanced' class weights from the rows it is given, so
+    with counts they are computed from the weighted class totals instead,
+    which keeps a compacted fit close to fitting every copy.
+    """
+    from sklearn.pipeline import Pipeline
+
+    if sample_weight is None:
+        return model.fit(X, y)
+
+    final = model.steps[-1][1] if isinstance(model, Pipeline) else model
+    if getattr(final, "class_weight", None) == "balanced":
+        y = np.asarray(y)
+        classes = np.unique(y)
+        totals = np.array([sample_weight[y == c].sum() for c in classes])
+        final.set_params(class_weight=dict(zip(classes.tolist(), totals.sum() / (len(classes) * totals))))
+
+    if isinstance(model, Pipeline):
+        # Every step here (scaler, classifier) accepts sample_weight
+        return model.fit(X, y, **{f"{name}__sample_weight": sample_weight for name, _ in model.steps})
+    return model.fit(X, y, sample_weight=sample_weight)
+
+
+def save_model_info(model_dir, backend, feature_names, metrics=None):
+    """Write model_info.json declaring which backend model.pkl holds"""
+    info = {"backend": backend, "feature_names": list(feature_names), "metrics": metrics or {}}
+    with open(os.path.join(model_dir, MODEL_INFO_FILE), "w") as f:
+        json.dump(info, f, indent=2)
+    return info
+
+
+def load_model_info(model_dir):
+    """Backend declaration for the artifacts in `model_dir`.
+
+    Artifacts trained before backends existed have no model_info.json and
+    are random forests.
+    """
+    path = os.path.join(model_dir, MODEL_INFO_FILE)
+    if not os.path.exists(path):
+        return {"backend": DEFAULT_BACKEND}
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,82 @@
+# -----------------------------
+# bench_retrieval.py - Retrieval latency and prompt size with the knowledge index
+# -----------------------------
+# Needs the index from build_knowledge_index.py. Compares the system prompt
+# with the top-k retrieved snippets against stuffing the whole knowledge
+# base into it:
+#   python bench_retrieval.py
+#   python bench_retrieval.py --top-k 5 --show --output retrieval.json
+import argparse
+import json
+import statistics
+import time
+
+from benchmark_chat import QUESTIONS, percentile
+from context_window import estimate_tokens
+from prompts import build_system_prompt, format_knowledge_context
+from retrieval import DEFAULT_INDEX_DIR, DEFAULT_TOP_K, KnowledgeIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Knowledge retrieval benchmark")
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR)
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--show", action="store_true", help="print the snippets retrieved per question")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = KnowledgeIndex(args.index_dir)
+    load_ms = (time.perf_counter() - start) * 1000
+    print(f"✓ Loaded {len(index)} snippets in {load_ms:.2f} ms (memory-mapped)")
+
+    questions = [q for q in QUESTIONS if q not in ("tell me more", "continue")]
+    base_tokens = estimate_tokens(build_system_prompt("Male", 170, 70))
+    full_tokens = estimate_tokens(build_system_prompt("Male", 170, 70, "", format_knowledge_context(index.snippets)))
+
+    latencies_us, prompt_tokens, hits = [], [], []
+    for question in questions:
+        snippets = index.search(question, args.top_k)
+        for _ in range(args.repeats):
+            t0 = time.perf_counter()
+            index.search(question, args.top_k)
+            latencies_us.append((time.perf_counter() - t0) * 1e6)
+        prompt_tokens.append(estimate_tokens(
+            build_system_prompt("Male", 170, 70, "", format_knowledge_context(snippets))))
+        hits.append(len(snippets))
+        if args.show:
+            print(f"\n{question}")
+            for s in snippets:
+                print(f"   {s['score']:>7.3f}  {s['id']}")
+
+    retrieved_tokens = statistics.mean(prompt_tokens)
+    results = {
+        "snippets": len(index),
+        "top_k": args.top_k,
+        "index_load_ms": round(load_ms, 2),
+        "retrieval_us": {"p50": round(percentile(latencies_us, 50), 1),
+                         "p95": round(percentile(latencies_us, 95), 1)},
+        "avg_snippets_injected": round(statistics.mean(hits), 2),
+        "system_prompt_tokens": {
+            "no_knowledge": base_tokens,
+            "top_k": round(retrieved_tokens, 1),
+            "whole_knowledge_base": full_tokens,
+        },
+        "prompt_reduction_vs_whole_base": round(1 - retrieved_tokens / full_tokens, 4),
+    }
+
+    print(f"\nRetrieval p50 {results['retrieval_us']['p50']} µs, p95 {results['retrieval_us']['p95']} µs "
+          f"over {len(questions)} questions")
+    print(f"System prompt tokens: {base_tokens} bare, {retrieved_tokens:.0f} with top-{args.top_k}, "
+          f"{full_tokens} with the whole knowledge base "
+          f"({results['prompt_reduction_vs_whole_base']:.0%} smaller)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
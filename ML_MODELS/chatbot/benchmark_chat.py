@@ -0,0 +1,224 @@
+# -----------------------------
+# benchmark_chat.py - Headless multi-user latency benchmark for the chatbot
+# -----------------------------
+# Usage:
+#   python fake_llm_server.py --port 8800 &
+#   python benchmark_chat.py --base-url http://localhost:8800 --users 20 --turns 8
+#   python benchmark_chat.py --spawn-server --users 20 --turns 8 --full-history   # baseline
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from context_window import ContextWindow, estimate_message_tokens
+from llm_scheduler import RequestScheduler
+from prompts import build_system_prompt
+from response_cache import ResponseCache, bucket_profile
+
+MODEL_NAME = "llama-3.1-8b-instant"
+
+QUESTIONS = [
+    "How much protein do I need to build muscle?",
+    "What is a good beginner workout plan for fat loss?",
+    "How many rest days should I take per week?",
+    "Is it okay to do cardio every day?",
+    "What should I eat before a morning workout?",
+    "How can I improve my squat form?",
+    "What are good sources of fiber for a vegetarian diet?",
+    "How do I break through a weight loss plateau?",
+    "tell me more",
+    "continue",
+    "How much water should I drink when training?",
+    "What is a healthy rate of weight gain per month?",
+]
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(int(round(pct / 100.0 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[idx]
+
+
+def stream_completion(base_url, messages, max_tokens, api_key):
+    """POST a streaming chat completion; returns (text, ttft, usage)"""
+    body = json.dumps({"model": MODEL_NAME, "messages": messages,
+                       "max_tokens": max_tokens, "stream": True}).encode("utf-8")
+    request = urllib.request.Request(
+        f"{base_url.rstrip('/')}/openai/v1/chat/completions", data=body,
+        headers={"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"},
+    )
+    start = time.perf_counter()
+    ttft = None
+    parts, usage = [], None
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            for raw in response:
+                line = raw.decode("utf-8").strip()
+                if not line.startswith("data: "):
+                    continue
+                data = line[len("data: "):]
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                delta = chunk["choices"][0]["delta"].get("content")
+                if delta:
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                    parts.append(delta)
+                usage = (chunk.get("x_groq") or {}).get("usage") or chunk.get("usage") or usage
+    except urllib.error.HTTPError as e:
+        raise HTTPStatusError(e.code, f"HTTP {e.code}") from e
+    return "".join(parts), ttft, usage
+
+
+class SimulatedUser(threading.Thread):
+    def __init__(self, user_id, args, scheduler, cache, results):
+        super().__init__(daemon=True)
+        self.user_id = user_id
+        self.args = args
+        self.scheduler = scheduler
+        self.cache = cache
+        self.results = results
+        self.rng = random.Random(args.seed + user_id)
+
+    def run(self):
+        gender = self.rng.choice(["Male", "Female"])
+        height, weight = self.rng.randint(150, 195), self.rng.randint(50, 110)
+        system_prompt = build_system_prompt(gender, height, weight)
+        profile = bucket_profile(gender, height, weight)
+        window = ContextWindow(budget_tokens=self.args.budget_tokens)
+        history = []
+
+        for turn in range(self.args.turns):
+            question = self.rng.choice(QUESTIONS)
+            history.append({"role": "user", "content": question})
+            record = {"user": self.user_id, "turn": turn, "cache": "miss", "retries": 0, "error": None}
+            start = time.perf_counter()
+
+            cached = self.cache.get(question, profile) if self.cache else None
+            if cached is not None:
+                answer = cached
+                record.update(cache="hit", ttft=0.0, prompt_tokens=0, completion_tokens=0)
+            else:
+                if self.args.full_history:
+                    messages = [{"role": "system", "content": system_prompt}] + list(history)
+                else:
+                    messages, _ = window.build(system_prompt, history)
+                record["prompt_tokens_est"] = sum(estimate_message_tokens(m) for m in messages)
+                try:
+                    (answer, ttft, usage), retries = self.scheduler.run(
+                        lambda: stream_completion(self.args.base_url, messages,
+                                                  self.args.max_tokens, self.args.api_key))
+                    record.update(ttft=ttft or 0.0, retries=retries,
+                                  prompt_tokens=(usage or {}).get("prompt_tokens", record["prompt_tokens_est"]),
+                                  completion_tokens=(usage or {}).get("completion_tokens", 0))
+                    if self.cache:
+                        self.cache.put(question, profile, answer)
+                except Exception as e:
+                    answer = f"⚠️ API Error: {e}"
+                    record["error"] = str(e)
+
+            record["latency"] = time.perf_counter() - start
+            history.append({"role": "assistant", "content": answer})
+            self.results.append(record)
+
+            if self.args.think_time:
+                time.sleep(self.rng.uniform(0, self.args.think_time))
+
+
+def summarize(results, wall_time, turns):
+    ok = [r for r in results if not r["error"]]
+    llm = [r for r in ok if r["cache"] == "miss"]
+    ttfts = [r["ttft"] for r in llm]
+    latencies = [r["latency"] for r in ok]
+    completion_tokens = sum(r.get("completion_tokens", 0) for r in ok)
+
+    growth = []
+    for turn in range(turns):
+        sizes = [r["prompt_tokens"] for r in llm if r["turn"] == turn]
+        if sizes:
+            growth.append({"turn": turn + 1, "mean_prompt_tokens": round(statistics.mean(sizes), 1)})
+
+    return {
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "cache_hits": len(ok) - len(llm),
+        "retries": sum(r["retries"] for r in results),
+        "ttft_ms": {"p50": round(percentile(ttfts, 50) * 1000, 1), "p95": round(percentile(ttfts, 95) * 1000, 1)},
+        "latency_ms": {"p50": round(percentile(latencies, 50) * 1000, 1),
+                       "p95": round(percentile(latencies, 95) * 1000, 1),
+                       "max": round(max(latencies, default=0) * 1000, 1)},
+        "throughput": {"turns_per_s": round(len(ok) / wall_time, 2),
+                       "completion_tokens_per_s": round(completion_tokens / wall_time, 1)},
+        "prompt_tokens_by_turn": growth,
+        "wall_time_s": round(wall_time, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent chatbot users against an LLM endpoint")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8800")
+    parser.add_argument("--api-key", default="fake")
+    parser.add_argument("--spawn-server", action="store_true", help="start fake_llm_server in-process")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--max-tokens", type=int, default=1024)
+    parser.add_argument("--budget-tokens", type=int, default=3000)
+    parser.add_argument("--full-history", action="store_true", help="send the whole history (old behaviour)")
+    parser.add_argument("--cache", action="store_true", help="enable the shared response cache")
+    parser.add_argument("--concurrency", type=int, default=4, help="scheduler concurrency limit")
+    parser.add_argument("--think-time", type=float, default=0.0, help="max seconds between turns")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn_server:
+        from fake_llm_server import make_server
+        server = make_server(port=0)
+        args.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    scheduler = RequestScheduler(max_concurrency=args.concurrency)
+    cache = ResponseCache(near_duplicates=True) if args.cache else None
+    results = []
+
+    print(f"🏃 {args.users} users x {args.turns} turns against {args.base_url}")
+    start = time.perf_counter()
+    users = [SimulatedUser(i, args, scheduler, cache, results) for i in range(args.users)]
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    wall_time = time.perf_counter() - start
+
+    report = summarize(results, wall_time, args.turns)
+    report["config"] = {k: v for k, v in vars(args).items() if k != "api_key"}
+    report["scheduler"] = scheduler.report()
+    if cache:
+        report["cache"] = cache.report()
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Saved report to {args.output}")
+
+    if server:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
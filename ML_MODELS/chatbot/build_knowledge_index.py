@@ -0,0 +1,78 @@
+# -----------------------------
+# build_knowledge_index.py - Offline build of the chatbot retrieval index
+# -----------------------------
+# Collects the knowledge base into short snippets and writes the BM25
+# arrays loaded (memory-mapped) by main_app.py:
+#   - meal plan and health tag explanations (carefolio_ml.meal_planner)
+#   - workout recommendation templates (carefolio_ml.workout)
+#   - curated notes: every "## " section of knowledge/*.md
+# Re-run after changing any of them:
+#   python build_knowledge_index.py
+import argparse
+import glob
+import os
+import sys
+
+from retrieval import DEFAULT_INDEX_DIR, build_index
+
+# Shared inference library lives in ML_MODELS/carefolio_ml
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from carefolio_ml.meal_planner import health_tag_explanations, meal_plan_explanations
+from carefolio_ml.workout import generate_recommendations
+
+KNOWLEDGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge")
+
+# One goal string per branch of generate_recommendations
+WORKOUT_GOALS = ("Weight Loss", "Weight Gain", "Muscle Building", "Endurance", "Maintain")
+BMI_LEVELS = ("Underweight", "Normal", "Overweight", "Obese")
+
+
+def model_snippets():
+    snippets = []
+    for col, text in meal_plan_explanations.items():
+        name = col.replace("meal_plan_type_", "")
+        snippets.append({"id": f"meal_plan:{name}", "source": "meal_plan", "title": f"{name} meal plan", "text": text})
+    for col, text in health_tag_explanations.items():
+        name = col.replace("health_tag_", "")
+        snippets.append({"id": f"health_tag:{name}", "source": "health_tag", "title": name, "text": text})
+
+    for goal in WORKOUT_GOALS:
+        rec = generate_recommendations("", goal, "Normal", "")
+        text = (f"Exercises: {rec['Exercises']}. Equipment: {rec['Equipment']}. "
+                f"Diet: {rec['Diet']}. Schedule: {rec['Schedule']}.")
+        snippets.append({"id": f"workout:{goal}", "source": "workout", "title": f"{goal} workout plan", "text": text})
+    for level in BMI_LEVELS:
+        rec = generate_recommendations("", "Maintain", level, "__BMI__")
+        text = rec["Recommendation"].replace("With BMI __BMI__", f"With a {level.lower()} BMI")
+        snippets.append({"id": f"bmi:{level}", "source": "workout", "title": f"{level} BMI advice", "text": text})
+    return snippets
+
+
+def curated_snippets(knowledge_dir=KNOWLEDGE_DIR):
+    """One snippet per '## ' section of every markdown file"""
+    snippets = []
+    for path in sorted(glob.glob(os.path.join(knowledge_dir, "*.md"))):
+        doc = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding="utf-8") as f:
+            sections = f.read().split("\n## ")[1:]
+        for section in sections:
+            title, _, body = section.partition("\n")
+            snippets.append({"id": f"{doc}:{title.strip()}", "source": doc,
+                             "title": title.strip(), "text": " ".join(body.split())})
+    return snippets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the chatbot knowledge index")
+    parser.add_argument("--knowledge-dir", default=KNOWLEDGE_DIR)
+    parser.add_argument("--output", default=DEFAULT_INDEX_DIR, help="index directory")
+    args = parser.parse_args()
+
+    snippets = model_snippets() + curated_snippets(args.knowledge_dir)
+    stats = build_index(snippets, args.output)
+    print(f"✅ Indexed {stats['documents']} snippets ({stats['terms']} terms, "
+          f"{stats['postings']} postings) into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
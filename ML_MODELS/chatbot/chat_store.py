@@ -0,0 +1,124 @@
+# -----------------------------
+# chat_store.py - SQLite-backed conversation store
+# -----------------------------
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chat_history.db")
+DEFAULT_PAGE_SIZE = 20
+
+# Roles are stored as small integers to keep rows compact
+ROLE_CODES = {"user": 0, "assistant": 1, "system": 2}
+ROLE_NAMES = {code: role for role, code in ROLE_CODES.items()}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    turn       INTEGER NOT NULL,
+    role       INTEGER NOT NULL,
+    content    TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (session_id, turn)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS summaries (
+    session_id      TEXT PRIMARY KEY,
+    summarized_upto INTEGER NOT NULL,
+    summary         TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _to_message(row):
+    return {"turn": row[0], "role": ROLE_NAMES[row[1]], "content": row[2]}
+
+
+class ChatStore:
+    """Conversation history keyed by (session_id, turn).
+
+    `turn` is the 0-based index of a message within its session, so it
+    lines up with the absolute indices used by ContextWindow.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("CHAT_DB_PATH", DEFAULT_DB_PATH)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # One connection per thread; Streamlit runs every session in its own thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # -----------------------------
+    # Messages
+    # -----------------------------
+    def count(self, session_id):
+        row = self._connect().execute(
+            "SELECT COALESCE(MAX(turn) + 1, 0) FROM messages WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0]
+
+    def append(self, session_id, role, content):
+        """Append one message and return its turn index"""
+        conn = self._connect()
+        with conn:
+            turn = self.count(session_id)
+            conn.execute(
+                "INSERT INTO messages (session_id, turn, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                (session_id, turn, ROLE_CODES[role], content, time.time()),
+            )
+        return turn
+
+    def page(self, session_id, limit=DEFAULT_PAGE_SIZE, before_turn=None):
+        """Up to `limit` messages before `before_turn` (default: the latest), oldest first"""
+        if before_turn is None:
+            before_turn = self.count(session_id)
+        rows = self._connect().execute(
+            "SELECT turn, role, content FROM messages WHERE session_id = ? AND turn < ? "
+            "ORDER BY turn DESC LIMIT ?",
+            (session_id, before_turn, limit),
+        ).fetchall()
+        return [_to_message(row) for row in reversed(rows)]
+
+    def since(self, session_id, start_turn):
+        """All messages from `start_turn` onwards, oldest first"""
+        rows = self._connect().execute(
+            "SELECT turn, role, content FROM messages WHERE session_id = ? AND turn >= ? ORDER BY turn",
+            (session_id, start_turn),
+        ).fetchall()
+        return [_to_message(row) for row in rows]
+
+    def clear(self, session_id):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM summaries WHERE session_id = ?", (session_id,))
+
+    # -----------------------------
+    # Rolling summary (see context_window.py)
+    # -----------------------------
+    def get_summary(self, session_id):
+        """(summary, summarized_upto) for the session, ("", 0) if none"""
+        row = self._connect().execute(
+            "SELECT summary, summarized_upto FROM summaries WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row if row else ("", 0)
+
+    def set_summary(self, session_id, summary, summarized_upto):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO summaries (session_id, summarized_upto, summary) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET summarized_upto = excluded.summarized_upto, "
+                "summary = excluded.summary",
+                (session_id, summarized_upto, summary),
+            )
@@ -0,0 +1,141 @@
+# -----------------------------
+# context_window.py - Token-budgeted chat context
+# -----------------------------
+import math
+
+# Rough heuristic used by most OpenAI-style tokenizers for English text.
+CHARS_PER_TOKEN = 4
+# Role markers / separators the chat template adds around every message.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+DEFAULT_BUDGET_TOKENS = 3000
+DEFAULT_SUMMARY_TOKENS = 300
+
+SUMMARY_HEADER = "\n\nSummary of the earlier conversation:\n"
+
+
+def estimate_tokens(text):
+    """Cheap token estimate for a piece of text (no tokenizer dependency)"""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def estimate_message_tokens(message):
+    """Token estimate for one chat message including template overhead"""
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _first_sentence(text, max_chars=160):
+    text = " ".join(text.split())
+    for sep in (". ", "? ", "! ", "\n"):
+        idx = text.find(sep)
+        if 0 < idx < max_chars:
+            return text[:idx + 1]
+    return text[:max_chars] + ("…" if len(text) > max_chars else "")
+
+
+def trim_summary(summary, max_tokens=DEFAULT_SUMMARY_TOKENS):
+    """Drop the oldest lines (then trailing characters) until the summary fits max_tokens"""
+    lines = summary.splitlines()
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    summary = "\n".join(lines)
+    if estimate_tokens(summary) > max_tokens:
+        summary = summary[:max_tokens * CHARS_PER_TOKEN - 1].rstrip() + "…"
+    return summary
+
+
+def extractive_summary(previous_summary, new_messages, max_tokens=DEFAULT_SUMMARY_TOKENS):
+    """Fold new messages into the summary without calling the LLM.
+
+    Keeps one short line per message and drops the oldest lines once the
+    summary exceeds its token budget.
+    """
+    lines = previous_summary.splitlines() if previous_summary else []
+    for msg in new_messages:
+        speaker = "User" if msg["role"] == "user" else "Assistant"
+        lines.append(f"- {speaker}: {_first_sentence(msg['content'])}")
+    return trim_summary("\n".join(lines), max_tokens)
+
+
+class ContextWindow:
+    """Sliding window of recent turns plus a rolling summary of older ones.
+
+    The summary is only refreshed with the turns that fell out of the window
+    since the last refresh, so every fold costs the same regardless of how
+    long the conversation already is.
+    """
+
+    def __init__(self, budget_tokens=DEFAULT_BUDGET_TOKENS,
+                 summary_tokens=DEFAULT_SUMMARY_TOKENS, summarize_fn=None):
+        self.budget_tokens = budget_tokens
+        self.summary_tokens = summary_tokens
+        self.summarize_fn = summarize_fn or extractive_summary
+        self.reset()
+
+    def reset(self):
+        self.summary = ""
+        self.summarized_upto = 0  # history index of the first unsummarized message
+
+    def _window_start(self, history, available, offset=0):
+        """Absolute index of the oldest message that still fits in the budget"""
+        used = 0
+        end = offset + len(history)
+        start = end
+        for i in range(end - 1, max(self.summarized_upto, offset) - 1, -1):
+            cost = estimate_message_tokens(history[i - offset])
+            # Always keep the latest message even if it alone exceeds the budget
+            if used + cost > available and i < end - 1:
+                break
+            used += cost
+            start = i
+        return start
+
+    def _fold(self, messages):
+        try:
+            # Custom summarizers (e.g. an LLM) may overshoot the reserve that
+            # build() sets aside for the summary, so hold them to it here
+            self.summary = trim_summary(self.summarize_fn(self.summary, messages, self.summary_tokens),
+                                        self.summary_tokens)
+        except Exception as e:
+            print(f"Warning: summarizer failed, using extractive summary: {e}")
+            self.summary = extractive_summary(self.summary, messages, self.summary_tokens)
+
+    def build(self, system_prompt, history, offset=0):
+        """Return (messages, stats) for the next LLM call.
+
+        `history` is the list of {"role", "content"} dicts ending with the
+        latest user message. It may be just the tail of the conversation
+        starting at absolute message index `offset`, as long as it covers
+        every message that is not summarized yet (offset <= summarized_upto).
+        """
+        if offset > self.summarized_upto:
+            raise ValueError("history must include every unsummarized message")
+
+        system_tokens = estimate_tokens(system_prompt) + MESSAGE_OVERHEAD_TOKENS
+        summary_reserve = self.summary_tokens + estimate_tokens(SUMMARY_HEADER)
+        available = max(self.budget_tokens - system_tokens - summary_reserve, 0)
+
+        start = self._window_start(history, available, offset)
+        evicted = history[self.summarized_upto - offset:start - offset]
+        if evicted:
+            self._fold(evicted)
+            self.summarized_upto = start
+
+        system_content = system_prompt
+        if self.summary:
+            system_content += SUMMARY_HEADER + self.summary
+
+        messages = [{"role": "system", "content": system_content}]
+        messages.extend({"role": m["role"], "content": m["content"]} for m in history[start - offset:])
+
+        stats = {
+            "system_tokens": system_tokens,
+            "summary_tokens": estimate_tokens(self.summary),
+            "window_messages": offset + len(history) - start,
+            "summarized_messages": self.summarized_upto,
+            "folded_messages": len(evicted),
+            "prompt_tokens": sum(estimate_message_tokens(m) for m in messages),
+        }
+        return messages, stats
@@ -0,0 +1,200 @@
+# -----------------------------
+# fake_llm_server.py - Local stand-in for the Groq chat-completions API
+# -----------------------------
+# Usage:
+#   python fake_llm_server.py --port 8800 --ttft-ms 300 --tokens-per-second 80 --error-rate 0.05
+#   GROQ_API_KEY=fake GROQ_BASE_URL=http://localhost:8800 streamlit run main_app.py
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from context_window import estimate_message_tokens
+
+COMPLETION_PATHS = ("/openai/v1/chat/completions", "/v1/chat/completions")
+
+FILLER_WORDS = (
+    "Aim for consistent training with progressive overload, eat enough protein, "
+    "sleep seven to nine hours, stay hydrated and track your progress weekly. "
+).split()
+
+
+class FakeLLMConfig:
+    def __init__(self, ttft_ms=300.0, tokens_per_second=80.0, completion_tokens=200,
+                 error_rate=0.0, error_status=429, retry_after=1):
+        self.ttft_ms = ttft_ms
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "streamed": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def count(self, **deltas):
+        with self.lock:
+            for key, value in deltas.items():
+                self.stats[key] += value
+
+
+def _fake_tokens(n):
+    return [FILLER_WORDS[i % len(FILLER_WORDS)] + " " for i in range(n)]
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = FakeLLMConfig()
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output readable
+
+    # -----------------------------
+    # Helpers
+    # -----------------------------
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_error(self):
+        status = self.config.error_status
+        headers = {"Retry-After": str(self.config.retry_after)} if status == 429 else {}
+        self.config.count(errors=1)
+        self._send_json(status, {"error": {
+            "message": f"Injected error {status}",
+            "type": "rate_limit_exceeded" if status == 429 else "internal_server_error",
+        }}, headers)
+
+    # -----------------------------
+    # Routes
+    # -----------------------------
+    def do_GET(self):
+        if self.path in ("/", "/health"):
+            with self.config.lock:
+                stats = dict(self.config.stats)
+            self._send_json(200, {"status": "ok", "stats": stats})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        if self.path not in COMPLETION_PATHS:
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+            messages = body["messages"]
+        except (ValueError, KeyError):
+            self._send_json(400, {"error": {"message": "Invalid request body"}})
+            return
+
+        self.config.count(requests=1)
+        if random.random() < self.config.error_rate:
+            self._send_error()
+            return
+
+        prompt_tokens = sum(estimate_message_tokens(m) for m in messages)
+        n_tokens = min(int(body.get("max_tokens") or self.config.completion_tokens),
+                       self.config.completion_tokens)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": n_tokens,
+                 "total_tokens": prompt_tokens + n_tokens}
+        self.config.count(prompt_tokens=prompt_tokens, completion_tokens=n_tokens)
+
+        time.sleep(self.config.ttft_ms / 1000.0)
+        tokens = _fake_tokens(n_tokens)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        model = body.get("model", "fake-model")
+
+        if body.get("stream"):
+            self._stream(completion_id, model, tokens, usage)
+        else:
+            # Non-streaming calls still take as long as generating every token
+            time.sleep(max(n_tokens - 1, 0) / self.config.tokens_per_second)
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "".join(tokens).strip()}}],
+                "usage": usage,
+            })
+
+    def _stream(self, completion_id, model, tokens, usage):
+        self.config.count(streamed=1)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(delta, finish_reason=None, extra=None):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            chunk.update(extra or {})
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+        interval = 1.0 / self.config.tokens_per_second
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(interval)
+            delta = {"content": token}
+            if i == 0:
+                delta["role"] = "assistant"
+            event(delta)
+
+        # Groq reports usage on the last chunk under x_groq; OpenAI under usage
+        event({}, "stop", {"usage": usage, "x_groq": {"usage": usage}})
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+
+def make_server(host="127.0.0.1", port=8800, config=None):
+    """Build (but don't start) a server; handy for in-process benchmarks"""
+    handler = type("ConfiguredFakeLLMHandler", (FakeLLMHandler,), {"config": config or FakeLLMConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Groq/OpenAI chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=429, help="status code of injected errors")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    args = parser.parse_args()
+
+    config = FakeLLMConfig(args.ttft_ms, args.tokens_per_second, args.completion_tokens,
+                           args.error_rate, args.error_status, args.retry_after)
+    server = make_server(args.host, args.port, config)
+    print(f"🤖 Fake LLM server on http://{args.host}:{args.port} "
+          f"(TTFT {args.ttft_ms:.0f} ms, {args.tokens_per_second:.0f} tok/s, errors {args.error_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
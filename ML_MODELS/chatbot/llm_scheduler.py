@@ -0,0 +1,167 @@
+# -----------------------------
+# llm_scheduler.py - Shared, rate-limit-aware LLM request scheduler
+# -----------------------------
+import random
+import threading
+import time
+from collections import deque
+
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BASE_DELAY = 0.5   # seconds
+DEFAULT_MAX_DELAY = 20.0   # seconds
+WAIT_POLL_SECONDS = 0.25
+
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+class SchedulerBusyError(Exception):
+    """Raised when a request still fails after all retries"""
+
+
+def _status_code(error):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    return status
+
+
+def is_retryable(error):
+    """429/5xx responses and connection problems are worth retrying"""
+    status = _status_code(error)
+    if status is None:
+        # No HTTP status: connection reset, timeout, DNS ...
+        return type(error).__name__ in ("APIConnectionError", "APITimeoutError",
+                                        "ConnectionError", "TimeoutError")
+    return status in RETRYABLE_STATUS or status >= 500
+
+
+def _retry_after(error):
+    """Seconds requested by the server via Retry-After, if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    """FIFO scheduler with bounded concurrency and jittered retries.
+
+    All sessions of the app share one instance, so `max_concurrency` is the
+    number of LLM calls in flight for the whole server. Waiting callers are
+    served in arrival order and can report their real queue position.
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, max_retries=DEFAULT_MAX_RETRIES,
+                 base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._cond = threading.Condition()
+        self._waiting = deque()
+        self._active = 0
+        self._next_ticket = 0
+        self.stats = {"completed": 0, "failed": 0, "retries": 0, "max_queue": 0}
+
+    # -----------------------------
+    # Queue
+    # -----------------------------
+    def queue_position(self, ticket):
+        """1-based position among waiting requests, 0 once running"""
+        with self._cond:
+            try:
+                return self._waiting.index(ticket) + 1
+            except ValueError:
+                return 0
+
+    def _acquire(self, on_wait):
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self._waiting.append(ticket)
+            self.stats["max_queue"] = max(self.stats["max_queue"], len(self._waiting))
+
+        # on_wait runs outside the lock, and a caller that leaves the queue
+        # for any reason (Streamlit's rerun/stop exceptions are
+        # BaseExceptions) gives up its ticket so the line keeps moving
+        try:
+            last_position = None
+            while True:
+                with self._cond:
+                    if self._waiting[0] == ticket and self._active < self.max_concurrency:
+                        self._waiting.popleft()
+                        self._active += 1
+                        # The next caller in line may also fit under the limit
+                        self._cond.notify_all()
+                        return
+                    position = self._waiting.index(ticket) + 1
+                    if position == last_position:
+                        self._cond.wait(WAIT_POLL_SECONDS)
+                        continue
+                last_position = position
+                if on_wait:
+                    on_wait(position)
+        except BaseException:
+            with self._cond:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                self._cond.notify_all()
+            raise
+
+    def _release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    # -----------------------------
+    # Execution
+    # -----------------------------
+    def _backoff(self, attempt, error):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def run(self, fn, on_wait=None, on_retry=None):
+        """Call `fn()` once a slot is free, retrying 429/5xx with jittered backoff.
+
+        `on_wait(position)` is called whenever the caller's queue position
+        changes and `on_retry(attempt, delay)` before every retry sleep.
+        Returns `(result, retries)`.
+        """
+        self._acquire(on_wait)
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    result = fn()
+                    with self._cond:
+                        self.stats["completed"] += 1
+                    return result, attempt
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable(e):
+                        with self._cond:
+                            self.stats["failed"] += 1
+                        if is_retryable(e):
+                            raise SchedulerBusyError(str(e)) from e
+                        raise
+                    delay = self._backoff(attempt, e)
+                    with self._cond:
+                        self.stats["retries"] += 1
+                    if on_retry:
+                        on_retry(attempt + 1, delay)
+                    time.sleep(delay)
+        finally:
+            self._release()
+
+    def report(self):
+        with self._cond:
+            stats = dict(self.stats)
+            stats["active"] = self._active
+            stats["waiting"] = len(self._waiting)
+        return stats
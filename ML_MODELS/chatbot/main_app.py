@@ -1,19 +1,156 @@
 import streamlit as st
 from groq import Groq
+import httpx
 import os
+import sys
+import time
+import uuid
 from dotenv import load_dotenv
 
+from chat_store import ChatStore, DEFAULT_PAGE_SIZE
+from context_window import (
+    ContextWindow,
+    DEFAULT_BUDGET_TOKENS,
+    DEFAULT_SUMMARY_TOKENS,
+    estimate_tokens,
+    extractive_summary,
+)
+from llm_scheduler import (
+    RequestScheduler,
+    SchedulerBusyError,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_RETRIES,
+)
+from prompts import (
+    build_summary_request,
+    build_system_prompt,
+    format_knowledge_context,
+    format_plan_context,
+)
+from response_cache import ResponseCache, bucket_profile
+from retrieval import DEFAULT_TOP_K, load_knowledge_index
+from telemetry import TelemetryStore, read_usage, stream_usage
+
+# Shared inference library lives in ML_MODELS/carefolio_ml
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from carefolio_ml import (
+    get_meal_planner,
+    get_workout_recommender,
+    survey_to_meal_features,
+    survey_to_workout_input,
+)
+
 # ==============================
 # 🌟 INITIAL SETUP
 # ==============================
-load_dotenv()
-api_key = os.getenv("GROQ_API_KEY")
+MODEL_NAME = "llama-3.1-8b-instant"  # ✅ Updated working model
+
+CONTEXT_BUDGET_TOKENS = int(os.getenv("CHAT_CONTEXT_BUDGET_TOKENS", DEFAULT_BUDGET_TOKENS))
+SUMMARY_BUDGET_TOKENS = int(os.getenv("CHAT_SUMMARY_BUDGET_TOKENS", DEFAULT_SUMMARY_TOKENS))
+PAGE_SIZE = int(os.getenv("CHAT_PAGE_SIZE", DEFAULT_PAGE_SIZE))
+MAX_PROMPT_STATS = 50
+RETRIEVAL_TOP_K = int(os.getenv("CHAT_RETRIEVAL_TOP_K", DEFAULT_TOP_K))
+
 
-if not api_key:
+@st.cache_resource(show_spinner=False)
+def get_llm_client():
+    """Groq client (and its HTTP connection pool) shared across reruns and sessions"""
+    load_dotenv()
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        return None
+
+    max_connections = int(os.getenv("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_connections=max_connections,
+                            max_keepalive_connections=max_connections),
+        timeout=httpx.Timeout(60.0, connect=5.0),
+    )
+    # Retries are handled by the shared scheduler
+    return Groq(api_key=api_key, base_url=os.getenv("GROQ_BASE_URL") or None,
+                http_client=http_client, max_retries=0)
+
+
+@st.cache_resource(show_spinner=False)
+def get_scheduler():
+    """One request queue for every session of this Streamlit server"""
+    return RequestScheduler(
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache():
+    """One answer cache shared by every session of this Streamlit server"""
+    return ResponseCache(
+        max_entries=int(os.getenv("CHAT_CACHE_MAX_ENTRIES", 1024)),
+        ttl_seconds=int(os.getenv("CHAT_CACHE_TTL_SECONDS", 6 * 60 * 60)),
+        near_duplicates=os.getenv("CHAT_CACHE_NEAR_DUPLICATES", "0") == "1",
+    )
+
+
+client = get_llm_client()
+if client is None:
     st.error("❌ Missing GROQ_API_KEY in .env or environment variables.")
     st.stop()
 
-client = Groq(api_key=api_key)
+scheduler = get_scheduler()
+response_cache = get_response_cache()
+
+
+@st.cache_resource(show_spinner=False)
+def get_chat_store():
+    """SQLite conversation store shared by every session"""
+    return ChatStore()
+
+
+chat_store = get_chat_store()
+
+
+@st.cache_resource(show_spinner=False)
+def get_knowledge_index():
+    """Memory-mapped knowledge index shared by every session (None if not built)"""
+    return load_knowledge_index()
+
+
+knowledge_index = get_knowledge_index() if RETRIEVAL_TOP_K > 0 else None
+
+
+@st.cache_resource(show_spinner=False)
+def get_telemetry():
+    """Append-only per-turn telemetry shared by every session"""
+    return TelemetryStore()
+
+
+telemetry = get_telemetry()
+
+
+@st.cache_data(show_spinner=False, max_entries=1024)
+def get_plan_context(survey_items):
+    """Run the meal and workout models in-process and summarise the plan"""
+    survey = dict(survey_items)
+    meal_plan = get_meal_planner().predict([survey_to_meal_features(survey)])[0]
+    workout_plan = get_workout_recommender().recommend([survey_to_workout_input(survey)])[0]
+    return format_plan_context(meal_plan, workout_plan)
+
+
+def summarize_with_llm(previous_summary, new_messages, max_tokens):
+    """Fold turns that left the context window into the rolling summary"""
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in new_messages)
+    start = time.perf_counter()
+    response, retries = scheduler.run(lambda: client.chat.completions.create(
+        messages=build_summary_request(previous_summary, transcript),
+        model=MODEL_NAME,
+        max_tokens=max_tokens,
+    ))
+    prompt_tokens, completion_tokens = read_usage(response.usage) or (0, 0)
+    telemetry.record(dict(kind="summary", model=MODEL_NAME, status="ok", cache="off", retries=retries,
+                          prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                          latency_ms=round((time.perf_counter() - start) * 1000, 1)))
+    summary = response.choices[0].message.content
+    return summary.strip() if summary else extractive_summary(previous_summary, new_messages, max_tokens)
+
 
 st.set_page_config(
     page_title="💪 Fitness Chatbot (Groq LLaMA)",
@@ -24,8 +161,28 @@ st.set_page_config(
 # ==============================
 # 💬 SESSION STATE
 # ==============================
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
+# Only ids, counters and the rolling summary live in session memory;
+# the conversation itself is read from the chat store on demand.
+if "session_id" not in st.session_state:
+    # Keep the id in the URL so reloading the page resumes the conversation
+    st.session_state.session_id = st.query_params.get("sid") or uuid.uuid4().hex
+    st.query_params["sid"] = st.session_state.session_id
+session_id = st.session_state.session_id
+
+if "context_window" not in st.session_state:
+    st.session_state.context_window = ContextWindow(
+        budget_tokens=CONTEXT_BUDGET_TOKENS,
+        summary_tokens=SUMMARY_BUDGET_TOKENS,
+        summarize_fn=summarize_with_llm,
+    )
+    window = st.session_state.context_window
+    window.summary, window.summarized_upto = chat_store.get_summary(session_id)
+
+if "visible_messages" not in st.session_state:
+    st.session_state.visible_messages = PAGE_SIZE
+
+if "prompt_stats" not in st.session_state:
+    st.session_state.prompt_stats = []
 
 # ==============================
 # 🧍 SIDEBAR (USER PROFILE)
@@ -36,10 +193,33 @@ gender = st.sidebar.radio("Gender:", ["Male", "Female"])
 user_height = st.sidebar.slider("Height (cm):", 100, 250, 170)
 user_weight = st.sidebar.slider("Weight (kg):", 30, 200, 70)
 
+st.sidebar.markdown("---")
+use_plan = st.sidebar.checkbox("📋 Ground answers in my plan")
+plan_context = ""
+if use_plan:
+    survey = {
+        "gender": gender,
+        "height_cm": user_height,
+        "weight_kg": user_weight,
+        "age": st.sidebar.number_input("Age:", 10, 100, 30),
+        "fitness_goal": st.sidebar.selectbox("Goal:", ["weight_loss", "weight_gain", "maintain"]),
+        "activity_level": st.sidebar.selectbox("Activity level:", ["sedentary", "moderate", "active"], index=1),
+        "diet_type": st.sidebar.selectbox("Diet:", ["non-veg", "vegetarian", "vegan"]),
+        "has_diabetes": st.sidebar.checkbox("Diabetes"),
+        "has_hypertension": st.sidebar.checkbox("Hypertension"),
+    }
+    try:
+        plan_context = get_plan_context(tuple(sorted(survey.items())))
+    except Exception as e:
+        st.sidebar.warning(f"⚠️ Could not generate your plan: {e}")
+
 st.sidebar.markdown("---")
 if st.sidebar.button("🧹 Clear Chat History"):
-    st.session_state.chat_history = []
-    st.experimental_rerun()
+    chat_store.clear(session_id)
+    st.session_state.context_window.reset()
+    st.session_state.prompt_stats = []
+    st.session_state.visible_messages = PAGE_SIZE
+    st.rerun()
 
 # ==============================
 # 💬 MAIN CHAT UI
@@ -47,8 +227,13 @@ if st.sidebar.button("🧹 Clear Chat History"):
 st.title("💬 Carefolio Chatbot ")
 st.caption("Ask me about workouts, nutrition, fat loss, muscle gain, or general health advice!")
 
-# Display past conversation
-for message in st.session_state.chat_history:
+# Display the most recent page of the conversation; older pages on demand
+total_messages = chat_store.count(session_id)
+if total_messages > st.session_state.visible_messages:
+    if st.button(f"⬆️ Load earlier messages ({total_messages - st.session_state.visible_messages} more)"):
+        st.session_state.visible_messages += PAGE_SIZE
+
+for message in chat_store.page(session_id, limit=st.session_state.visible_messages):
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
 
@@ -59,47 +244,155 @@ user_query = st.chat_input("Type your fitness question...")
 # ⚙️ CHAT LOGIC WITH CONTEXT MEMORY
 # ==============================
 if user_query:
+    turn_start = time.perf_counter()
+    turn_event = {"kind": "chat", "model": MODEL_NAME, "session": session_id[:8], "retries": 0,
+                  "prompt_tokens": 0, "completion_tokens": 0}
+
     # Add user's message to history
-    st.session_state.chat_history.append({"role": "user", "content": user_query})
-
-    # Construct full conversation context
-    messages = [
-        {"role": "system", "content": f"""
-        You are a professional fitness and nutrition expert.
-        Stay in character and only answer questions related to:
-        workouts, exercise routines, weight management, nutrition, diet, health, or body composition.
-
-        - Always be encouraging, clear, and easy to understand.
-        - Use user data (gender: {gender}, height: {user_height} cm, weight: {user_weight} kg) to personalize advice.
-        - If the user says 'yes', 'continue', or 'tell me more', continue naturally from your last answer.
-        - If the question is NOT fitness-related, reply with:
-          "🚫 I can only answer fitness-related questions. Please ask about exercise, health, or nutrition."
-        """}
-    ]
-
-    # Add previous messages for context
-    for msg in st.session_state.chat_history[:-1]:  # everything before the latest user input
-        messages.append({"role": msg["role"], "content": msg["content"]})
-
-    # Add latest user message
-    messages.append({"role": "user", "content": user_query})
-
-    # Generate the response
-    try:
+    chat_store.append(session_id, "user", user_query)
+    with st.chat_message("user"):
+        st.markdown(user_query)
+
+    # Only the few knowledge snippets relevant to this question go into the prompt
+    knowledge_context, retrieval_ms = "", 0.0
+    if knowledge_index is not None:
+        start = time.perf_counter()
+        knowledge_context = format_knowledge_context(knowledge_index.search(user_query, RETRIEVAL_TOP_K))
+        retrieval_ms = (time.perf_counter() - start) * 1000
+
+    system_prompt = build_system_prompt(gender, user_height, user_weight, plan_context, knowledge_context)
+
+    profile_key = bucket_profile(gender, user_height, user_weight)
+    if plan_context:
+        # Plan-grounded answers are only shared with users on the same plan
+        profile_key += "|" + str(hash(plan_context))
+    cached_answer = response_cache.get(user_query, profile_key)
+    turn_event.update(retrieval_ms=round(retrieval_ms, 3), knowledge_tokens=estimate_tokens(knowledge_context),
+                      plan_grounded=bool(plan_context))
+
+    if cached_answer is not None:
         with st.chat_message("assistant"):
-            with st.spinner("Thinking... 💭"):
-                response = client.chat.completions.create(
-                    messages=messages,
-                    model="llama-3.1-8b-instant",  # ✅ Updated working model
-                    max_tokens=1024,
-                )
-                answer = response.choices[0].message.content
-                st.markdown(answer)
-
-        # Save assistant response
-        st.session_state.chat_history.append({"role": "assistant", "content": answer})
+            st.markdown(cached_answer)
+            st.caption("⚡ Answered from cache")
+        chat_store.append(session_id, "assistant", cached_answer)
+        latency_ms = round((time.perf_counter() - turn_start) * 1000, 1)
+        telemetry.record(dict(turn_event, status="ok", cache="hit", ttft_ms=latency_ms, latency_ms=latency_ms))
 
-    except Exception as e:
-        error_msg = f"⚠️ API Error: {str(e)}"
-        st.error(error_msg)
-        st.session_state.chat_history.append({"role": "assistant", "content": error_msg})
+    else:
+        # Recent turns within the token budget + rolling summary of older ones.
+        # Only messages that are not summarized yet are read from the store.
+        window = st.session_state.context_window
+        offset = window.summarized_upto
+        messages, prompt_stats = window.build(
+            system_prompt, chat_store.since(session_id, offset), offset=offset
+        )
+        prompt_stats["knowledge_tokens"] = estimate_tokens(knowledge_context)
+        prompt_stats["retrieval_ms"] = round(retrieval_ms, 3)
+        if prompt_stats["folded_messages"]:
+            chat_store.set_summary(session_id, window.summary, window.summarized_upto)
+        st.session_state.prompt_stats = (st.session_state.prompt_stats + [prompt_stats])[-MAX_PROMPT_STATS:]
+        turn_event.update(cache="miss", prompt_tokens_est=prompt_stats["prompt_tokens"],
+                          window_messages=prompt_stats["window_messages"],
+                          summarized_messages=prompt_stats["summarized_messages"])
+
+        # Generate the response (queued behind other sessions if the server is busy)
+        timing = {}
+        try:
+            with st.chat_message("assistant"):
+                status = st.empty()
+                placeholder = st.empty()
+
+                def show_queue_position(position):
+                    status.info(f"⏳ High demand right now — you are #{position} in line.")
+
+                def show_retry(attempt, delay):
+                    status.warning(f"🔁 The model is rate limited, retrying in {delay:.1f}s (attempt {attempt})...")
+
+                def stream_answer():
+                    # Runs once per attempt; a retry starts the answer over
+                    timing["request_start"] = time.perf_counter()
+                    timing.setdefault("queue_ms", (timing["request_start"] - turn_start) * 1000)
+                    timing["first_token"] = None
+                    parts, usage = [], None
+                    stream = client.chat.completions.create(
+                        messages=messages,
+                        model=MODEL_NAME,
+                        max_tokens=1024,
+                        stream=True,
+                    )
+                    for chunk in stream:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            if timing["first_token"] is None:
+                                timing["first_token"] = time.perf_counter()
+                                status.empty()
+                            parts.append(delta)
+                            placeholder.markdown("".join(parts) + "▌")
+                        usage = stream_usage(chunk) or usage
+                    return "".join(parts), usage
+
+                with st.spinner("Thinking... 💭"):
+                    (answer, usage), retries = scheduler.run(
+                        stream_answer,
+                        on_wait=show_queue_position,
+                        on_retry=show_retry,
+                    )
+                    status.empty()
+                    placeholder.markdown(answer)
+
+            # Save assistant response
+            chat_store.append(session_id, "assistant", answer)
+            response_cache.put(user_query, profile_key, answer)
+
+            counted = read_usage(usage)
+            prompt_tokens, completion_tokens = counted or (prompt_stats["prompt_tokens"], estimate_tokens(answer))
+            first_token = timing["first_token"] or time.perf_counter()
+            telemetry.record(dict(turn_event, status="ok", retries=retries,
+                                  prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                  usage_source="api" if counted else "estimate",
+                                  queue_ms=round(timing["queue_ms"], 1),
+                                  ttft_ms=round((first_token - turn_start) * 1000, 1),
+                                  latency_ms=round((time.perf_counter() - turn_start) * 1000, 1)))
+
+        except SchedulerBusyError:
+            error_msg = "⚠️ The assistant is very busy right now. Please try again in a minute."
+            st.warning(error_msg)
+            chat_store.append(session_id, "assistant", error_msg)
+            telemetry.record(dict(turn_event, status="busy", retries=scheduler.max_retries,
+                                  latency_ms=round((time.perf_counter() - turn_start) * 1000, 1)))
+
+        except Exception as e:
+            error_msg = f"⚠️ API Error: {str(e)}"
+            st.error(error_msg)
+            chat_store.append(session_id, "assistant", error_msg)
+            telemetry.record(dict(turn_event, status="error", error=type(e).__name__,
+                                  latency_ms=round((time.perf_counter() - turn_start) * 1000, 1)))
+
+# ==============================
+# 🛠️ DEBUG PANEL (PROMPT SIZE & CACHE)
+# ==============================
+with st.sidebar.expander("🛠️ Debug: prompt size & cache"):
+    st.caption(f"Budget: {CONTEXT_BUDGET_TOKENS} tokens (summary ≤ {SUMMARY_BUDGET_TOKENS})")
+    if st.session_state.prompt_stats:
+        last = st.session_state.prompt_stats[-1]
+        st.metric("Last prompt (est. tokens)", last["prompt_tokens"])
+        st.write(f"Window: {last['window_messages']} messages · "
+                 f"Summarized: {last['summarized_messages']} messages")
+        st.write(f"Knowledge notes: {last['knowledge_tokens']} tokens "
+                 f"(retrieved in {last['retrieval_ms']} ms)")
+        st.dataframe(
+            st.session_state.prompt_stats,
+            use_container_width=True,
+        )
+    else:
+        st.write("No turns yet.")
+
+    cache_stats = response_cache.report()
+    st.metric("Cache hit rate", f"{cache_stats['hit_rate'] * 100:.1f}%")
+    st.write(cache_stats)
+
+    st.caption("LLM request queue")
+    st.write(scheduler.report())
+
+    st.caption("Telemetry (see the admin_telemetry page)")
+    st.write(telemetry.report())
@@ -0,0 +1,134 @@
+# -----------------------------
+# admin_telemetry.py - Streamlit admin page for chat LLM telemetry
+# -----------------------------
+# Shown as a second page of `streamlit run main_app.py`. Reads the JSONL
+# files written by telemetry.py and charts latency percentiles, token
+# counts, cache hit rate and cost over time, so the effect of prompt-size
+# and caching changes is visible. Set CHAT_ADMIN_PASSWORD to require a
+# password before anything is shown.
+import os
+import sys
+import time
+
+import pandas as pd
+import streamlit as st
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telemetry import (DEFAULT_PRICE_INPUT_PER_MTOK, DEFAULT_PRICE_OUTPUT_PER_MTOK, load_events,
+                       turn_cost)
+
+PERCENTILES = (50, 90, 95, 99)
+BUCKETS = {"5 minutes": "5min", "Hour": "1h", "Day": "1D"}
+LOOKBACK_DAYS = {"Last 24 hours": 1, "Last 7 days": 7, "Last 30 days": 30, "Everything": None}
+
+st.set_page_config(page_title="📈 Chat telemetry", page_icon="📈", layout="wide")
+st.title("📈 Chat telemetry")
+
+admin_password = os.getenv("CHAT_ADMIN_PASSWORD")
+if admin_password and st.sidebar.text_input("Admin password:", type="password") != admin_password:
+    st.info("🔒 Enter the admin password in the sidebar.")
+    st.stop()
+
+lookback = st.sidebar.selectbox("Period:", list(LOOKBACK_DAYS), index=1)
+bucket = st.sidebar.selectbox("Bucket:", list(BUCKETS), index=1)
+include_summaries = st.sidebar.checkbox("Include summary calls", value=True)
+input_price = st.sidebar.number_input(
+    "$ per 1M prompt tokens:", min_value=0.0, format="%.4f",
+    value=float(os.getenv("CHAT_PRICE_INPUT_PER_MTOK", DEFAULT_PRICE_INPUT_PER_MTOK)))
+output_price = st.sidebar.number_input(
+    "$ per 1M completion tokens:", min_value=0.0, format="%.4f",
+    value=float(os.getenv("CHAT_PRICE_OUTPUT_PER_MTOK", DEFAULT_PRICE_OUTPUT_PER_MTOK)))
+
+
+@st.cache_data(show_spinner=False, ttl=30)
+def load_frame(days):
+    """Telemetry events as a DataFrame (re-read at most every 30 s)"""
+    since = time.time() - days * 86400 if days else None
+    df = pd.DataFrame(load_events(since=since))
+    if df.empty:
+        return df
+    df["time"] = pd.to_datetime(df["ts"], unit="s")
+    for column in ("prompt_tokens", "completion_tokens", "retries"):
+        df[column] = df.get(column, pd.Series(0, index=df.index)).fillna(0).astype(int)
+    for column in ("ttft_ms", "latency_ms", "queue_ms"):
+        if column not in df:
+            df[column] = float("nan")
+    return df
+
+
+df = load_frame(LOOKBACK_DAYS[lookback])
+if df.empty:
+    st.info("No telemetry recorded yet. Chat on the main page, then come back.")
+    st.stop()
+
+if not include_summaries:
+    df = df[df["kind"] == "chat"]
+df = df.assign(cost_usd=turn_cost(df["prompt_tokens"], df["completion_tokens"], input_price, output_price))
+chat = df[df["kind"] == "chat"]
+ok = chat[chat["status"] == "ok"]
+llm = ok[ok["cache"] == "miss"]
+
+# ==============================
+# Headline numbers
+# ==============================
+cols = st.columns(6)
+cols[0].metric("Chat turns", len(chat))
+cols[1].metric("Cache hit rate", f"{(ok['cache'] == 'hit').mean() * 100:.1f}%" if len(ok) else "–")
+cols[2].metric("p95 TTFT (LLM)", f"{llm['ttft_ms'].quantile(0.95):.0f} ms" if len(llm) else "–")
+cols[3].metric("p95 latency", f"{ok['latency_ms'].quantile(0.95):.0f} ms" if len(ok) else "–")
+cols[4].metric("Errors", int((chat["status"] != "ok").sum()))
+cols[5].metric("Cost", f"${df['cost_usd'].sum():.4f}")
+
+st.subheader("Percentiles")
+rows = {}
+for label, frame, column in (("TTFT, LLM turns (ms)", llm, "ttft_ms"),
+                             ("Latency, LLM turns (ms)", llm, "latency_ms"),
+                             ("Latency, cache hits (ms)", ok[ok["cache"] == "hit"], "latency_ms"),
+                             ("Queue wait (ms)", llm, "queue_ms"),
+                             ("Prompt tokens", llm, "prompt_tokens"),
+                             ("Completion tokens", llm, "completion_tokens")):
+    if column in frame and frame[column].notna().any():
+        rows[label] = {f"p{p}": round(frame[column].quantile(p / 100), 1) for p in PERCENTILES}
+        rows[label]["mean"] = round(frame[column].mean(), 1)
+st.dataframe(pd.DataFrame(rows).T, use_container_width=True)
+
+# ==============================
+# Over time
+# ==============================
+st.subheader("Over time")
+freq = BUCKETS[bucket]
+by_time = ok.set_index("time").sort_index()
+over_time = pd.DataFrame({
+    "turns": by_time["latency_ms"].resample(freq).size(),
+    "cache_hit_rate": (by_time["cache"] == "hit").resample(freq).mean(),
+})
+llm_by_time = llm.set_index("time").sort_index()
+for p in (50, 95):
+    over_time[f"ttft_p{p}_ms"] = llm_by_time["ttft_ms"].resample(freq).quantile(p / 100)
+    over_time[f"latency_p{p}_ms"] = llm_by_time["latency_ms"].resample(freq).quantile(p / 100)
+over_time["prompt_tokens_mean"] = llm_by_time["prompt_tokens"].resample(freq).mean()
+over_time["completion_tokens_mean"] = llm_by_time["completion_tokens"].resample(freq).mean()
+cost = df.set_index("time").sort_index()["cost_usd"].resample(freq).sum()
+over_time["cost_usd"] = cost
+over_time["cumulative_cost_usd"] = cost.cumsum()
+
+left, right = st.columns(2)
+with left:
+    st.caption("TTFT and latency percentiles (ms)")
+    st.line_chart(over_time[["ttft_p50_ms", "ttft_p95_ms", "latency_p50_ms", "latency_p95_ms"]])
+    st.caption("Cache hit rate")
+    st.line_chart(over_time[["cache_hit_rate"]])
+with right:
+    st.caption("Mean tokens per LLM turn")
+    st.line_chart(over_time[["prompt_tokens_mean", "completion_tokens_mean"]])
+    st.caption("Cost ($)")
+    st.line_chart(over_time[["cost_usd", "cumulative_cost_usd"]])
+
+# ==============================
+# Raw events
+# ==============================
+with st.expander("Recent events"):
+    st.dataframe(df.sort_values("ts", ascending=False).head(200).drop(columns=["ts"]),
+                 use_container_width=True)
+    if "retries" in chat:
+        st.write(f"Retries: {int(chat['retries'].sum())} over {len(chat)} turns")
@@ -0,0 +1,78 @@
+# -----------------------------
+# prompts.py - Prompt templates for the chatbot
+# -----------------------------
+# Imported modules survive Streamlit reruns, so the caches below are shared
+# by every rerun and session of the server process.
+from functools import lru_cache
+
+SYSTEM_PROMPT_TEMPLATE = """
+        You are a professional fitness and nutrition expert.
+        Stay in character and only answer questions related to:
+        workouts, exercise routines, weight management, nutrition, diet, health, or body composition.
+
+        - Always be encouraging, clear, and easy to understand.
+        - Use user data (gender: {gender}, height: {height} cm, weight: {weight} kg) to personalize advice.
+        - If the user says 'yes', 'continue', or 'tell me more', continue naturally from your last answer.
+        - If the question is NOT fitness-related, reply with:
+          "🚫 I can only answer fitness-related questions. Please ask about exercise, health, or nutrition."
+        """
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of a fitness coaching chat. "
+    "Merge the new turns into the existing summary. Keep user facts, goals, "
+    "constraints and advice already given. Reply with the summary only, as short bullet points."
+)
+
+
+PLAN_CONTEXT_TEMPLATE = """
+        The user's current CareFolio plan (ground your advice in it):
+        - Daily targets: {calories} kcal, {carbs_g} g carbs, {protein_g} g protein, {fats_g} g fats
+        - Meal plan: {meal_plan_type} ({health_tag})
+        - Workout focus: {fitness_type} for {goal}; BMI {bmi} ({bmi_level})
+        - Exercises: {exercises}
+        - Schedule: {schedule}
+        """
+
+KNOWLEDGE_CONTEXT_TEMPLATE = """
+        Reference notes for this question (base your answer on them and keep it short;
+        do not repeat them word for word):
+{notes}
+        """
+
+
+@lru_cache(maxsize=256)
+def build_system_prompt(gender, height, weight, plan_context="", knowledge_context=""):
+    """System prompt personalised with the sidebar profile (and plan / notes, if any)"""
+    return SYSTEM_PROMPT_TEMPLATE.format(gender=gender, height=height, weight=weight) + plan_context + knowledge_context
+
+
+def format_knowledge_context(snippets):
+    """Retrieved snippets (see retrieval.py) as a system prompt section"""
+    if not snippets:
+        return ""
+    notes = "\n".join(f"        - {s['title']}: {s['text']}" for s in snippets)
+    return KNOWLEDGE_CONTEXT_TEMPLATE.format(notes=notes)
+
+
+def format_plan_context(meal_plan, workout_plan):
+    """Compact plan summary from MealPlanner / WorkoutRecommender results"""
+    nutrition = meal_plan["predicted_nutrition"]
+    workout = workout_plan["result"]
+    return PLAN_CONTEXT_TEMPLATE.format(
+        meal_plan_type=meal_plan["meal_plan_type"].replace("meal_plan_type_", ""),
+        health_tag=meal_plan["health_tag"].replace("health_tag_", ""),
+        fitness_type=workout["Fitness Type"],
+        goal=workout["Goal"],
+        bmi=workout_plan["bmi"],
+        bmi_level=workout_plan["level"],
+        exercises=workout["Exercises"],
+        schedule=workout["Schedule"],
+        **nutrition,
+    )
+
+
+def build_summary_request(previous_summary, transcript):
+    return [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Existing summary:\n{previous_summary or '(empty)'}\n\nNew turns:\n{transcript}"},
+    ]
@@ -0,0 +1,206 @@
+# -----------------------------
+# response_cache.py - Local cache for repeated chatbot questions
+# -----------------------------
+import re
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+
+# MinHash / LSH settings for near-duplicate lookup (bands * rows = permutations)
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+DEFAULT_SIMILARITY_THRESHOLD = 0.7
+
+# Messages that only make sense together with the previous answer
+FOLLOW_UP_PATTERNS = re.compile(
+    r"^((yes|yeah|yep|ok|okay|sure|no|more|why|and|how so)( please)?$|"
+    r"(continue|go on|keep going|tell me more|elaborate|can you elaborate|"
+    r"what about (that|this|it)|explain (that|this|it|more))\b)"
+)
+FOLLOW_UP_REFERENCES = re.compile(r"\b(that|this|it|those|these|above|previous|again)\b")
+MIN_CACHEABLE_WORDS = 3
+
+
+def normalize_question(question):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    text = re.sub(r"[^a-z0-9\s]", " ", question.lower())
+    return " ".join(text.split())
+
+
+def bucket_profile(gender, height_cm, weight_kg, height_step=10, weight_step=10):
+    """Coarse profile key so near-identical users share answers"""
+    height_bucket = int(height_cm) // height_step * height_step
+    weight_bucket = int(weight_kg) // weight_step * weight_step
+    return f"{gender}|{height_bucket}cm|{weight_bucket}kg"
+
+
+def is_follow_up(question):
+    """True for messages whose meaning depends on the chat history"""
+    normalized = normalize_question(question)
+    words = normalized.split()
+    if len(words) < MIN_CACHEABLE_WORDS:
+        return True
+    if FOLLOW_UP_PATTERNS.match(normalized):
+        return True
+    # Short messages pointing back at an earlier answer ("is that safe for me")
+    return len(words) <= 6 and bool(FOLLOW_UP_REFERENCES.search(normalized))
+
+
+STOPWORDS = frozenset(
+    "a an the to of for in on at and or is are am be do does did i me my we you your it "
+    "how what which should can could would will much many some any with about".split()
+)
+
+
+def _shingles(normalized):
+    content = {w for w in normalized.split() if w not in STOPWORDS}
+    return content or {normalized}
+
+
+def minhash_signature(normalized):
+    """MinHash signature over content words (process-local hashing)"""
+    shingles = _shingles(normalized)
+    return tuple(min(hash((seed, s)) for s in shingles) for seed in range(NUM_PERMUTATIONS))
+
+
+def _similarity(sig_a, sig_b):
+    return sum(a == b for a, b in zip(sig_a, sig_b)) / NUM_PERMUTATIONS
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of answers with TTL and optional near-duplicate lookup.
+
+    Entries are keyed on (normalized question, profile bucket). When
+    `near_duplicates` is enabled, a MinHash/LSH index over cached questions
+    is used to find a close enough question for the same profile bucket.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 near_duplicates=False, similarity_threshold=DEFAULT_SIMILARITY_THRESHOLD):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.near_duplicates = near_duplicates
+        self.similarity_threshold = similarity_threshold
+
+        self._entries = OrderedDict()  # key -> (answer, created_at, signature)
+        self._bands = {}               # (profile, band index, band) -> set of keys
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "near_hits": 0, "misses": 0, "skipped": 0, "evictions": 0}
+
+    # -----------------------------
+    # LSH index helpers
+    # -----------------------------
+    def _band_keys(self, profile, signature):
+        for b in range(LSH_BANDS):
+            yield (profile, b, signature[b * LSH_ROWS:(b + 1) * LSH_ROWS])
+
+    def _index(self, key, signature):
+        for band_key in self._band_keys(key[1], signature):
+            self._bands.setdefault(band_key, set()).add(key)
+
+    def _unindex(self, key, signature):
+        for band_key in self._band_keys(key[1], signature):
+            bucket = self._bands.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._bands[band_key]
+
+    def _remove(self, key):
+        _, _, signature = self._entries.pop(key)
+        if signature is not None:
+            self._unindex(key, signature)
+
+    def _is_fresh(self, created_at, now):
+        return now - created_at <= self.ttl_seconds
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def get(self, question, profile):
+        """Return a cached answer or None. Follow-up questions always miss."""
+        if is_follow_up(question):
+            with self._lock:
+                self.stats["skipped"] += 1
+            return None
+
+        normalized = normalize_question(question)
+        key = (normalized, profile)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._is_fresh(entry[1], now):
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[0]
+                self._remove(key)
+
+            if self.near_duplicates:
+                answer = self._near_lookup(normalized, profile, now)
+                if answer is not None:
+                    self.stats["near_hits"] += 1
+                    return answer
+
+            self.stats["misses"] += 1
+            return None
+
+    def _near_lookup(self, normalized, profile, now):
+        signature = minhash_signature(normalized)
+        candidates = set()
+        for band_key in self._band_keys(profile, signature):
+            candidates |= self._bands.get(band_key, set())
+
+        best_key, best_score = None, self.similarity_threshold
+        for key in candidates:
+            answer, created_at, cand_sig = self._entries[key]
+            if not self._is_fresh(created_at, now):
+                continue
+            score = _similarity(signature, cand_sig)
+            if score >= best_score:
+                best_key, best_score = key, score
+
+        if best_key is None:
+            return None
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key][0]
+
+    def put(self, question, profile, answer):
+        """Store an answer; follow-up questions are never cached"""
+        if is_follow_up(question):
+            return
+
+        normalized = normalize_question(question)
+        key = (normalized, profile)
+        signature = minhash_signature(normalized) if self.near_duplicates else None
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (answer, time.time(), signature)
+            if signature is not None:
+                self._index(key, signature)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bands.clear()
+
+    def report(self):
+        """Snapshot of cache counters including the hit rate"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["near_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["near_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
@@ -0,0 +1,140 @@
+# -----------------------------
+# retrieval.py - Memory-mapped BM25 index over the chatbot knowledge base
+# -----------------------------
+# The index is built offline by build_knowledge_index.py from the meal plan
+# and health tag explanations, the workout recommendation templates and the
+# curated notes in knowledge/. It is an inverted index stored as flat NumPy
+# arrays, so loading it is a handful of np.load(mmap_mode="r") calls and every
+# Streamlit session shares the same pages. Only the top-k snippets for a
+# question are injected into the system prompt.
+import json
+import os
+import re
+
+import numpy as np
+
+DEFAULT_INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_index")
+DEFAULT_TOP_K = 3
+
+# Standard BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be because been before being but by can could
+do does doing for from had has have how i if in into is it its just me more most my no not
+of on or our should so some such than that the their them then there these they this to too
+very was we what when where which while who why will with would you your
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords, with plural 's' stripped"""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def build_index(snippets, index_dir=DEFAULT_INDEX_DIR, k1=BM25_K1, b=BM25_B):
+    """Write the BM25 arrays for a list of {"id", "source", "title", "text"} snippets"""
+    vocab = {}
+    postings = {}
+    doc_len = np.zeros(len(snippets), dtype=np.float32)
+    for doc_id, snippet in enumerate(snippets):
+        tokens = tokenize(f"{snippet['title']} {snippet['text']}")
+        doc_len[doc_id] = len(tokens)
+        for token in tokens:
+            term_id = vocab.setdefault(token, len(vocab))
+            counts = postings.setdefault(term_id, {})
+            counts[doc_id] = counts.get(doc_id, 0) + 1
+
+    # Term-major postings: docs / tfs of term t are [offsets[t], offsets[t + 1])
+    offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    docs, tfs = [], []
+    for term_id in range(len(vocab)):
+        counts = postings[term_id]
+        docs.extend(counts.keys())
+        tfs.extend(counts.values())
+        offsets[term_id + 1] = len(docs)
+
+    n_docs = len(snippets)
+    doc_freq = np.diff(offsets).astype(np.float32)
+    idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+    avg_len = float(doc_len.mean()) if n_docs else 0.0
+    # Per-document part of the BM25 denominator, precomputed once
+    doc_norm = (k1 * (1 - b + b * doc_len / max(avg_len, 1e-9))).astype(np.float32)
+
+    os.makedirs(index_dir, exist_ok=True)
+    np.save(os.path.join(index_dir, "term_offsets.npy"), offsets)
+    np.save(os.path.join(index_dir, "postings_docs.npy"), np.asarray(docs, dtype=np.int32))
+    np.save(os.path.join(index_dir, "postings_tf.npy"), np.asarray(tfs, dtype=np.float32))
+    np.save(os.path.join(index_dir, "idf.npy"), idf)
+    np.save(os.path.join(index_dir, "doc_norm.npy"), doc_norm)
+    with open(os.path.join(index_dir, "vocab.json"), "w") as f:
+        json.dump(vocab, f)
+    with open(os.path.join(index_dir, "snippets.json"), "w") as f:
+        json.dump(snippets, f)
+    with open(os.path.join(index_dir, "meta.json"), "w") as f:
+        json.dump({"documents": n_docs, "terms": len(vocab), "k1": k1, "b": b, "avg_doc_len": avg_len}, f)
+    return {"documents": n_docs, "terms": len(vocab), "postings": len(docs)}
+
+
+class KnowledgeIndex:
+    """Read-only BM25 search over a memory-mapped index directory"""
+
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR):
+        load = lambda name: np.load(os.path.join(index_dir, name), mmap_mode="r")
+        self.offsets = load("term_offsets.npy")
+        self.postings_docs = load("postings_docs.npy")
+        self.postings_tf = load("postings_tf.npy")
+        self.idf = load("idf.npy")
+        self.doc_norm = load("doc_norm.npy")
+        with open(os.path.join(index_dir, "vocab.json")) as f:
+            self.vocab = json.load(f)
+        with open(os.path.join(index_dir, "snippets.json")) as f:
+            self.snippets = json.load(f)
+        with open(os.path.join(index_dir, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.k1 = self.meta["k1"]
+
+    def __len__(self):
+        return len(self.snippets)
+
+    def scores(self, query):
+        """BM25 score of every snippet for `query`"""
+        scores = np.zeros(len(self.snippets), dtype=np.float32)
+        term_ids = {self.vocab[t] for t in tokenize(query) if t in self.vocab}
+        for term_id in term_ids:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.postings_docs[start:end]
+            tf = self.postings_tf[start:end]
+            scores[docs] += self.idf[term_id] * tf * (self.k1 + 1) / (tf + self.doc_norm[docs])
+        return scores
+
+    def search(self, query, k=DEFAULT_TOP_K):
+        """Top-k snippets (with their score) that share at least one term with `query`"""
+        scores = self.scores(query)
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [{**self.snippets[i], "score": round(float(scores[i]), 4)} for i in top if scores[i] > 0]
+
+
+def load_knowledge_index(index_dir=DEFAULT_INDEX_DIR):
+    """KnowledgeIndex, or None (with a warning) when it has not been built"""
+    try:
+        index = KnowledgeIndex(index_dir)
+    except FileNotFoundError:
+        print(f"⚠️ No knowledge index in {index_dir}; run build_knowledge_index.py to enable retrieval")
+        return None
+    print(f"✓ Knowledge index loaded: {len(index)} snippets, {index.meta['terms']} terms")
+    return index
@@ -0,0 +1,143 @@
+# -----------------------------
+# telemetry.py - Append-only per-turn LLM telemetry
+# -----------------------------
+# Every chat turn (and every summary call) becomes one JSON line in
+# telemetry/turns-YYYY-MM-DD.jsonl: token counts, time to first token,
+# total latency, queueing, retries and cache status. record() only puts the
+# event on a queue; a background thread appends batches to the file, so the
+# chat thread never waits on disk. Read back by pages/admin_telemetry.py.
+#
+# Env vars:
+#   CHAT_TELEMETRY                 1 to record (default), 0 to turn off
+#   CHAT_TELEMETRY_DIR             where the JSONL files go (default ./telemetry)
+#   CHAT_PRICE_INPUT_PER_MTOK      $ per 1M prompt tokens (default 0.05)
+#   CHAT_PRICE_OUTPUT_PER_MTOK     $ per 1M completion tokens (default 0.08)
+import glob
+import json
+import os
+import queue
+import threading
+import time
+
+DEFAULT_TELEMETRY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "telemetry")
+DEFAULT_MAX_PENDING = 10000
+
+# Groq list prices for llama-3.1-8b-instant
+DEFAULT_PRICE_INPUT_PER_MTOK = 0.05
+DEFAULT_PRICE_OUTPUT_PER_MTOK = 0.08
+
+
+def read_usage(usage):
+    """(prompt_tokens, completion_tokens) from an API usage object or dict, None if absent"""
+    if usage is None:
+        return None
+    get = usage.get if isinstance(usage, dict) else lambda key: getattr(usage, key, None)
+    prompt, completion = get("prompt_tokens"), get("completion_tokens")
+    if prompt is None and completion is None:
+        return None
+    return int(prompt or 0), int(completion or 0)
+
+
+def stream_usage(chunk):
+    """Usage carried by a streaming chunk: Groq puts it under x_groq, OpenAI under usage"""
+    x_groq = getattr(chunk, "x_groq", None)
+    return getattr(x_groq, "usage", None) or getattr(chunk, "usage", None)
+
+
+def turn_cost(prompt_tokens, completion_tokens, input_price=None, output_price=None):
+    """Dollar cost of one call at $ per 1M token prices"""
+    if input_price is None:
+        input_price = float(os.getenv("CHAT_PRICE_INPUT_PER_MTOK", DEFAULT_PRICE_INPUT_PER_MTOK))
+    if output_price is None:
+        output_price = float(os.getenv("CHAT_PRICE_OUTPUT_PER_MTOK", DEFAULT_PRICE_OUTPUT_PER_MTOK))
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+class TelemetryStore:
+    """Daily JSONL files written by one background thread"""
+
+    def __init__(self, directory=None, max_pending=DEFAULT_MAX_PENDING, enabled=None):
+        self.directory = directory or os.getenv("CHAT_TELEMETRY_DIR", DEFAULT_TELEMETRY_DIR)
+        self.enabled = os.getenv("CHAT_TELEMETRY", "1") == "1" if enabled is None else enabled
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self.stats = {"recorded": 0, "written": 0, "dropped": 0, "write_errors": 0}
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+            threading.Thread(target=self._writer, name="chat-telemetry", daemon=True).start()
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    # -----------------------------
+    # Writing
+    # -----------------------------
+    def record(self, event):
+        """Queue one event dict (never blocks; dropped and counted if the writer falls behind)"""
+        if not self.enabled:
+            return
+        event = {"ts": time.time(), **event}
+        try:
+            self._queue.put_nowait(event)
+            self._count("recorded")
+        except queue.Full:
+            self._count("dropped")
+
+    def _path(self, ts):
+        return os.path.join(self.directory, time.strftime("turns-%Y-%m-%d.jsonl", time.localtime(ts)))
+
+    def _writer(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            by_file = {}
+            for event in batch:
+                by_file.setdefault(self._path(event["ts"]), []).append(json.dumps(event, separators=(",", ":")))
+            for path, lines in by_file.items():
+                try:
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.write("\n".join(lines) + "\n")
+                    self._count("written", len(lines))
+                except OSError as e:
+                    print(f"⚠️  Telemetry write failed: {e}")
+                    self._count("write_errors", len(lines))
+
+    def flush(self, timeout=5.0):
+        """Wait until queued events are on disk (tests / benchmarks)"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self._lock:
+                if self.stats["written"] + self.stats["write_errors"] >= self.stats["recorded"]:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def report(self):
+        with self._lock:
+            return {**self.stats, "pending": self._queue.qsize(), "enabled": self.enabled}
+
+
+def load_events(directory=None, since=None):
+    """Every recorded event (oldest first), optionally only those after `since` (epoch s)"""
+    directory = directory or os.getenv("CHAT_TELEMETRY_DIR", DEFAULT_TELEMETRY_DIR)
+    events = []
+    for path in sorted(glob.glob(os.path.join(directory, "turns-*.jsonl"))):
+        if since is not None:
+            day_end = time.mktime(time.strptime(os.path.basename(path)[6:16], "%Y-%m-%d")) + 86400
+            if day_end < since:
+                continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                if since is None or event.get("ts", 0) >= since:
+                    events.append(event)
+    events.sort(key=lambda e: e.get("ts", 0))
+    return events
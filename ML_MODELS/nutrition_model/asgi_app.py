@@ -0,0 +1,205 @@
+# -----------------------------
+# asgi_app.py - Async Meal Planner API (same contract as app.py)
+# -----------------------------
+# Run with:
+#   uvicorn asgi_app:app --host 0.0.0.0 --port 5000 --workers 2
+# Requests are parsed and validated on the event loop; model inference runs
+# on a bounded thread pool (XGBoost releases the GIL while predicting).
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import orjson
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import Route
+
+# Shared inference library lives in ML_MODELS/carefolio_ml
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from carefolio_ml import get_combined_planner, get_meal_planner, get_plan_hash_batcher
+from carefolio_ml.explain import ExplanationService, MealExplainer
+from carefolio_ml.plan_store import PlanStore
+from carefolio_ml.shadow import make_meal_shadow
+
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", os.cpu_count() or 1))
+
+# -----------------------------
+# Load Models
+# -----------------------------
+planner = get_meal_planner()
+try:
+    planner.load()
+except FileNotFoundError as e:
+    print(f"Error: Required model file not found. {e}")
+    exit()
+
+# One booster thread per call; parallelism comes from the pool instead
+planner.set_inference_threads(1)
+executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix="inference")
+
+# Every plan returned gets a receipt into a Merkle batch (see plan_hashing.py)
+batcher = get_plan_hash_batcher()
+
+# Optional candidate model scored off the request path (see shadow.py)
+shadow = make_meal_shadow(planner)
+
+# Requests carrying a user_id reuse the stored plan when nothing relevant changed
+plan_store = PlanStore(planner)
+plan_store.start_background_rescore()
+
+# TreeSHAP explanations are computed in batches off the request path (see explain.py)
+explanations = ExplanationService(MealExplainer(planner), "meal")
+
+
+class ORJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content):
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+# -----------------------------
+# Routes
+# -----------------------------
+async def home(request):
+    return PlainTextResponse("Meal Planner API is running!")
+
+
+async def health(request):
+    return ORJSONResponse({"status": "ok"})
+
+
+async def predict(request):
+    try:
+        body = await request.body()
+        try:
+            data = orjson.loads(body) if body else None
+        except orjson.JSONDecodeError:
+            data = None
+        if not data:
+            return ORJSONResponse({"error": "No input provided"}, status_code=400)
+        if not isinstance(data, dict):
+            return ORJSONResponse({"error": "Input must be a JSON object"}, status_code=400)
+
+        loop = asyncio.get_running_loop()
+        user_id = data.pop("user_id", None)
+        if user_id is not None:
+            result, reused = await loop.run_in_executor(executor, plan_store.plan, user_id, data)
+        else:
+            result, reused = (await loop.run_in_executor(executor, planner.predict, [data]))[0], False
+        if shadow is not None and not reused:
+            shadow.submit([data], [result])
+        receipt = batcher.add(result)
+
+        return ORJSONResponse({"status": "success", **result, "plan_receipt": receipt})
+
+    except Exception as e:
+        return ORJSONResponse({
+            "status": "error",
+            "message": str(e)
+        }, status_code=500)
+
+
+async def plan(request):
+    try:
+        body = await request.body()
+        try:
+            survey = orjson.loads(body) if body else None
+        except orjson.JSONDecodeError:
+            survey = None
+        if not survey:
+            return ORJSONResponse({"error": "No input provided"}, status_code=400)
+        if not isinstance(survey, dict):
+            return ORJSONResponse({"error": "Input must be a JSON object"}, status_code=400)
+
+        # CombinedPlanner fans out to its own pool; keep the event loop free
+        loop = asyncio.get_running_loop()
+        result = (await loop.run_in_executor(executor, get_combined_planner().plan, [survey]))[0]
+        receipt = batcher.add(result)
+
+        return ORJSONResponse({"status": "success", **result, "plan_receipt": receipt})
+
+    except Exception as e:
+        return ORJSONResponse({
+            "status": "error",
+            "message": str(e)
+        }, status_code=500)
+
+
+async def metrics(request):
+    return ORJSONResponse({"plan_hashing": batcher.report(), "plan_store": plan_store.report(),
+                           "explanations": explanations.report(), "cohorts": planner.cohort_report()})
+
+
+async def explain(request):
+    body = await request.body()
+    try:
+        data = orjson.loads(body) if body else None
+    except orjson.JSONDecodeError:
+        data = None
+    if not data:
+        return ORJSONResponse({"error": "No input provided"}, status_code=400)
+    if not isinstance(data, dict):
+        return ORJSONResponse({"error": "Input must be a JSON object"}, status_code=400)
+    data.pop("user_id", None)
+
+    job_id = explanations.submit(data)
+    if job_id is None:
+        return ORJSONResponse({"status": "error", "message": "Explanation queue is full, retry later"},
+                              status_code=503)
+    return ORJSONResponse({"status": "pending", "job_id": job_id, "result_url": f"/explain/{job_id}"},
+                          status_code=202)
+
+
+async def explain_result(request):
+    job = explanations.get(request.path_params["job_id"])
+    if job is None:
+        return ORJSONResponse({"error": "Unknown or expired explanation job"}, status_code=404)
+    status_code = {"pending": 202, "error": 500}.get(job["status"], 200)
+    return ORJSONResponse(job, status_code=status_code)
+
+
+async def shadow_summary(request):
+    if shadow is None:
+        return ORJSONResponse({"enabled": False})
+    return ORJSONResponse({"enabled": True, **shadow.summary()})
+
+
+async def plan_proof(request):
+    batch_id = request.path_params["batch_id"]
+    leaf_index = request.path_params["leaf_index"]
+    try:
+        # May read the ledger file for older batches
+        proof = await asyncio.get_running_loop().run_in_executor(executor, batcher.get_proof, batch_id, leaf_index)
+    except (KeyError, IndexError):
+        return ORJSONResponse({"error": "Unknown plan receipt"}, status_code=404)
+    if proof is None:
+        return ORJSONResponse({"status": "pending", "message": "Batch not sealed yet"}, status_code=202)
+    return ORJSONResponse({"status": "success", **proof})
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    executor.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route("/", home),
+        Route("/health", health),
+        Route("/predict", predict, methods=["POST"]),
+        Route("/plan", plan, methods=["POST"]),
+        Route("/plan-proof/{batch_id}/{leaf_index:int}", plan_proof),
+        Route("/explain", explain, methods=["POST"]),
+        Route("/explain/{job_id}", explain_result),
+        Route("/shadow", shadow_summary),
+        Route("/metrics", metrics),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])],
+    lifespan=lifespan,
+)
@@ -0,0 +1,113 @@
+# -----------------------------
+# bench_plan_hashing.py - Throughput of plan hashing, Merkle sealing and proofs
+# -----------------------------
+# No models or servers needed; plans are synthesized with the same response
+# builders the APIs use:
+#   python bench_plan_hashing.py --plans 20000 --batch-size 64 --batch-size 256 --batch-size 1024
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from carefolio_ml.meal_planner import HEALTH_TAG_COLS, MEAL_PLAN_COLS, build_response
+from carefolio_ml.plan_hashing import MerkleTree, PlanHashBatcher, hash_plan, verify_proof
+from carefolio_ml.workout import generate_recommendations
+
+
+def make_plans(count, seed=0):
+    """Merged meal + workout plans shaped like /plan responses"""
+    rng = random.Random(seed)
+    plans = []
+    for _ in range(count):
+        meal_plan = build_response(
+            (rng.uniform(1400, 3500), rng.uniform(120, 400), rng.uniform(60, 220), rng.uniform(40, 120)),
+            rng.choice(MEAL_PLAN_COLS), rng.choice(HEALTH_TAG_COLS),
+        )
+        bmi = round(rng.uniform(16, 38), 2)
+        level = rng.choice(["Underweight", "Normal", "Overweight", "Obese"])
+        workout_plan = {
+            "bmi": bmi,
+            "level": level,
+            "result": generate_recommendations(
+                rng.choice(["Cardio Fitness", "Muscular Fitness"]),
+                rng.choice(["Weight Gain", "Weight Loss"]), level, bmi,
+            ),
+        }
+        plans.append({"meal_plan": meal_plan, "workout_plan": workout_plan})
+    return plans
+
+
+def rate(count, seconds):
+    return round(count / seconds) if seconds > 0 else float("inf")
+
+
+def bench_batch_size(plans, plan_hashes, batch_size):
+    # Hash + batch + seal, as the API does per request
+    batcher = PlanHashBatcher(max_batch_size=batch_size, max_wait_seconds=0, ledger_path=None,
+                              history=len(plans), on_seal=None)
+    start = time.perf_counter()
+    receipts = [batcher.add(plan) for plan in plans]
+    batcher.seal()
+    ingest_s = time.perf_counter() - start
+
+    # Tree construction alone
+    start = time.perf_counter()
+    trees = [MerkleTree(plan_hashes[i:i + batch_size]) for i in range(0, len(plan_hashes), batch_size)]
+    build_s = time.perf_counter() - start
+
+    # Proof generation and verification
+    start = time.perf_counter()
+    proofs = [batcher.get_proof(r["batch_id"], r["leaf_index"]) for r in receipts]
+    proof_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    verified = sum(verify_proof(p["plan_hash"], p["proof"], p["root"]) for p in proofs)
+    verify_s = time.perf_counter() - start
+    assert verified == len(plans), "inclusion proof failed to verify"
+
+    return {
+        "batch_size": batch_size,
+        "batches": len(trees),
+        "plans_per_s": rate(len(plans), ingest_s),
+        "tree_leaves_per_s": rate(len(plan_hashes), build_s),
+        "proofs_per_s": rate(len(proofs), proof_s),
+        "verifications_per_s": rate(verified, verify_s),
+        "proof_bytes": len(json.dumps(proofs[0]["proof"])),
+        "anchors_saved_pct": round(100.0 * (1 - len(trees) / len(plans)), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan hashing / Merkle batching benchmark")
+    parser.add_argument("--plans", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, action="append", help="Merkle batch size (repeatable)")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    plans = make_plans(args.plans)
+
+    start = time.perf_counter()
+    plan_hashes = [hash_plan(plan) for plan in plans]
+    hash_s = time.perf_counter() - start
+    print(f"canonical JSON + SHA-256: {rate(len(plans), hash_s):>10} plans/s")
+
+    results = {"plans": len(plans), "hashes_per_s": rate(len(plans), hash_s), "batches": []}
+    for batch_size in args.batch_size or [64, 256, 1024]:
+        result = bench_batch_size(plans, plan_hashes, batch_size)
+        results["batches"].append(result)
+        print(f"batch={batch_size:<6} ingest {result['plans_per_s']:>8} plans/s  "
+              f"tree {result['tree_leaves_per_s']:>9} leaves/s  "
+              f"proofs {result['proofs_per_s']:>8}/s  verify {result['verifications_per_s']:>8}/s  "
+              f"proof {result['proof_bytes']} B  on-chain txs -{result['anchors_saved_pct']}%")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
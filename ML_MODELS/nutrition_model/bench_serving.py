@@ -0,0 +1,105 @@
+# -----------------------------
+# bench_serving.py - Throughput of the Meal Planner API under concurrency
+# -----------------------------
+# Start the server(s) to compare, then point the benchmark at each one:
+#   gunicorn --bind 0.0.0.0:5000 app:app --workers 2 --threads 8
+#   uvicorn asgi_app:app --port 5001 --workers 2
+#   python bench_serving.py --url http://localhost:5000 --url http://localhost:5001 --concurrency 64
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(round(pct / 100.0 * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def run_client(url, body, deadline, latencies, errors, lock):
+    """One keep-alive client sending /predict requests until the deadline"""
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+    headers = {"Content-Type": "application/json"}
+    local_latencies, local_errors = [], 0
+
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request("POST", "/predict", body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                local_errors += 1
+            else:
+                local_latencies.append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException):
+            local_errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+
+    conn.close()
+    with lock:
+        latencies.extend(local_latencies)
+        errors[0] += local_errors
+
+
+def benchmark(url, body, concurrency, duration, warmup):
+    # Warm up models / connection pools before measuring
+    run_client(url, body, time.perf_counter() + warmup, [], [0], threading.Lock())
+
+    latencies, errors, lock = [], [0], threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=run_client, args=(url, body, deadline, latencies, errors, lock))
+               for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {p: round(percentile(latencies, int(p[1:])) * 1000, 1) for p in ("p50", "p95", "p99")},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Meal Planner API throughput benchmark")
+    parser.add_argument("--url", action="append", required=True, help="server base URL (repeatable)")
+    parser.add_argument("--input", default="sample_input.json")
+    parser.add_argument("--concurrency", type=int, action="append", help="client count (repeatable)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        body = json.dumps(json.load(f)).encode("utf-8")
+
+    results = []
+    for concurrency in args.concurrency or [1, 16, 64]:
+        for url in args.url:
+            result = benchmark(url, body, concurrency, args.duration, args.warmup)
+            results.append(result)
+            print(f"{url:<28} c={concurrency:<4} {result['throughput_rps']:>8} req/s  "
+                  f"p50={result['latency_ms']['p50']}ms p99={result['latency_ms']['p99']}ms "
+                  f"errors={result['errors']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
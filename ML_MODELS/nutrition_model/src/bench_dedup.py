@@ -0,0 +1,120 @@
+# -----------------------------
+# bench_dedup.py - Meal planner training on every row vs unique rows
+# -----------------------------
+# Fits the regression and one-vs-rest classification models the way
+# training.py does, once on every training row and once on the compacted
+# rows with counts as sample_weight, and reports the compression ratio,
+# fit time speedup and test metrics of both. Run from the folder holding
+# meal_planner_cleaned.csv:
+#   python bench_dedup.py
+#   python bench_dedup.py --dedup-bin '*=0.5' --n-estimators 50
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import accuracy_score, mean_absolute_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.multioutput import MultiOutputClassifier, MultiOutputRegressor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from carefolio_ml.dedup import compact_rows, parse_bin_widths
+
+REGRESSION_TARGETS = ["target_calories", "carbs_g", "protein_g", "fats_g"]
+
+
+def load_split(path):
+    """Same features / targets / split as training.py"""
+    df = pd.read_csv(path)
+    X = df.drop(columns=REGRESSION_TARGETS)
+    clf_targets = [c for c in X.columns if c.startswith("meal_plan_type_") or c.startswith("health_tag_")]
+    return train_test_split(X.drop(columns=clf_targets), df[REGRESSION_TARGETS], X[clf_targets],
+                            test_size=0.2, random_state=42)
+
+
+def make_models(n_estimators):
+    # Hyperparameters as in training.py
+    regressor = MultiOutputRegressor(xgb.XGBRegressor(
+        n_estimators=n_estimators, max_depth=6, learning_rate=0.1, objective='reg:squarederror', random_state=42))
+    classifier = MultiOutputClassifier(xgb.XGBClassifier(
+        n_estimators=n_estimators, max_depth=6, learning_rate=0.1, eval_metric='logloss', random_state=42))
+    return regressor, classifier
+
+
+def timed_fit(model, X, y, weights):
+    start = time.perf_counter()
+    model.fit(X, y, sample_weight=weights)
+    return time.perf_counter() - start
+
+
+def evaluate(regressor, classifier, X_test, y_reg_test, y_clf_test):
+    y_reg_pred = regressor.predict(X_test)
+    y_clf_pred = classifier.predict(X_test)
+    return {
+        "r2": {col: round(r2_score(y_reg_test.iloc[:, i], y_reg_pred[:, i]), 4)
+               for i, col in enumerate(y_reg_test.columns)},
+        "mae": {col: round(mean_absolute_error(y_reg_test.iloc[:, i], y_reg_pred[:, i]), 3)
+                for i, col in enumerate(y_reg_test.columns)},
+        "accuracy": {col: round(accuracy_score(y_clf_test.iloc[:, i], y_clf_pred[:, i]), 4)
+                     for i, col in enumerate(y_clf_test.columns)},
+    }, y_clf_pred
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Duplicate-row compaction benchmark (meal planner)")
+    parser.add_argument("--data", default="meal_planner_cleaned.csv")
+    parser.add_argument("--dedup-bin", action="append", metavar="COLUMN=WIDTH",
+                        help="also merge near-duplicates with these bin widths")
+    parser.add_argument("--n-estimators", type=int, default=200)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    X_train, X_test, y_reg_train, y_reg_test, y_clf_train, y_clf_test = load_split(args.data)
+    bin_widths = parse_bin_widths(args.dedup_bin)
+    print(f"✓ Train {X_train.shape}, test {X_test.shape}")
+
+    regressor, classifier = make_models(args.n_estimators)
+    full_s = {"regression": timed_fit(regressor, X_train, y_reg_train, None),
+              "classification": timed_fit(classifier, X_train, y_clf_train, None)}
+    full_metrics, full_clf = evaluate(regressor, classifier, X_test, y_reg_test, y_clf_test)
+
+    X_reg, y_reg, w_reg, reg_stats = compact_rows(X_train, y_reg_train, bin_widths, average_targets=True)
+    X_clf, y_clf, w_clf, clf_stats = compact_rows(X_train, y_clf_train, bin_widths)
+    regressor, classifier = make_models(args.n_estimators)
+    compact_s = {"regression": timed_fit(regressor, X_reg, y_reg, w_reg),
+                 "classification": timed_fit(classifier, X_clf, y_clf, w_clf)}
+    compact_metrics, compact_clf = evaluate(regressor, classifier, X_test, y_reg_test, y_clf_test)
+
+    results = {
+        "binning": bin_widths,
+        "rows": {"regression": reg_stats, "classification": clf_stats},
+        "fit_s": {"full": {k: round(v, 2) for k, v in full_s.items()},
+                  "compact": {k: round(v, 2) for k, v in compact_s.items()}},
+        "speedup": {k: round(full_s[k] / max(compact_s[k], 1e-9), 2) for k in full_s},
+        "metrics": {"full": full_metrics, "compact": compact_metrics},
+        "classifier_bit_agreement": round(float(np.mean(np.asarray(full_clf) == np.asarray(compact_clf))), 4),
+    }
+
+    for task, stats in results["rows"].items():
+        print(f"{task:<15} {stats['rows']} -> {stats['unique_rows']} rows ({stats['compression_ratio']}x), "
+              f"fit {results['fit_s']['full'][task]}s -> {results['fit_s']['compact'][task]}s "
+              f"({results['speedup'][task]}x faster)")
+    for target in full_metrics["r2"]:
+        print(f"  R² {target:<16} full {full_metrics['r2'][target]:.4f}  compact {compact_metrics['r2'][target]:.4f}")
+    for target in full_metrics["accuracy"]:
+        print(f"  acc {target:<45} full {full_metrics['accuracy'][target]:.4f}  "
+              f"compact {compact_metrics['accuracy'][target]:.4f}")
+    print(f"  classifier bit agreement: {results['classifier_bit_agreement']:.2%}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# -----------------------------
+# compare_categorical.py - One-hot vs native categorical meal planner
+# -----------------------------
+# Serves the same dataset rows through the current one-hot artifacts and
+# through meal_planner_categorical_model.pkl (both via MealPlanner, so the
+# categorical side includes the one-hot -> categorical translation) and
+# reports accuracy, R², latency, artifact size and tree shape. Run from the
+# folder holding meal_planner_cleaned.csv after training.py:
+#   python compare_categorical.py --artifacts ../artifacts
+#   python compare_categorical.py --artifacts ../artifacts --output categorical.json
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import r2_score
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from carefolio_ml.meal_planner import (CATEGORICAL_MODEL_FILE, CLASSIFICATION_MODEL_FILE, HEALTH_TAG_COLS,
+                                       MEAL_PLAN_COLS, MULTICLASS_MODEL_FILE, REGRESSION_MODEL_FILE,
+                                       MealPlanner)
+
+# Dataset target -> /predict "predicted_nutrition" key
+REGRESSION_TARGETS = {"target_calories": "calories", "carbs_g": "carbs_g", "protein_g": "protein_g",
+                      "fats_g": "fats_g"}
+
+
+def median_ms(fn, repeats):
+    fn()  # warm up
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def truth(df, cols):
+    bits = df.reindex(columns=cols, fill_value=0).to_numpy()
+    labels = np.array([cols[i] for i in bits.argmax(axis=1)], dtype=object)
+    labels[bits.sum(axis=1) != 1] = None
+    return labels
+
+
+def _walk(node, depth=0):
+    """(max depth, leaves) of one tree from its JSON dump"""
+    if "leaf" in node:
+        return depth, 1
+    shapes = [_walk(child, depth + 1) for child in node["children"]]
+    return max(d for d, _ in shapes), sum(n for _, n in shapes)
+
+
+def tree_shape(planner):
+    """Tree count, depth and leaves over every booster the planner serves"""
+    depths, leaves = [], []
+    for model in planner.boosters():
+        booster = model.get_booster() if hasattr(model, "get_booster") else model
+        for dump in booster.get_dump(dump_format="json"):
+            depth, n_leaves = _walk(json.loads(dump))
+            depths.append(depth)
+            leaves.append(n_leaves)
+    return {"trees": len(depths), "mean_depth": round(float(np.mean(depths)), 2),
+            "max_depth": int(max(depths)), "mean_leaves": round(float(np.mean(leaves)), 2)}
+
+
+def artifact_mb(artifacts_dir, files):
+    return round(sum(os.path.getsize(os.path.join(artifacts_dir, f)) for f in files) / 1e6, 2)
+
+
+def evaluate(planner, df, batch):
+    results = planner.predict(batch)
+    report = {"r2": {}, "accuracy": {}}
+    for target, key in REGRESSION_TARGETS.items():
+        if target in df.columns:
+            pred = [r["predicted_nutrition"][key] for r in results]
+            report["r2"][target] = round(r2_score(df[target], pred), 4)
+    for name, cols in (("meal_plan_type", MEAL_PLAN_COLS), ("health_tag", HEALTH_TAG_COLS)):
+        true = truth(df, cols)
+        known = np.array([label is not None for label in true])
+        pred = np.array([r[name] for r in results], dtype=object)
+        report["accuracy"][name] = round(float(np.mean(pred[known] == true[known])), 4)
+    return report, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="One-hot vs native categorical meal planner")
+    parser.add_argument("--data", default="meal_planner_cleaned.csv")
+    parser.add_argument("--artifacts", default=os.path.join("..", "artifacts"))
+    parser.add_argument("--baseline", default="onevsrest", choices=["onevsrest", "multiclass"],
+                        help="one-hot variant to compare against")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    batch = df.to_dict("records")
+    print(f"Dataset shape: {df.shape}")
+
+    baseline_files = [REGRESSION_MODEL_FILE,
+                      CLASSIFICATION_MODEL_FILE if args.baseline == "onevsrest" else MULTICLASS_MODEL_FILE]
+    planners = {
+        args.baseline: (MealPlanner(args.artifacts, variant=args.baseline).load(), baseline_files),
+        "categorical": (MealPlanner(args.artifacts, variant="categorical").load(), [CATEGORICAL_MODEL_FILE]),
+    }
+
+    results, served = {}, {}
+    for label, (planner, files) in planners.items():
+        metrics, served[label] = evaluate(planner, df, batch)
+        single, thousand = batch[:1], batch[:1000]
+        results[label] = {
+            "features": len(planner.feature_names),
+            "artifact_mb": artifact_mb(args.artifacts, files),
+            "trees": tree_shape(planner),
+            "latency_ms": {
+                "1_row": round(median_ms(lambda: planner.predict(single), args.repeats), 3),
+                f"{len(thousand)}_rows": round(median_ms(lambda: planner.predict(thousand),
+                                                         max(args.repeats // 10, 5)), 3),
+            },
+            **metrics,
+        }
+
+    base, cat = served[args.baseline], served["categorical"]
+    results["agreement"] = {
+        name: round(float(np.mean([b[name] == c[name] for b, c in zip(base, cat)])), 4)
+        for name in ("meal_plan_type", "health_tag")
+    }
+
+    for label in planners:
+        r = results[label]
+        print(f"\n--- {label} ---")
+        print(f"features {r['features']}, artifacts {r['artifact_mb']} MB, {r['trees']['trees']} trees "
+              f"(mean depth {r['trees']['mean_depth']}, mean leaves {r['trees']['mean_leaves']})")
+        print("latency " + ", ".join(f"{k.replace('_', ' ')} {v:.2f} ms" for k, v in r["latency_ms"].items()))
+        print("R² " + ", ".join(f"{k} {v:.4f}" for k, v in r["r2"].items()))
+        print("accuracy " + ", ".join(f"{k} {v:.4f}" for k, v in r["accuracy"].items()))
+    print("\nagreement " + ", ".join(f"{k} {v:.2%}" for k, v in results["agreement"].items()))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
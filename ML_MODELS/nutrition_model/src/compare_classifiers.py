@@ -0,0 +1,85 @@
+# -----------------------------
+# compare_classifiers.py - One-vs-rest vs multiclass meal planner heads
+# -----------------------------
+# Run from the folder holding meal_planner_cleaned.csv after training.py
+# has produced meal_planner_multiclass_model.pkl:
+#   python compare_classifiers.py --artifacts ../artifacts
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from carefolio_ml.meal_planner import HEALTH_TAG_COLS, MEAL_PLAN_COLS, MealPlanner
+
+
+def median_ms(fn, repeats):
+    fn()  # warm up
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def decoded_labels(planner, X):
+    """(meal plan labels, health tag labels) as served, fallbacks as None"""
+    y_clf_pred = planner.classify_raw(X)
+    results = planner.decode(np.zeros((len(X), 4)), y_clf_pred)
+    meal = [r["meal_plan_type"] if r["meal_plan_type"] in MEAL_PLAN_COLS else None for r in results]
+    tag = [r["health_tag"] if r["health_tag"] in HEALTH_TAG_COLS else None for r in results]
+    return np.array(meal, dtype=object), np.array(tag, dtype=object), y_clf_pred
+
+
+def truth(df, cols):
+    bits = df.reindex(columns=cols, fill_value=0).to_numpy()
+    labels = np.array([cols[i] for i in bits.argmax(axis=1)], dtype=object)
+    labels[bits.sum(axis=1) != 1] = None
+    return labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agreement report: one-vs-rest vs multiclass meal planner")
+    parser.add_argument("--data", default="meal_planner_cleaned.csv")
+    parser.add_argument("--artifacts", default=os.path.join("..", "artifacts"))
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    onevsrest = MealPlanner(args.artifacts, variant="onevsrest").load()
+    multiclass = MealPlanner(args.artifacts, variant="multiclass").load()
+    X = onevsrest.preprocess(df.to_dict("records"))
+    print(f"Dataset shape: {df.shape}")
+
+    ovr_meal, ovr_tag, ovr_bits = decoded_labels(onevsrest, X)
+    mc_meal, mc_tag, _ = decoded_labels(multiclass, X)
+
+    print("\n--- One-vs-rest decoding issues ---")
+    for name, start, cols in (("meal_plan_type", 0, MEAL_PLAN_COLS), ("health_tag", len(MEAL_PLAN_COLS), HEALTH_TAG_COLS)):
+        fired = np.asarray(ovr_bits)[:, start:start + len(cols)].sum(axis=1)
+        print(f"{name}: no label {np.mean(fired == 0):.2%}, conflicting labels {np.mean(fired > 1):.2%}")
+
+    print("\n--- Agreement with current artifacts ---")
+    for name, ovr, mc, cols in (("meal_plan_type", ovr_meal, mc_meal, MEAL_PLAN_COLS),
+                                ("health_tag", ovr_tag, mc_tag, HEALTH_TAG_COLS)):
+        true = truth(df, cols)
+        known = np.array([label is not None for label in true])
+        print(f"{name}: agreement {np.mean(ovr == mc):.2%} | "
+              f"accuracy one-vs-rest {np.mean(ovr[known] == true[known]):.3f}, "
+              f"multiclass {np.mean(mc[known] == true[known]):.3f}")
+
+    print("\n--- Classification latency (median) ---")
+    single, batch = X.iloc[[0]], X.iloc[:1000]
+    for label, planner in (("one-vs-rest", onevsrest), ("multiclass", multiclass)):
+        n_boosters = len(planner.boosters()) - len(planner.regressor.estimators_)
+        single_ms = median_ms(lambda: planner.classify_raw(single), args.repeats)
+        batch_ms = median_ms(lambda: planner.classify_raw(batch), max(args.repeats // 10, 5))
+        print(f"{label:<12} {n_boosters} boosters: 1 row {single_ms:.2f} ms, {len(batch)} rows {batch_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
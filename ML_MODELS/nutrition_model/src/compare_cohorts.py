@@ -0,0 +1,89 @@
+# -----------------------------
+# compare_cohorts.py - Global vs cohort-routed meal planner, per cohort
+# -----------------------------
+# Serves each cohort's dataset rows (diabetes x hypertension x goal, see
+# carefolio_ml/meal_cohorts.py) through the global model and through
+# MealPlanner with cohort routing, and reports accuracy, R², latency and
+# tree count per cohort. Cohorts without a model of their own fall back to
+# the global model, so both sides match there. Run from the folder holding
+# meal_planner_cleaned.csv after training.py:
+#   python compare_cohorts.py --artifacts ../artifacts
+#   python compare_cohorts.py --artifacts ../artifacts --variant multiclass --output cohorts.json
+import argparse
+import json
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from carefolio_ml.meal_cohorts import COHORT_MODEL_FILE, cohort_estimators, cohort_keys
+from carefolio_ml.meal_planner import MealPlanner
+from compare_categorical import evaluate, median_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Global vs cohort-routed meal planner")
+    parser.add_argument("--data", default="meal_planner_cleaned.csv")
+    parser.add_argument("--artifacts", default=os.path.join("..", "artifacts"))
+    parser.add_argument("--variant", default="onevsrest", choices=["onevsrest", "multiclass", "categorical"],
+                        help="global model the cohorts fall back to")
+    parser.add_argument("--repeats", type=int, default=100)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    batch = df.to_dict("records")
+    keys = cohort_keys(df)
+    print(f"Dataset shape: {df.shape}")
+
+    planners = {
+        "global": MealPlanner(args.artifacts, variant=args.variant, cohorts=False).load(),
+        "cohort": MealPlanner(args.artifacts, variant=args.variant, cohorts=True).load(),
+    }
+    cohort_models = planners["cohort"].cohort_models or {}
+    training_report = joblib.load(os.path.join(args.artifacts, COHORT_MODEL_FILE))["report"] \
+        if cohort_models else {}
+    global_trees = sum(len(m.get_booster().get_dump()) for m in planners["global"].boosters())
+
+    results = {}
+    for key in sorted(set(keys)):
+        rows = np.flatnonzero(keys == key)
+        sub_df, sub_batch = df.iloc[rows], [batch[i] for i in rows]
+        bundle = cohort_models.get(key)
+        entry = {"rows": len(rows), "routed": bundle is not None, "training": training_report.get(key)}
+        for label, planner in planners.items():
+            metrics, _ = evaluate(planner, sub_df, sub_batch)
+            single, cohort_batch = sub_batch[:1], sub_batch[:1000]
+            entry[label] = {
+                "latency_ms": {
+                    "1_row": round(median_ms(lambda: planner.predict(single), args.repeats), 3),
+                    f"{len(cohort_batch)}_rows": round(median_ms(lambda: planner.predict(cohort_batch),
+                                                                 max(args.repeats // 10, 5)), 3),
+                },
+                **metrics,
+            }
+        entry["global"]["trees"] = global_trees
+        entry["cohort"]["trees"] = sum(len(m.get_booster().get_dump()) for m in cohort_estimators(bundle)) \
+            if bundle else global_trees
+        results[key] = entry
+
+    for key, entry in results.items():
+        print(f"\n--- {key} ({entry['rows']} rows, {'cohort model' if entry['routed'] else 'global fallback'}) ---")
+        for label in planners:
+            r = entry[label]
+            print(f"{label:<7} {r['trees']} trees, latency "
+                  + ", ".join(f"{k.replace('_', ' ')} {v:.2f} ms" for k, v in r["latency_ms"].items())
+                  + ", R² " + " ".join(f"{v:.4f}" for v in r["r2"].values())
+                  + ", accuracy " + ", ".join(f"{k} {v:.4f}" for k, v in r["accuracy"].items()))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"variant": args.variant, "cohorts": results}, f, indent=2)
+        print(f"\n✅ Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
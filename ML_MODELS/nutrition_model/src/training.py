@@ -1,14 +1,65 @@
 # -----------------------------
 # meal_planner_train.py
 # -----------------------------
+# Run from the folder holding meal_planner_cleaned.csv:
+#   python training.py
+#   python training.py --dedup-bin '*=0.5'   # also merge near-duplicate rows
+#   python training.py --no-dedup            # fit on every row
+#   python training.py --dedup-check         # also fit on every row and compare
+#   python training.py --cohort-min-rows 500 # only specialize larger cohorts
+import argparse
+import os
+import sys
+import time
+
 import pandas as pd
 import numpy as np
+from sklearn.base import clone
 from sklearn.model_selection import train_test_split
 from sklearn.multioutput import MultiOutputRegressor, MultiOutputClassifier
 from sklearn.metrics import r2_score, mean_absolute_error, accuracy_score, f1_score
 import xgboost as xgb
 import joblib
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from carefolio_ml.dedup import compact_rows, parse_bin_widths, report_compaction, report_dedup_check
+from carefolio_ml.meal_cohorts import COHORT_MODEL_FILE, cohort_keys, predict_cohort
+from carefolio_ml.meal_planner import MEAL_PLANNER_VARIANT, MEAL_PLANNER_VARIANTS, MealPlanner
+from carefolio_ml.meal_features import CATEGORICAL_FIELDS, to_categorical_frame
+
+parser = argparse.ArgumentParser(description="Train the meal planner models")
+parser.add_argument("--no-dedup", action="store_true", help="fit on every row instead of unique rows with counts")
+parser.add_argument("--dedup-bin", action="append", metavar="COLUMN=WIDTH",
+                    help="round COLUMN to WIDTH before merging duplicates ('*' = all continuous columns)")
+parser.add_argument("--dedup-check", action="store_true",
+                    help="also fit the served models on every row and compare with the compacted ones (slower)")
+parser.add_argument("--cohort-min-rows", type=int, default=200,
+                    help="smallest cohort (training rows) that gets a model of its own")
+parser.add_argument("--cohort-baseline", default=MEAL_PLANNER_VARIANT, choices=MEAL_PLANNER_VARIANTS,
+                    help="served variant the cohort models fall back to and are judged against "
+                         "(default: $MEAL_PLANNER_VARIANT)")
+parser.add_argument("--cohort-tolerance", type=float, default=0.005,
+                    help="accuracy / R² a cohort model may lose against the global model and still be kept")
+args = parser.parse_args()
+bin_widths = parse_bin_widths(args.dedup_bin)
+
+
+def compact(label, X_part, y_part, average_targets=False):
+    """Unique rows + counts as sample_weight (see carefolio_ml/dedup.py)"""
+    if args.no_dedup:
+        return X_part, y_part, None
+    X_unique, y_unique, weights, stats = compact_rows(X_part, y_part, bin_widths, average_targets)
+    report_compaction(label, stats)
+    return X_unique, y_unique, weights
+
+
+def check_dedup(label, model, y_train, y_test, score, metric):
+    """Refit `model` on every training row and print how the compacted fit compares"""
+    if args.no_dedup or not args.dedup_check:
+        return
+    reference = clone(model).fit(X_train, y_train)
+    report_dedup_check(label, score(y_test, reference.predict(X_test)), score(y_test, model.predict(X_test)), metric)
+
 # -----------------------------
 # Load Dataset
 # -----------------------------
@@ -52,7 +103,11 @@ regressor = MultiOutputRegressor(
     )
 )
 
-regressor.fit(X_train, y_reg_train)
+# Squared error: identical features with averaged targets give the same fit
+X_fit, y_fit, weights = compact("Regression rows", X_train, y_reg_train, average_targets=True)
+start = time.perf_counter()
+regressor.fit(X_fit, y_fit, sample_weight=weights)
+print(f"Regression fit: {time.perf_counter() - start:.2f}s")
 
 # Predict & Evaluate Regression
 y_reg_pred = regressor.predict(X_test)
@@ -61,6 +116,9 @@ for i, col in enumerate(y_reg.columns):
     mae = mean_absolute_error(y_reg_test.iloc[:, i], y_reg_pred[:, i])
     print(f"Regression - {col}: R²={r2:.3f}, MAE={mae:.2f}")
 
+# Compacted fits are only approximately equivalent (see carefolio_ml/dedup.py)
+check_dedup("Regression", regressor, y_reg_train, y_reg_test, r2_score, "R²")
+
 # Save Regression Model
 joblib.dump(regressor, "meal_planner_regression_model.pkl")
 print("✅ Saved regression model as meal_planner_regression_model.pkl")
@@ -79,7 +137,10 @@ classifier = MultiOutputClassifier(
     )
 )
 
-classifier.fit(X_train, y_clf_train)
+X_fit, y_fit, weights = compact("Classification rows", X_train, y_clf_train)
+start = time.perf_counter()
+classifier.fit(X_fit, y_fit, sample_weight=weights)
+print(f"Classification fit: {time.perf_counter() - start:.2f}s")
 
 # Predict & Evaluate Classification
 y_clf_pred = classifier.predict(X_test)
@@ -88,6 +149,204 @@ for i, col in enumerate(y_clf.columns):
     f1 = f1_score(y_clf_test.iloc[:, i], y_clf_pred[:, i], average='weighted')
     print(f"Classification - {col}: Accuracy={acc:.3f}, F1={f1:.3f}")
 
+check_dedup("Classification", classifier, y_clf_train, y_clf_test,
+            lambda y_true, y_pred: float((np.asarray(y_true) == y_pred).mean()), "mean accuracy")
+
 # Save Classification Model
 joblib.dump(classifier, "meal_planner_classification_model.pkl")
 print("✅ Saved classification model as meal_planner_classification_model.pkl")
+
+# -----------------------------
+# Classification Model: native multiclass heads
+# -----------------------------
+# One 5-way meal plan booster and one 3-way health tag booster replace the
+# eight one-vs-rest models above: two predict calls per request instead of
+# eight, and argmax always yields exactly one label per head.
+def fit_multiclass_head(prefix, X_tr=X_train, X_te=X_test, name="Multiclass", **params):
+    cols = [col for col in classification_targets if col.startswith(prefix)]
+    train_bits = y_clf_train[cols].to_numpy()
+    test_bits = y_clf_test[cols].to_numpy()
+
+    # Rows with no (or several) labels set carry no usable target
+    train_mask = train_bits.sum(axis=1) == 1
+    test_mask = test_bits.sum(axis=1) == 1
+    print(f"{prefix}: dropped {int((~train_mask).sum())} train / {int((~test_mask).sum())} test rows without exactly one label")
+
+    # XGBoost needs contiguous class ids; keep only labels seen in training
+    train_ids = train_bits[train_mask].argmax(axis=1)
+    present = np.unique(train_ids)
+    labels = [cols[i] for i in present]
+
+    head = xgb.XGBClassifier(**{
+        "n_estimators": 200,
+        "max_depth": 6,
+        "learning_rate": 0.1,
+        "objective": 'multi:softprob',
+        "eval_metric": 'mlogloss',
+        "random_state": 42,
+        **params
+    })
+    X_fit, y_fit, weights = compact(f"{prefix.rstrip('_')} rows", X_tr[train_mask],
+                                    np.searchsorted(present, train_ids))
+    head.fit(X_fit, y_fit, sample_weight=weights)
+
+    test_true = np.array([cols[i] for i in test_bits[test_mask].argmax(axis=1)])
+    test_pred = np.array(labels)[head.predict_proba(X_te[test_mask]).argmax(axis=1)]
+    acc = accuracy_score(test_true, test_pred)
+    f1 = f1_score(test_true, test_pred, average='weighted')
+    print(f"{name} - {prefix.rstrip('_')}: Accuracy={acc:.3f}, F1={f1:.3f}")
+    return head, labels
+
+
+meal_plan_head, meal_plan_labels = fit_multiclass_head("meal_plan_type_")
+health_tag_head, health_tag_labels = fit_multiclass_head("health_tag_")
+
+# Save Multiclass Model (served with MEAL_PLANNER_VARIANT=multiclass)
+joblib.dump({
+    "meal_plan_type": meal_plan_head,
+    "meal_plan_labels": meal_plan_labels,
+    "health_tag": health_tag_head,
+    "health_tag_labels": health_tag_labels,
+}, "meal_planner_multiclass_model.pkl")
+print("✅ Saved multiclass model as meal_planner_multiclass_model.pkl")
+
+# -----------------------------
+# Native categorical model
+# -----------------------------
+# The 13 one-hot columns fold back into 5 raw categorical fields that
+# XGBoost splits on natively (one split can send any subset of levels each
+# way), so the model is 18 features wide instead of 24 and shallower trees
+# suffice. Served with MEAL_PLANNER_VARIANT=categorical; one-hot payloads
+# are translated by carefolio_ml/meal_features.py.
+numeric_features = [col for col in X.columns if not any(
+    col == one_hot for levels in CATEGORICAL_FIELDS.values() for one_hot in levels.values())]
+categories = {field: list(levels) for field, levels in CATEGORICAL_FIELDS.items()}
+X_cat_train = to_categorical_frame(X_train, numeric_features, categories)
+X_cat_test = to_categorical_frame(X_test, numeric_features, categories)
+
+categorical_params = dict(max_depth=4, tree_method='hist', enable_categorical=True, max_cat_to_onehot=1)
+cat_regressor = MultiOutputRegressor(
+    xgb.XGBRegressor(
+        n_estimators=200,
+        learning_rate=0.1,
+        objective='reg:squarederror',
+        random_state=42,
+        **categorical_params
+    )
+)
+X_fit, y_fit, weights = compact("Categorical regression rows", X_cat_train, y_reg_train, average_targets=True)
+cat_regressor.fit(X_fit, y_fit, sample_weight=weights)
+
+y_reg_pred = cat_regressor.predict(X_cat_test)
+for i, col in enumerate(y_reg.columns):
+    r2 = r2_score(y_reg_test.iloc[:, i], y_reg_pred[:, i])
+    mae = mean_absolute_error(y_reg_test.iloc[:, i], y_reg_pred[:, i])
+    print(f"Categorical regression - {col}: R²={r2:.3f}, MAE={mae:.2f}")
+
+cat_meal_plan_head, _ = fit_multiclass_head("meal_plan_type_", X_cat_train, X_cat_test, "Categorical", **categorical_params)
+cat_health_tag_head, _ = fit_multiclass_head("health_tag_", X_cat_train, X_cat_test, "Categorical", **categorical_params)
+
+joblib.dump({
+    "regressor": cat_regressor,
+    "categories": categories,
+    "meal_plan_type": cat_meal_plan_head,
+    "meal_plan_labels": meal_plan_labels,
+    "health_tag": cat_health_tag_head,
+    "health_tag_labels": health_tag_labels,
+}, "meal_planner_categorical_model.pkl")
+print("✅ Saved categorical model as meal_planner_categorical_model.pkl")
+
+# -----------------------------
+# Cohort-specialized models
+# -----------------------------
+# Diabetes, hypertension and the fitness goal mostly decide the plan, so
+# every cohort of them gets a small model trained on its own rows: 100
+# depth-3 rounds, the cohort's constant columns dropped, and no booster at
+# all for a head whose cohort only ever sees one label. A cohort model is
+# kept only if it is as accurate as the global model on the cohort's test
+# rows; served with MEAL_PLANNER_COHORTS=1, other rows use the global model.
+# "Global model" is the variant that will serve (--cohort-baseline), run
+# through MealPlanner from the artifacts saved above, so the gate sees
+# exactly the predictions a cohort model replaces.
+cohort_params = dict(n_estimators=100, max_depth=3, learning_rate=0.1, random_state=42)
+baseline = MealPlanner(".", variant=args.cohort_baseline, cohorts=False)
+global_nutrition, global_clf = baseline.predict_raw(baseline.preprocess(X_test.to_dict("records")))
+served = baseline.decode(global_nutrition, global_clf)
+global_labels = {name: np.array([r[name] for r in served], dtype=object) for name in ("meal_plan_type", "health_tag")}
+print(f"Cohort models are judged against the {args.cohort_baseline} global model")
+
+
+def single_labels(prefix, y_part):
+    """(rows with exactly one label set, that label per row)"""
+    cols = [col for col in classification_targets if col.startswith(prefix)]
+    bits = y_part[cols].to_numpy()
+    return bits.sum(axis=1) == 1, np.array(cols, dtype=object)[bits.argmax(axis=1)]
+
+
+def fit_cohort_head(label, prefix, X_tr, y_tr):
+    mask, labels = single_labels(prefix, y_tr)
+    present = np.unique(labels[mask])
+    if len(present) == 1:
+        return None, list(present)
+    head = xgb.XGBClassifier(objective='multi:softprob', eval_metric='mlogloss', **cohort_params)
+    X_fit, y_fit, weights = compact(label, X_tr[mask], np.searchsorted(present, labels[mask]))
+    head.fit(X_fit, y_fit, sample_weight=weights)
+    return head, list(present)
+
+
+train_keys = cohort_keys(X_train)
+test_keys = cohort_keys(X_test)
+cohort_models, cohort_report = {}, {}
+for key in sorted(set(train_keys)):
+    train_rows, test_rows = train_keys == key, test_keys == key
+    entry = {"train_rows": int(train_rows.sum()), "test_rows": int(test_rows.sum()), "kept": False}
+    cohort_report[key] = entry
+    if entry["train_rows"] < args.cohort_min_rows or not entry["test_rows"]:
+        print(f"Cohort {key}: {entry['train_rows']} train / {entry['test_rows']} test rows, left to the global model")
+        continue
+
+    # A head needs labelled rows to be fitted (train) and to be judged (test)
+    unlabelled = [f"{split} {prefix.rstrip('_')}" for prefix in ("meal_plan_type_", "health_tag_")
+                  for split, y_part in (("train", y_clf_train[train_rows]), ("test", y_clf_test[test_rows]))
+                  if not single_labels(prefix, y_part)[0].any()]
+    if unlabelled:
+        entry["reason"] = f"no single-label rows for {', '.join(unlabelled)}"
+        print(f"Cohort {key}: {entry['reason']}, left to the global model")
+        continue
+
+    X_tr = X_train[train_rows]
+    features = [col for col in X_tr.columns if X_tr[col].nunique() > 1]
+    X_tr = X_tr[features]
+    cohort_regressor = MultiOutputRegressor(xgb.XGBRegressor(objective='reg:squarederror', **cohort_params))
+    X_fit, y_fit, weights = compact(f"Cohort {key} regression rows", X_tr, y_reg_train[train_rows],
+                                    average_targets=True)
+    cohort_regressor.fit(X_fit, y_fit, sample_weight=weights)
+    bundle = {"feature_names": features, "regressor": cohort_regressor}
+    bundle["meal_plan_type"], bundle["meal_plan_labels"] = fit_cohort_head(
+        f"Cohort {key} meal_plan_type rows", "meal_plan_type_", X_tr, y_clf_train[train_rows])
+    bundle["health_tag"], bundle["health_tag_labels"] = fit_cohort_head(
+        f"Cohort {key} health_tag rows", "health_tag_", X_tr, y_clf_train[train_rows])
+
+    # Same test rows for the cohort model and the global one
+    nutrition, *cohort_labels = predict_cohort(bundle, X_test.loc[test_rows, features])
+    y_true = y_reg_test[test_rows]
+    entry.update(features=len(features), r2=round(r2_score(y_true, nutrition), 4),
+                 global_r2=round(r2_score(y_true, global_nutrition[test_rows]), 4))
+    kept = entry["r2"] >= entry["global_r2"] - args.cohort_tolerance
+    for (name, prefix), predicted in zip((("meal_plan_type", "meal_plan_type_"), ("health_tag", "health_tag_")),
+                                         cohort_labels):
+        mask, true_labels = single_labels(prefix, y_clf_test[test_rows])
+        entry[f"{name}_accuracy"] = round(accuracy_score(true_labels[mask], np.array(predicted)[mask]), 4)
+        entry[f"global_{name}_accuracy"] = round(
+            accuracy_score(true_labels[mask], global_labels[name][test_rows][mask]), 4)
+        kept = kept and entry[f"{name}_accuracy"] >= entry[f"global_{name}_accuracy"] - args.cohort_tolerance
+    entry["kept"] = bool(kept)
+    if kept:
+        cohort_models[key] = bundle
+    print(f"Cohort {key}: {len(features)} features, R²={entry['r2']:.3f} (global {entry['global_r2']:.3f}), "
+          f"meal plan acc={entry['meal_plan_type_accuracy']:.3f} (global {entry['global_meal_plan_type_accuracy']:.3f}), "
+          f"health tag acc={entry['health_tag_accuracy']:.3f} (global {entry['global_health_tag_accuracy']:.3f}) "
+          f"-> {'kept' if kept else 'global model'}")
+
+joblib.dump({"models": cohort_models, "report": cohort_report}, COHORT_MODEL_FILE)
+print(f"✅ Saved {len(cohort_models)} cohort models as {COHORT_MODEL_FILE}")
@@ -0,0 +1,68 @@
+# -----------------------------
+# test_llm_scheduler.py - Queue behaviour of chatbot/llm_scheduler.py
+# -----------------------------
+#   python -m pytest tests
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "chatbot"))
+from llm_scheduler import RequestScheduler
+
+
+class RerunException(BaseException):
+    """Stands in for Streamlit's rerun/stop exceptions"""
+
+
+def test_caller_leaving_from_on_wait_frees_the_queue():
+    scheduler = RequestScheduler(max_concurrency=1)
+    started, release = threading.Event(), threading.Event()
+
+    def hold_slot():
+        started.set()
+        release.wait(5)
+
+    holder = threading.Thread(target=scheduler.run, args=(hold_slot,))
+    holder.start()
+    assert started.wait(5)
+
+    def leave(position):
+        raise RerunException()
+
+    with pytest.raises(RerunException):
+        scheduler.run(lambda: None, on_wait=leave)
+    assert not scheduler._waiting
+
+    release.set()
+    holder.join(5)
+    result = {}
+    second = threading.Thread(target=lambda: result.update(value=scheduler.run(lambda: "ok")))
+    second.start()
+    second.join(5)
+    assert result.get("value") == ("ok", 0)
+
+
+def test_on_wait_runs_without_the_lock():
+    scheduler = RequestScheduler(max_concurrency=1)
+    started, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=scheduler.run, args=(lambda: (started.set(), release.wait(5)),))
+    holder.start()
+    assert started.wait(5)
+
+    positions = []
+
+    def on_wait(position):
+        # Another thread can take the scheduler's lock while the callback runs
+        free = []
+        probe = threading.Thread(target=lambda: free.append(scheduler._cond.acquire(timeout=1)
+                                                            and not scheduler._cond.release()))
+        probe.start()
+        probe.join(5)
+        positions.append((position, free == [True]))
+        release.set()
+
+    assert scheduler.run(lambda: "ok", on_wait=on_wait) == ("ok", 0)
+    holder.join(5)
+    assert positions[0] == (1, True)
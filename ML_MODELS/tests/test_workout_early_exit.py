@@ -0,0 +1,67 @@
+# -----------------------------
+# test_workout_early_exit.py - Served class and Confidence with early exit
+# -----------------------------
+# Uses the committed Workout_fitness artifacts.
+#   python -m pytest tests
+import itertools
+import os
+import sys
+import warnings
+
+import numpy as np
+import pytest
+
+ML_MODELS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_MODELS_DIR)
+from carefolio_ml.workout import WorkoutRecommender
+
+MODEL_DIR = os.path.join(ML_MODELS_DIR, "Workout_fitness")
+
+INPUTS = [
+    {"sex": sex, "age": str(age), "height": str(height), "weight": str(weight), "hypertension": hypertension,
+     "diabetes": diabetes, "goal": goal}
+    for sex, age, (height, weight), hypertension, diabetes, goal in itertools.product(
+        ("Male", "Female"), (22, 45, 68), ((1.55, 45), (1.70, 68), (1.80, 95), (1.65, 110)),
+        ("Yes", "No"), ("Yes", "No"), ("Weight Gain", "Weight Loss"))
+]
+
+
+@pytest.fixture(scope="module")
+def full_forest():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        recommender = WorkoutRecommender(MODEL_DIR, early_exit="off").load()
+    X = recommender.encode([recommender.map_inputs(item)[0] for item in INPUTS])
+    proba = recommender.model.predict_proba(X)
+    classes = recommender.target_encoder.inverse_transform(recommender.model.classes_[proba.argmax(axis=1)])
+    return recommender, classes, np.round(proba.max(axis=1) * 100, 2)
+
+
+def served_confidence(result):
+    return float(result["Confidence"].rstrip("%"))
+
+
+def test_full_forest_confidence_is_predict_proba(full_forest):
+    recommender, classes, confidences = full_forest
+    results = [r["result"] for r in recommender.recommend(INPUTS)]
+    assert [r["Fitness Type"] for r in results] == list(classes)
+    assert [served_confidence(r) for r in results] == list(confidences)
+    assert not any("Confidence Basis" in r for r in results)
+
+
+def test_exact_early_exit_labels_partial_confidence(full_forest):
+    _, classes, confidences = full_forest
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        recommender = WorkoutRecommender(MODEL_DIR, early_exit="exact").load()
+    results = [r["result"] for r in recommender.recommend(INPUTS)]
+
+    assert [r["Fitness Type"] for r in results] == list(classes)
+    early = [r for r in results if "Confidence Basis" in r]
+    assert early, "expected some rows to stop before the last tree"
+    # Unlabelled confidences are the full forest's; labelled ones name their trees
+    for result, confidence in zip(results, confidences):
+        if "Confidence Basis" not in result:
+            assert served_confidence(result) == confidence
+        else:
+            assert f"of {recommender._anytime.n_trees} trees" in result["Confidence Basis"]